@@ -1,11 +1,10 @@
 from strands import Agent
-from tools.athena_tool import run_athena
+from core.context_budget import TokenBudgetConversationManager
+from tools.athena_tool import read_result, run_athena
 
 ATHENA_DATABASE = "demo"
 allowed_tables = "customers"
-customers_agent = Agent(
-    name="customers_agent",
-    system_prompt=f"""
+SYSTEM_PROMPT = f"""
     You are the CUSTOMERS DATA AGENT.
 
     MANDATORY RULES (STRICT):
@@ -18,6 +17,17 @@ customers_agent = Agent(
     3. NEVER hallucinate data - ALWAYS execute SQL using the run_athena tool.
     4. Return ONLY the numerical result from the query execution.
     5. If asked how many customers, respond with the exact count from the database.
-    """,
-        tools=[run_athena],
+    """
+
+
+def make_customers_agent(model=None):
+    """A fresh customers_agent; each concurrent request needs its own."""
+    return Agent(
+        name="customers_agent",
+        model=model,
+        system_prompt=SYSTEM_PROMPT,
+        tools=[run_athena, read_result],
+        conversation_manager=TokenBudgetConversationManager(),
+        # run_athena rejects SQL that reads any other table
+        state={"allowed_tables": allowed_tables},
     )
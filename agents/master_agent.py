@@ -1,8 +1,7 @@
 from strands import Agent
+from core.context_budget import TokenBudgetConversationManager
 
-master_agent = Agent(
-    name="master_agent",
-    system_prompt="""
+SYSTEM_PROMPT = """
     You are the MASTER ROUTER AGENT.
 
     Routing:
@@ -14,5 +13,14 @@ master_agent = Agent(
     If a question spans multiple domains:
     - Invoke all relevant agents
     - Merge results into a final answer
-""",
-)
+"""
+
+
+def make_master_agent(model=None):
+    """A fresh master_agent; each concurrent request needs its own."""
+    return Agent(
+        name="master_agent",
+        model=model,
+        system_prompt=SYSTEM_PROMPT,
+        conversation_manager=TokenBudgetConversationManager(),
+    )
@@ -1,27 +1,41 @@
 from strands import Agent
-from tools.athena_tool import run_athena
+from core.context_budget import TokenBudgetConversationManager
+from tools.athena_tool import read_result, run_athena
+from core.schema_catalog import schema_catalog
 
 ATHENA_DATABASE = "demo"
 allowed_tables = "sales_transactions"
-sales_agent = Agent(
-    name="sales_agent",
-    system_prompt=f"""
+
+
+def build_system_prompt(schema: str) -> str:
+    return f"""
     You are the SALES DATA AGENT.
 
+    SCHEMA (database '{ATHENA_DATABASE}'):
+    {schema}
+
     MANDATORY RULES (STRICT):
-    1. FIRST action in every conversation:
-    Execute:
-    SELECT table_name, column_name, data_type
-    FROM information_schema.columns
-    WHERE table_schema = '{ATHENA_DATABASE}'
-    ORDER BY table_name, ordinal_position;
-
-    2. You are ONLY allowed to query these tables:
-    {allowed_tables}
-
-    3. NEVER hallucinate column or table names.
-    4. ALWAYS execute SQL using the run_athena tool.
-    5. Output ONLY results returned by Athena.
-""",
-        tools=[run_athena],
+    1. You are ONLY allowed to query these tables:
+       {allowed_tables}
+
+    2. Use ONLY the tables and columns listed in SCHEMA.
+       NEVER hallucinate column or table names.
+    3. ALWAYS execute SQL using the run_athena tool.
+    4. Output ONLY results returned by Athena.
+"""
+
+
+def make_sales_agent(model=None):
+    """A fresh sales_agent; each concurrent request needs its own."""
+    return schema_catalog.bind(
+        Agent(
+            name="sales_agent",
+            model=model,
+            tools=[run_athena, read_result],
+            conversation_manager=TokenBudgetConversationManager(),
+            # run_athena rejects SQL that reads any other table
+            state={"allowed_tables": allowed_tables},
+        ),
+        allowed_tables,
+        build_system_prompt,
     )
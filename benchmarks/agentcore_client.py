@@ -0,0 +1,56 @@
+"""
+Per-question latency of the pooled AgentCore client vs. the agentcore CLI.
+
+Start the runtime locally first (`python main.py`, listens on :8080), then:
+
+    python -m benchmarks.agentcore_client --url http://localhost:8080 --runs 20
+
+Pass --cli to also time `agentcore invoke`, which is what streamlit_app.py
+used to spawn for every question.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import time
+
+from core.agentcore_client import AgentCoreClient
+
+QUESTION = "How many customers are there?"
+
+
+def time_calls(call, runs):
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(label, latencies):
+    quantiles = statistics.quantiles(latencies, n=20)
+    print(
+        f"{label:<8} p50={statistics.median(latencies) * 1000:8.1f} ms  "
+        f"p95={quantiles[18] * 1000:8.1f} ms  max={max(latencies) * 1000:8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--question", default=QUESTION)
+    parser.add_argument("--cli", action="store_true")
+    args = parser.parse_args()
+
+    client = AgentCoreClient(local_url=args.url)
+    report("client", time_calls(lambda: client.invoke({"prompt": args.question}), args.runs))
+
+    if args.cli:
+        command = ["agentcore", "invoke", "--local", json.dumps({"prompt": args.question})]
+        report("cli", time_calls(lambda: subprocess.run(command, capture_output=True), args.runs))
+
+
+if __name__ == "__main__":
+    main()
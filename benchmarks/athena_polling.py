@@ -0,0 +1,83 @@
+"""
+Tail latency of the Athena poller against a stubbed client.
+
+Runs on a virtual clock, so no AWS access is needed and the benchmark
+finishes instantly:
+
+    python -m benchmarks.athena_polling
+"""
+import random
+import statistics
+
+from core.athena_polling import wait_for_query
+
+SHORT_QUERIES = [random.Random(i).uniform(0.1, 0.9) for i in range(500)]
+LONG_QUERIES = [random.Random(i).uniform(5, 60) for i in range(500)]
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class StubAthena:
+    """Reports RUNNING until `duration` seconds of virtual time have passed."""
+
+    def __init__(self, clock, duration):
+        self.clock = clock
+        self.finish_at = clock() + duration
+        self.calls = 0
+
+    def get_query_execution(self, QueryExecutionId):
+        self.calls += 1
+        state = "SUCCEEDED" if self.clock() >= self.finish_at else "RUNNING"
+        return {"QueryExecution": {"QueryExecutionId": QueryExecutionId, "Status": {"State": state}}}
+
+    def stop_query_execution(self, QueryExecutionId):
+        pass
+
+
+def fixed_poll(client, query_id, sleep, clock):
+    """The original run_athena loop: a flat one second between polls."""
+    while True:
+        status = client.get_query_execution(QueryExecutionId=query_id)
+        if status["QueryExecution"]["Status"]["State"] == "SUCCEEDED":
+            return
+        sleep(1)
+
+
+def measure(durations, poller):
+    overheads, calls = [], []
+    for duration in durations:
+        clock = VirtualClock()
+        client = StubAthena(clock, duration)
+        poller(client, "q", sleep=clock.sleep, clock=clock)
+        overheads.append(clock() - duration)
+        calls.append(client.calls)
+    return overheads, calls
+
+
+def pct(values, p):
+    return statistics.quantiles(values, n=100)[p - 1]
+
+
+def main():
+    print(f"{'workload':<8} {'poller':<9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'calls':>6}")
+    for label, durations in (("short", SHORT_QUERIES), ("long", LONG_QUERIES)):
+        for name, poller in (("fixed-1s", fixed_poll), ("adaptive", wait_for_query)):
+            overheads, calls = measure(durations, poller)
+            print(
+                f"{label:<8} {name:<9} "
+                f"{pct(overheads, 50) * 1000:>8.0f} {pct(overheads, 95) * 1000:>8.0f} "
+                f"{pct(overheads, 99) * 1000:>8.0f} {statistics.mean(calls):>6.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
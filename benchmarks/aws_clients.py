@@ -0,0 +1,145 @@
+"""
+Cold-start and concurrency cost of AWS clients, against a local HTTPS
+stand-in for the Athena/DynamoDB JSON APIs (self-signed via the openssl
+CLI, so TLS handshakes are part of the numbers).
+
+Compares a default boto3 client built at first use with the shared
+factory in core.aws after warm_up(), then hammers both from many threads.
+The hammer runs are repeated, alternating clients, and reported as median
+and range, since a single run on a shared machine varies by more than the
+difference between the pools:
+
+    python -m benchmarks.aws_clients [--threads 32] [--calls 20] [--repeats 7]
+"""
+import argparse
+import os
+import ssl
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+SERVICE_LATENCY = 0.02
+
+
+class StandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(SERVICE_LATENCY)
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-amz-json-1.1")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TLSServer(ThreadingHTTPServer):
+    """Does each TLS handshake on the connection's own thread, not in accept()."""
+
+    context = None
+
+    def finish_request(self, request, client_address):
+        super().finish_request(self.context.wrap_socket(request, server_side=True), client_address)
+
+
+def start_stand_in(workdir: Path):
+    cert, key = workdir / "cert.pem", workdir / "key.pem"
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+            "-keyout", str(key), "-out", str(cert),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    server = TLSServer(("127.0.0.1", 0), StandIn)
+    server.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    server.context.load_cert_chain(cert, key)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, cert
+
+
+def timed(call):
+    start = time.perf_counter()
+    call()
+    return (time.perf_counter() - start) * 1000
+
+
+def hammer(client, threads: int, calls: int):
+    def worker(_):
+        return [timed(lambda: client.list_work_groups(MaxResults=1)) for _ in range(calls)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        latencies = [ms for batch in pool.map(worker, range(threads)) for ms in batch]
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, statistics.quantiles(latencies, n=20)[18]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        server, cert = start_stand_in(Path(workdir))
+        os.environ.update({
+            "AWS_ENDPOINT_URL": f"https://localhost:{server.server_address[1]}",
+            "AWS_CA_BUNDLE": str(cert),
+            "AWS_ACCESS_KEY_ID": "stand-in",
+            "AWS_SECRET_ACCESS_KEY": "stand-in",
+        })
+
+        import boto3
+
+        from core import aws
+
+        # Default client built when the first request needs it
+        default_cold = timed(
+            lambda: boto3.Session(region_name=aws.AWS_REGION).client("athena").list_work_groups(MaxResults=1)
+        )
+
+        # Shared factory, warmed up at startup
+        warm_up = sum(aws.warm_up(("athena", "dynamodb")).values())
+        warmed_first = timed(lambda: aws.get_client("athena").list_work_groups(MaxResults=1))
+
+        print(f"first call, default client built on demand: {default_cold:8.1f} ms")
+        print(f"warm-up at startup (off the request path):   {warm_up:8.1f} ms")
+        print(f"first call after warm-up:                    {warmed_first:8.1f} ms\n")
+
+        clients = {
+            "default (pool 10)": boto3.Session(region_name=aws.AWS_REGION).client("athena"),
+            f"shared (pool {aws.AWS_MAX_POOL_CONNECTIONS})": aws.get_client("athena"),
+        }
+        runs = {label: [] for label in clients}
+        for _ in range(args.repeats):
+            for label, client in clients.items():
+                runs[label].append(hammer(client, args.threads, args.calls))
+
+        print(f"{args.threads} threads x {args.calls} calls, {args.repeats} runs each")
+        print(f"{'client':<20} {'calls/s':>8} {'min':>8} {'max':>8} {'p95 ms':>8}")
+        for label, results in runs.items():
+            throughput = [t for t, _ in results]
+            p95 = statistics.median(p for _, p in results)
+            print(
+                f"{label:<20} {statistics.median(throughput):>8.1f} "
+                f"{min(throughput):>8.1f} {max(throughput):>8.1f} {p95:>8.1f}"
+            )
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
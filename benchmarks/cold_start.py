@@ -0,0 +1,203 @@
+"""
+Cold start of the AgentCore server in main.py: where import time goes,
+how long a fresh process takes to answer /ping, and the latency of the
+first /invocations request compared with a warm one.
+
+The server runs as a real subprocess on DuckDB over data/, with the
+Bedrock model replaced by the stub from benchmarks.concurrency and AWS
+pointed at a closed local port, so it needs no credentials or network:
+
+    python -m benchmarks.cold_start [--runs 3] [--settle 3] [--max-ready-ms 1500] [--max-first-ms 2500]
+
+The first request is sent both as soon as /ping answers and after
+--settle seconds, when the background warm start has had time to finish.
+While the early one runs, /ping is polled: a long round trip means the
+event loop was blocked and every other request stalled with it.
+Exits non-zero when a median exceeds its --max-* threshold.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+QUESTION = "How many customers are there? (request #{n})"
+READY_TIMEOUT = 60
+SERVER_ENV = {
+    "QUERY_BACKEND": "duckdb",
+    "AWS_ACCESS_KEY_ID": "cold-start",
+    "AWS_SECRET_ACCESS_KEY": "cold-start",
+    "AWS_ENDPOINT_URL": "http://127.0.0.1:9",
+    "AWS_EC2_METADATA_DISABLED": "true",
+}
+
+
+def import_profile(top: int):
+    """Total import time of main and its heaviest direct imports by package, in ms."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    packages = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        ms = int(cumulative) / 1000
+        # A module is listed after its imports, indented two spaces deeper
+        depth = len(name) - len(name.lstrip())
+        if depth == 3:
+            packages[name.strip().split(".")[0]] += ms
+        elif depth == 1 and name.strip() == "main":
+            return ms, sorted(packages.items(), key=lambda item: -item[1])[:top]
+        elif depth == 1:
+            packages.clear()
+    raise RuntimeError("main not found in -X importtime output")
+
+
+def serve(port: int, model_latency: float):
+    import main as app_main
+
+    def stub_model():
+        # Imported on first use like the real model, not while starting up
+        from benchmarks.concurrency import StubModel
+
+        return StubModel(model_latency)
+
+    app_main.bedrock_model = stub_model
+    app_main.app.run(port=port, host="127.0.0.1")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _invoke(port: int, n: int) -> float:
+    body = json.dumps({"prompt": QUESTION.format(n=n), "request_id": f"cold-{n}"}).encode()
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/invocations",
+        data=body,
+        headers={"Content-Type": "application/json"},
+    )
+    start = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=READY_TIMEOUT) as response:
+        reply = json.loads(response.read())
+    elapsed = (time.perf_counter() - start) * 1000
+    if not str(reply).startswith(f"request #{n}:"):
+        raise RuntimeError(f"unexpected reply: {reply!r}")
+    return elapsed
+
+
+def _ping_while(port: int, busy: threading.Event):
+    """Longest /ping round trip while `busy` is set: how long the event loop stalls."""
+    longest = 0.0
+    while busy.is_set():
+        start = time.perf_counter()
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/ping", timeout=READY_TIMEOUT):
+            pass
+        longest = max(longest, (time.perf_counter() - start) * 1000)
+        time.sleep(0.01)
+    return longest
+
+
+def measure(model_latency: float, settle: float):
+    """
+    (time to ready, first request, warm request, longest /ping during the
+    first request) in ms for one fresh server.
+    """
+    port = _free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.cold_start", "--serve", str(port),
+         "--model-latency", str(model_latency)],
+        env={**os.environ, **SERVER_ENV},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"server exited with {server.returncode}")
+            if time.perf_counter() - start > READY_TIMEOUT:
+                raise RuntimeError("server not ready")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/ping", timeout=1):
+                    break
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        ready = (time.perf_counter() - start) * 1000
+        time.sleep(settle)
+        busy = threading.Event()
+        busy.set()
+        with ThreadPoolExecutor(1) as pinger:
+            stall = pinger.submit(_ping_while, port, busy)
+            try:
+                first = _invoke(port, 1)
+            finally:
+                busy.clear()
+            stall = stall.result()
+        return ready, first, _invoke(port, 2), stall
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--model-latency", type=float, default=0.05)
+    parser.add_argument("--settle", type=float, default=3.0)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--max-ready-ms", type=float)
+    parser.add_argument("--max-first-ms", type=float)
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.model_latency)
+        return
+
+    total, packages = import_profile(args.top)
+    print(f"import main: {total:.0f} ms")
+    for name, ms in packages:
+        print(f"  {name:<28} {ms:>8.1f} ms")
+
+    def medians(settle):
+        runs = [measure(args.model_latency, settle) for _ in range(args.runs)]
+        return [statistics.median(values) for values in zip(*runs)]
+
+    ready, first, warm, stall = medians(0)
+    _, settled, _, _ = medians(args.settle)
+    print(f"\nmedian of {args.runs} fresh servers each")
+    print(f"time to ready (/ping):             {ready:8.0f} ms")
+    print(f"first request, sent at ready:      {first:8.0f} ms")
+    print(f"first request, sent {args.settle:g} s later:   {settled:8.0f} ms")
+    print(f"second request:                    {warm:8.0f} ms")
+    print(f"longest /ping during first:        {stall:8.0f} ms")
+
+    failed = [
+        f"{label} {value:.0f} ms > {limit:.0f} ms"
+        for label, value, limit in (
+            ("time to ready", ready, args.max_ready_ms),
+            ("first request", settled, args.max_first_ms),
+        )
+        if limit is not None and value > limit
+    ]
+    if failed:
+        sys.exit("regression: " + "; ".join(failed))
+
+
+if __name__ == "__main__":
+    main()
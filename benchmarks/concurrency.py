@@ -0,0 +1,178 @@
+"""
+Load test for concurrent requests through main.answer, with the model and
+the query backend replaced by stubs that only sleep, so the numbers show
+how the entrypoint scales rather than Bedrock or Athena latency.
+
+Every request carries its own number; the stub model puts it in the SQL and
+the answer, so any answer that comes back with another request's number is
+counted as cross-talk.
+
+    python -m benchmarks.concurrency [--requests 64] [--concurrency 16]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import re
+import statistics
+import time
+import uuid
+
+from strands.models import Model
+
+from tools.backends import QueryBackend
+
+QUESTIONS = [
+    "How many customers are there? (request #{n})",
+    "What is the revenue by payment mode? (request #{n})",
+    "How many clients are in each region? (request #{n})",
+    "Which products sold the most units? (request #{n})",
+]
+_MARKER = re.compile(r"#(\d+)")
+_SCHEMA_TABLE = re.compile(r"demo\.(\w+)\(")
+
+
+class StubModel(Model):
+    """
+    Calls run_athena once, on the first table in the agent's schema, then
+    answers with what it got back.
+    """
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.config = {}
+
+    def update_config(self, **model_config):
+        self.config.update(model_config)
+
+    def get_config(self):
+        return self.config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError
+        yield
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        question = next(
+            block["text"]
+            for message in reversed(messages)
+            if message["role"] == "user"
+            for block in message["content"]
+            if "text" in block
+        )
+        marker = _MARKER.search(question).group(1)
+        results = [block["toolResult"] for block in messages[-1]["content"] if "toolResult" in block]
+
+        yield {"messageStart": {"role": "assistant"}}
+        if not results:
+            table = _SCHEMA_TABLE.search(system_prompt or "")
+            sql = f"SELECT COUNT(*) AS n FROM {table.group(1) if table else 'customers'} WHERE {marker} = {marker}"
+            yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": uuid.uuid4().hex, "name": "run_athena"}}}}
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps({"sql": sql})}}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+        else:
+            text = f"request #{marker}: {results[0]['content'][0].get('text', '')}"
+            yield {"contentBlockStart": {"start": {}}}
+            yield {"contentBlockDelta": {"delta": {"text": text}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+        yield {
+            "metadata": {
+                "usage": {"inputTokens": 0, "outputTokens": 0, "totalTokens": 0},
+                "metrics": {"latencyMs": int(self.latency * 1000)},
+            }
+        }
+
+
+class StubBackend(QueryBackend):
+    """Echoes the request number from the SQL after a fixed delay."""
+
+    name = "stub"
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def _rows(self, sql):
+        return [{"request": re.search(r"WHERE (\d+) =", sql).group(1)}]
+
+    def execute(self, sql, timeout, max_rows, max_bytes):
+        time.sleep(self.latency)
+        return self._rows(sql)
+
+    async def execute_async(self, sql, timeout, max_rows, max_bytes):
+        await asyncio.sleep(self.latency)
+        return self._rows(sql)
+
+
+def _pct(values, p):
+    return statistics.quantiles(values, n=100, method="inclusive")[p - 1] if len(values) > 1 else values[0]
+
+
+async def _run(main, requests: int, concurrency: int):
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+    crossed = 0
+
+    async def one(n):
+        nonlocal crossed
+        question = QUESTIONS[n % len(QUESTIONS)].format(n=n)
+        async with gate:
+            start = time.perf_counter()
+            reply = await main.answer({"request_id": f"load-{n}"}, question)
+            latencies.append((time.perf_counter() - start) * 1000)
+        if not str(reply).startswith(f"request #{n}:") or not str(reply).endswith(f"\n{n}"):
+            crossed += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(n) for n in range(requests)))
+    return requests / (time.perf_counter() - start), latencies, crossed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--model-latency", type=float, default=0.2)
+    parser.add_argument("--query-latency", type=float, default=0.3)
+    parser.add_argument("--pool-sizes", default="1,4,16")
+    args = parser.parse_args()
+
+    os.environ.setdefault("QUERY_BACKEND", "duckdb")
+    import main as app_main
+    import tools.athena_tool as athena_tool
+    from core.agent_pool import AgentPool
+    from core.query_cache import query_cache
+    from core.schema_catalog import schema_catalog
+
+    # The agents' schema comes from the local engine; their queries go to the stub
+    schema_catalog.load()
+    athena_tool.backend = StubBackend(args.query_latency)
+    history = app_main.get_history()
+    history.close()
+    history.submit = lambda record: True
+
+    print(f"{'pool':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'cross-talk':>11}")
+    for size in map(int, args.pool_sizes.split(",")):
+        app_main.agent_pool = AgentPool(
+            lambda: app_main.make_agents(StubModel(args.model_latency)),
+            size=size,
+            queue_limit=args.requests,
+        )
+        app_main.answer_cache.clear()
+        query_cache.clear()
+        # Agents and spans print per request; keep the report readable
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            throughput, latencies, crossed = asyncio.run(
+                _run(app_main, args.requests, args.concurrency)
+            )
+        print(
+            f"{size:>5} {throughput:>8.1f} {_pct(latencies, 50):>9.0f} "
+            f"{_pct(latencies, 95):>9.0f} {crossed:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
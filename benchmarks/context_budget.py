@@ -0,0 +1,47 @@
+"""
+Tokens a run_athena result costs in the model's context: the raw list of
+row dicts the tool used to return vs. the compact preview it returns now.
+
+Runs the queries on DuckDB over data/:
+
+    python -m benchmarks.context_budget
+"""
+import json
+
+from core.athena_results import MAX_RESULT_BYTES, MAX_RESULT_ROWS
+from core.context_budget import CHARS_PER_TOKEN, TOOL_RESULT_PREVIEW_ROWS, summarize_rows
+from tools.backends import DuckDBBackend
+
+QUERIES = {
+    "customer_count": "SELECT COUNT(*) AS customer_count FROM customers",
+    "payment_mode_mix": (
+        "SELECT payment_mode, COUNT(*) AS transactions, SUM(amount_paid) AS amount "
+        "FROM sales_transactions GROUP BY payment_mode"
+    ),
+    "top_products": (
+        "SELECT product_id, SUM(quantity) AS units FROM order_items "
+        "GROUP BY product_id ORDER BY units DESC LIMIT 10"
+    ),
+    "all_customers": "SELECT * FROM customers",
+    "recent_orders": "SELECT * FROM orders ORDER BY order_date DESC",
+}
+
+
+def _tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def main():
+    backend = DuckDBBackend()
+    print(f"{'query':<18} {'rows':>5} {'raw tokens':>11} {'preview tokens':>15}")
+    for name, sql in QUERIES.items():
+        rows = backend.execute(sql, 60, MAX_RESULT_ROWS, MAX_RESULT_BYTES)
+        result_id = "r0000000" if len(rows) > TOOL_RESULT_PREVIEW_ROWS else None
+        print(
+            f"{name:<18} {len(rows):>5} {_tokens(json.dumps(rows)):>11,} "
+            f"{_tokens(summarize_rows(rows, result_id)):>15,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Bytes scanned and runtime of the agents' typical queries, CSV vs. Parquet.
+
+Against Athena (needs both `demo` and the `demo_parquet` tables created
+from data/parquet/glue_ddl.sql):
+
+    python -m benchmarks.csv_vs_parquet --athena
+
+Locally, timing DuckDB over data/*.csv vs. data/parquet/ (generate the
+latter with `python data_generation.py --format parquet` inside data/).
+This gives runtime only; bytes scanned come from Athena:
+
+    python -m benchmarks.csv_vs_parquet
+"""
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+TYPICAL_QUERIES = {
+    "revenue_last_90d": (
+        "SELECT date_trunc('month', transaction_date) AS month, SUM(amount_paid) AS revenue "
+        "FROM sales_transactions WHERE transaction_date >= current_date - INTERVAL '90' DAY "
+        "GROUP BY 1 ORDER BY 1"
+    ),
+    "payment_mode_mix": (
+        "SELECT payment_mode, COUNT(*) AS transactions, SUM(amount_paid) AS amount "
+        "FROM sales_transactions GROUP BY payment_mode"
+    ),
+    "orders_by_status_30d": (
+        "SELECT order_status, COUNT(*) AS orders FROM orders "
+        "WHERE order_date >= current_date - INTERVAL '30' DAY GROUP BY order_status"
+    ),
+    "top_customer_by_orders": (
+        "SELECT customer_id, COUNT(order_id) AS cnt FROM orders "
+        "GROUP BY customer_id ORDER BY cnt DESC LIMIT 1"
+    ),
+    "top_products_by_quantity": (
+        "SELECT product_id, SUM(quantity) AS units FROM order_items "
+        "GROUP BY product_id ORDER BY units DESC LIMIT 5"
+    ),
+}
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+RUNS = 5
+
+
+def run_athena_benchmark():
+    import boto3
+
+    from core.athena_polling import wait_for_query
+    from tools.athena_tool import ATHENA_OUTPUT, ATHENA_REGION
+
+    athena = boto3.client("athena", region_name=ATHENA_REGION)
+    print(f"{'query':<26} {'format':<8} {'scanned':>12} {'runtime ms':>11}")
+    for name, sql in TYPICAL_QUERIES.items():
+        for label, database in (("csv", "demo"), ("parquet", "demo_parquet")):
+            qid = athena.start_query_execution(
+                QueryString=sql,
+                QueryExecutionContext={"Database": database},
+                ResultConfiguration={"OutputLocation": ATHENA_OUTPUT},
+            )["QueryExecutionId"]
+            stats = wait_for_query(athena, qid)["Statistics"]
+            print(
+                f"{name:<26} {label:<8} {stats['DataScannedInBytes']:>12,} "
+                f"{stats['TotalExecutionTimeInMillis']:>11,}"
+            )
+
+
+def run_local_benchmark():
+    import duckdb
+
+    tables = ("sales_transactions", "order_items", "orders")
+    missing = [
+        path for table in tables
+        for path in (DATA_DIR / f"{table}.csv", DATA_DIR / "parquet" / table)
+        if not path.exists()
+    ]
+    if missing:
+        raise SystemExit(
+            f"Missing {', '.join(str(p.relative_to(DATA_DIR)) for p in missing)} under {DATA_DIR}.\n"
+            "Generate both formats first, from inside data/:\n"
+            "    python data_generation.py --format csv\n"
+            "    python data_generation.py --format parquet"
+        )
+
+    sources = {
+        "csv": lambda table: f"read_csv_auto('{(DATA_DIR / f'{table}.csv').as_posix()}')",
+        "parquet": lambda table: (
+            f"read_parquet('{(DATA_DIR / 'parquet' / table).as_posix()}/**/*.parquet', "
+            "hive_partitioning = true)"
+        ),
+    }
+    conn = duckdb.connect()
+    # DuckDB reports no bytes scanned; that comparison needs --athena
+    print("Local DuckDB runtime only (no bytes scanned; use --athena for those)\n")
+    print(f"{'query':<26} {'format':<8} {'runtime ms':>10}")
+    for name, sql in TYPICAL_QUERIES.items():
+        for label, scan in sources.items():
+            # Query the files directly so every run pays the scan, as Athena does
+            local_sql = sql
+            for table in tables:
+                local_sql = local_sql.replace(f"FROM {table}", f"FROM {scan(table)}")
+            timings = []
+            for _ in range(RUNS):
+                start = time.perf_counter()
+                conn.execute(local_sql).fetchall()
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"{name:<26} {label:<8} {statistics.median(timings):>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--athena", action="store_true")
+    args = parser.parse_args()
+    run_athena_benchmark() if args.athena else run_local_benchmark()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Request-path cost of saving history: direct put_item vs. HistoryWriter.
+
+Uses an in-memory stand-in for the DynamoDB table that sleeps like a real
+round trip, so no AWS access is needed:
+
+    python -m benchmarks.history_writes
+"""
+import statistics
+import threading
+import time
+
+from core.history import HistoryWriter, history_record, new_request_id
+
+PUT_LATENCY = 0.015
+BATCH_LATENCY = 0.030
+REQUESTS = 200
+
+
+class InMemoryTable:
+    """Just enough of a boto3 Table: put_item and batch_writer."""
+
+    def __init__(self):
+        self.items = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def put_item(self, Item):
+        time.sleep(PUT_LATENCY)
+        with self._lock:
+            self.calls += 1
+            self.items[Item["query_id"]] = Item
+
+    def batch_writer(self, overwrite_by_pkeys=None):
+        return _Batch(self)
+
+
+class _Batch:
+    def __init__(self, table):
+        self.table = table
+        self.items = []
+
+    def __enter__(self):
+        return self
+
+    def put_item(self, Item):
+        self.items.append(Item)
+
+    def __exit__(self, *exc):
+        # BatchWriteItem takes up to 25 items per call
+        for start in range(0, len(self.items), 25):
+            time.sleep(BATCH_LATENCY)
+            with self.table._lock:
+                self.table.calls += 1
+                for item in self.items[start:start + 25]:
+                    self.table.items[item["query_id"]] = item
+
+
+def timed(save):
+    latencies = []
+    for i in range(REQUESTS):
+        request_id = new_request_id()
+        start = time.perf_counter()
+        save(history_record(request_id, f"question {i}", "answer"))
+        # The Streamlit side saves the same request again
+        save(history_record(request_id, f"question {i}", "answer", user_email="a@b.c"))
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(label, latencies, table):
+    print(
+        f"{label:<8} p50={statistics.median(latencies) * 1000:7.2f} ms  "
+        f"p95={statistics.quantiles(latencies, n=20)[18] * 1000:7.2f} ms  "
+        f"items={len(table.items)}  dynamodb calls={table.calls}"
+    )
+
+
+def main():
+    table = InMemoryTable()
+    report("direct", timed(lambda item: table.put_item(Item=item)), table)
+
+    table = InMemoryTable()
+    writer = HistoryWriter(table)
+    latencies = timed(writer.submit)
+    writer.close()
+    report("queued", latencies, table)
+    assert all("user_email" in item for item in table.items.values())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Hot agent questions against the base tables vs. their summary tables.
+
+Locally, on DuckDB over data/ (for a larger run, generate into data/parquet
+with `python data_generation.py --scale-factor 1000 --output-dir parquet`
+inside data/):
+
+    python -m benchmarks.materialized_views
+
+Against Athena, reporting bytes scanned (build the views first with
+`python -m core.materialized_views refresh`):
+
+    python -m benchmarks.materialized_views --athena
+"""
+import argparse
+import statistics
+import time
+
+from core.materialized_views import materialized_views
+from core.query_cache import referenced_tables
+
+HOT_QUERIES = {
+    "payment_mode_mix": (
+        "SELECT payment_mode, COUNT(*) AS transactions, SUM(amount_paid) AS amount "
+        "FROM sales_transactions GROUP BY payment_mode"
+    ),
+    "revenue_by_month": (
+        "SELECT date_trunc('month', transaction_date) AS month, SUM(amount_paid) AS revenue "
+        "FROM sales_transactions GROUP BY 1 ORDER BY 1"
+    ),
+    "top_customer_by_orders": (
+        "SELECT c.customer_name, COUNT(o.order_id) AS cnt FROM orders o "
+        "JOIN customers c ON o.customer_id = c.customer_id "
+        "GROUP BY c.customer_id, c.customer_name ORDER BY cnt DESC LIMIT 1"
+    ),
+    "top_products_by_quantity": (
+        "SELECT product_id, SUM(quantity) AS units FROM order_items "
+        "GROUP BY product_id ORDER BY units DESC LIMIT 5"
+    ),
+}
+RUNS = 5
+
+
+def _rows_read(backend, sql):
+    return sum(
+        int(backend.execute(f"SELECT COUNT(*) AS n FROM {table}", 60, 1, 1024)[0]["n"])
+        for table in referenced_tables(sql)
+    )
+
+
+def run_local_benchmark():
+    from tools.backends import DuckDBBackend
+
+    backend = DuckDBBackend()
+    started = time.perf_counter()
+    materialized_views.refresh(backend, full=True)
+    print(f"\nbuilt views in {(time.perf_counter() - started) * 1000:.1f} ms\n")
+
+    print(f"{'query':<26} {'source':<6} {'rows read':>12} {'median ms':>10}")
+    for name, sql in HOT_QUERIES.items():
+        for label, query in (("base", sql), ("mv", materialized_views.rewrite(sql))):
+            timings = []
+            for _ in range(RUNS):
+                start = time.perf_counter()
+                backend.execute(query, 60, 500, 64 * 1024)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(
+                f"{name:<26} {label:<6} {_rows_read(backend, query):>12,} "
+                f"{statistics.median(timings):>10.1f}"
+            )
+
+
+def run_athena_benchmark():
+    from core.athena_polling import wait_for_query
+    from tools.athena_tool import _start_query, athena, backend
+
+    materialized_views.verify(getattr(backend, "remote", backend))
+    print(f"{'query':<26} {'source':<6} {'scanned':>12} {'runtime ms':>11}")
+    for name, sql in HOT_QUERIES.items():
+        for label, query in (("base", sql), ("mv", materialized_views.rewrite(sql))):
+            stats = wait_for_query(athena, _start_query(query))["Statistics"]
+            print(
+                f"{name:<26} {label:<6} {stats['DataScannedInBytes']:>12,} "
+                f"{stats['TotalExecutionTimeInMillis']:>11,}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--athena", action="store_true")
+    args = parser.parse_args()
+    run_athena_benchmark() if args.athena else run_local_benchmark()
+
+
+if __name__ == "__main__":
+    main()
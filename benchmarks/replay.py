@@ -0,0 +1,517 @@
+"""
+Deterministic replay of the whole agent pipeline, so performance
+regressions in main.invoke show up without Bedrock or Athena.
+
+`record` runs a fixed question corpus through main.invoke with the real
+model and query backend and saves each model response, each query result
+and the schema the prompts were built from to a cassette. Replaying runs
+the same corpus through the same code (router, Swarm, fan-out, run_athena
+with its SQL guard, extract_final_answer, result shaping, HistoryWriter)
+with each agent's model returning that agent's recorded responses in
+order and the query backend returning the recorded rows:
+
+    python -m benchmarks.replay record [--model scripted] [--cassette PATH]
+    python -m benchmarks.replay [--passes 3] [--concurrency 4] [--latency-scale 0] [--stream]
+                                [--save-baseline PATH | --baseline PATH [--tolerance 0.25]]
+
+--stream sends each question with "stream": true, as the Streamlit page
+does, and reads the answer from the final event.
+
+Recorded latencies are replayed multiplied by --latency-scale; the default
+of 0 measures only the pipeline's own overhead. Input tokens are rescaled
+by how much larger or smaller each model call's context is than when it
+was recorded, so prompt and tool-result growth shows up as tokens.
+
+`--model scripted` records offline with a model that hands off, queries
+and answers by rule, over whatever QUERY_BACKEND is set (e.g. duckdb).
+
+Reports throughput, p50/p95 per traced stage, model turns and tokens per
+question. Exits non-zero when a metric is worse than --baseline by more
+than --tolerance, or when the pipeline asks for a model turn or query the
+cassette does not have (re-record after changing routing or prompts).
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import time
+import uuid
+from contextvars import ContextVar
+from pathlib import Path
+
+from strands.models import Model
+
+from core.athena_results import ResultRows
+from core.context_budget import CHARS_PER_TOKEN
+from tools.backends import QueryBackend
+
+CASSETTE = Path(__file__).with_name("replay_cassette.json")
+QUESTIONS = [
+    # One specialist
+    "How many customers are there?",
+    "How many clients are in each region?",
+    "What is the revenue by payment mode?",
+    "What is the breakdown of product types?",
+    # Independent questions for several specialists: fan-out
+    "How many orders do we have and what is the total revenue?",
+    "How many clients are there? Which payment mode is most popular?",
+    # Spans specialists but needs a join: the Swarm
+    "Which customers spend the most on sales?",
+    # No routing keywords: the Swarm with the master agent
+    "Give me an overview of the business",
+    "Summarize how last year went",
+]
+STAGE_SLACK_MS = 2.0
+SCRIPTED_FALLBACK_AGENT = "sales_agent"
+
+_run = ContextVar("replay_run")
+
+
+class ReplayMiss(LookupError):
+    """The pipeline asked for a model turn or query result the cassette does not have."""
+
+
+class Run:
+    """One question's invocation: which model turn each agent is on, and what it cost."""
+
+    def __init__(self, question: str):
+        self.question = question
+        self.calls = {}
+        self.turns = 0
+        self.tokens = 0
+
+    def next_key(self, agent_name: str) -> str:
+        n = self.calls.get(agent_name, 0)
+        self.calls[agent_name] = n + 1
+        return f"{agent_name}#{n}"
+
+
+def _context_chars(messages, system_prompt, tool_specs) -> int:
+    return len(system_prompt or "") + len(json.dumps([messages, tool_specs or []], default=str))
+
+
+def _sql_key(sql: str) -> str:
+    return hashlib.sha1(" ".join(sql.split()).encode()).hexdigest()[:16]
+
+
+class Cassette:
+    def __init__(self, model=None, queries=None, schema=None):
+        self.model = model or {}
+        self.queries = queries or {}
+        self.schema = schema or {}
+        self.misses = []
+
+    @classmethod
+    def load(cls, path: Path):
+        data = json.loads(path.read_text())
+        schema = {t: [tuple(c) for c in columns] for t, columns in data["schema"].items()}
+        return cls(data["model"], data["queries"], schema)
+
+    def save(self, path: Path):
+        path.write_text(json.dumps(
+            {"schema": self.schema, "model": self.model, "queries": self.queries}, indent=1
+        ))
+
+    def miss(self, message: str):
+        self.misses.append(message)
+        return ReplayMiss(message)
+
+
+class _AgentModel(Model):
+    """A model bound to one agent, so its turns can be keyed by agent name."""
+
+    def __init__(self, agent, cassette: Cassette):
+        self.agent = agent
+        self.cassette = cassette
+        self.config = {}
+
+    def update_config(self, **model_config):
+        self.config.update(model_config)
+
+    def get_config(self):
+        return self.config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError
+        yield
+
+
+class ReplayModel(_AgentModel):
+    def __init__(self, agent, cassette: Cassette, latency_scale: float):
+        super().__init__(agent, cassette)
+        self.latency_scale = latency_scale
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        run = _run.get()
+        key = run.next_key(self.agent.name)
+        turn = self.cassette.model.get(run.question, {}).get(key)
+        if turn is None:
+            raise self.cassette.miss(f"no model turn {key} for {run.question!r}")
+        if self.latency_scale:
+            await asyncio.sleep(turn["ms"] * self.latency_scale / 1000)
+
+        scale = _context_chars(messages, system_prompt, tool_specs) / max(turn["chars"], 1)
+        run.turns += 1
+        for event in turn["events"]:
+            usage = event.get("metadata", {}).get("usage")
+            if usage:
+                input_tokens = round(usage.get("inputTokens", 0) * scale)
+                output_tokens = usage.get("outputTokens", 0)
+                usage = {
+                    **usage,
+                    "inputTokens": input_tokens,
+                    "totalTokens": input_tokens + output_tokens,
+                }
+                run.tokens += usage["totalTokens"]
+                event = {"metadata": {**event["metadata"], "usage": usage}}
+            yield event
+
+
+class RecordingModel(_AgentModel):
+    def __init__(self, agent, cassette: Cassette, inner):
+        super().__init__(agent, cassette)
+        self.inner = inner
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        run = _run.get()
+        key = run.next_key(self.agent.name)
+        chars = _context_chars(messages, system_prompt, tool_specs)
+        events = []
+        start = time.perf_counter()
+        async for event in self.inner.stream(messages, tool_specs, system_prompt, agent=self.agent, **kwargs):
+            events.append(event)
+            yield event
+        run.turns += 1
+        self.cassette.model.setdefault(run.question, {})[key] = {
+            "ms": round((time.perf_counter() - start) * 1000, 1),
+            "chars": chars,
+            "events": events,
+        }
+
+
+class ScriptedModel(Model):
+    """
+    Stands in for Bedrock when recording offline. The master agent hands off
+    to the specialist the router would guess; a specialist runs one query on
+    its first table, grouped by a column the question names, then answers
+    with the result.
+    """
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.config = {}
+
+    def update_config(self, **model_config):
+        self.config.update(model_config)
+
+    def get_config(self):
+        return self.config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError
+        yield
+
+    def _sql(self, agent, question: str) -> str:
+        from core.schema_catalog import schema_catalog, split_tables
+
+        table = split_tables(agent.state.get("allowed_tables"))[0]
+        words = question.lower()
+        for name, dtype in schema_catalog.columns(table):
+            if dtype.startswith(("varchar", "string")) and all(p in words for p in name.lower().split("_")):
+                return f"SELECT {name}, COUNT(*) AS n FROM {table} GROUP BY {name} ORDER BY n DESC"
+        return f"SELECT COUNT(*) AS n FROM {table}"
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, agent=None, **kwargs):
+        from core.router import route_question
+
+        await asyncio.sleep(self.latency)
+        question = _run.get().question
+        results = [b["toolResult"] for b in messages[-1]["content"] if "toolResult" in b]
+        if results:
+            tool, text = None, f"{question}\n" + "".join(
+                c.get("text", "") for r in results for c in r["content"]
+            )
+        elif agent.name == "master_agent":
+            route = route_question(question)
+            target = route.agents[0] if route.agents else SCRIPTED_FALLBACK_AGENT
+            tool, text = ("handoff_to_agent", {"agent_name": target, "message": question}), None
+        else:
+            tool, text = ("run_athena", {"sql": self._sql(agent, question)}), None
+
+        yield {"messageStart": {"role": "assistant"}}
+        if tool:
+            name, arguments = tool
+            yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": uuid.uuid4().hex, "name": name}}}}
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps(arguments)}}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+            output = json.dumps(arguments)
+        else:
+            yield {"contentBlockStart": {"start": {}}}
+            yield {"contentBlockDelta": {"delta": {"text": text}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+            output = text
+        input_tokens = _context_chars(messages, system_prompt, tool_specs) // CHARS_PER_TOKEN
+        output_tokens = len(output) // CHARS_PER_TOKEN
+        yield {
+            "metadata": {
+                "usage": {
+                    "inputTokens": input_tokens,
+                    "outputTokens": output_tokens,
+                    "totalTokens": input_tokens + output_tokens,
+                },
+                "metrics": {"latencyMs": int(self.latency * 1000)},
+            }
+        }
+
+
+class ReplayBackend(QueryBackend):
+    name = "replay"
+
+    def __init__(self, cassette: Cassette, latency_scale: float):
+        self.cassette = cassette
+        self.latency_scale = latency_scale
+
+    def _rows(self, sql):
+        result = self.cassette.queries.get(_sql_key(sql))
+        if result is None:
+            raise self.cassette.miss(f"no recorded result for SQL: {sql}")
+        return result, ResultRows(result["rows"], [tuple(c) for c in result["columns"] or ()] or None)
+
+    def execute(self, sql, timeout, max_rows, max_bytes):
+        result, rows = self._rows(sql)
+        time.sleep(result["ms"] * self.latency_scale / 1000)
+        return rows
+
+    async def execute_async(self, sql, timeout, max_rows, max_bytes):
+        result, rows = self._rows(sql)
+        await asyncio.sleep(result["ms"] * self.latency_scale / 1000)
+        return rows
+
+
+class RecordingBackend(QueryBackend):
+    name = "recording"
+
+    def __init__(self, cassette: Cassette, inner: QueryBackend):
+        self.cassette = cassette
+        self.inner = inner
+
+    def _save(self, sql, rows, start):
+        self.cassette.queries[_sql_key(sql)] = {
+            "sql": sql,
+            "ms": round((time.perf_counter() - start) * 1000, 1),
+            "columns": getattr(rows, "columns", None),
+            "rows": list(rows),
+        }
+        return rows
+
+    def execute(self, sql, timeout, max_rows, max_bytes):
+        start = time.perf_counter()
+        return self._save(sql, self.inner.execute(sql, timeout, max_rows, max_bytes), start)
+
+    async def execute_async(self, sql, timeout, max_rows, max_bytes):
+        start = time.perf_counter()
+        return self._save(sql, await self.inner.execute_async(sql, timeout, max_rows, max_bytes), start)
+
+
+class MemoryTable:
+    """Just enough of a DynamoDB Table for HistoryWriter."""
+
+    def __init__(self):
+        self.items = {}
+
+    @contextlib.contextmanager
+    def batch_writer(self, overwrite_by_pkeys=None):
+        yield self
+
+    def put_item(self, Item):
+        self.items[Item["query_id"]] = Item
+
+
+def _bind(agents, make_model):
+    for agent in [agents.master, *agents.specialists.values()]:
+        agent.model = make_model(agent)
+    return agents
+
+
+async def _pass(app_main, concurrency: int, stream: bool = False):
+    gate = asyncio.Semaphore(concurrency)
+    runs = []
+
+    async def one(n, question):
+        async with gate:
+            run = Run(question)
+            _run.set(run)
+            payload = {"prompt": question, "request_id": f"replay-{n}-{uuid.uuid4().hex[:8]}"}
+            if stream:
+                payload["stream"] = True
+            answer = await app_main.invoke(payload)
+            if stream:
+                events = [event async for event in answer]
+                answer = next((e.get("answer") for e in events if e.get("type") == "final"), None)
+            runs.append((run, answer))
+
+    await asyncio.gather(*(asyncio.create_task(one(n, q)) for n, q in enumerate(QUESTIONS)))
+    return runs
+
+
+def _prepare(app_main, make_model, concurrency: int):
+    from core.agent_pool import AgentPool
+    from core.history import HistoryWriter
+
+    app_main.agent_pool = AgentPool(
+        lambda: _bind(app_main.make_agents(ScriptedModel(0)), make_model),
+        size=concurrency,
+        queue_limit=len(QUESTIONS),
+    )
+    if app_main._history is not None:
+        app_main._history.close()
+    app_main._history = HistoryWriter(MemoryTable())
+    return app_main._history
+
+
+def _clear_caches(app_main):
+    from core.query_cache import query_cache
+
+    app_main.answer_cache.clear()
+    query_cache.clear()
+
+
+def record(args):
+    import main as app_main
+    import tools.athena_tool as athena_tool
+    from core.schema_catalog import schema_catalog
+
+    cassette = Cassette()
+    cassette.schema = schema_catalog.load()
+    athena_tool.backend = RecordingBackend(cassette, athena_tool.backend)
+    inner = ScriptedModel(args.model_latency) if args.model == "scripted" else app_main.bedrock_model()
+    _prepare(app_main, lambda agent: RecordingModel(agent, cassette, inner), 1)
+    _clear_caches(app_main)
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        runs = asyncio.run(_pass(app_main, 1))
+    for run, answer in runs:
+        print(f"{run.turns:>3} turns  {run.question}")
+    cassette.save(args.cassette)
+    print(f"recorded {len(runs)} questions, {len(cassette.queries)} queries to {args.cassette}")
+
+
+def _pct(values, p):
+    import statistics
+
+    return statistics.quantiles(values, n=100, method="inclusive")[p - 1] if len(values) > 1 else values[0]
+
+
+def replay(args):
+    import main as app_main
+    import core.tracing as tracing
+    import tools.athena_tool as athena_tool
+    from core.schema_catalog import schema_catalog
+
+    cassette = Cassette.load(args.cassette)
+    schema_catalog.set_tables(cassette.schema)
+    athena_tool.backend = ReplayBackend(cassette, args.latency_scale)
+    history = _prepare(
+        app_main, lambda agent: ReplayModel(agent, cassette, args.latency_scale), args.concurrency
+    )
+
+    trace_log = Path(tempfile.mkdtemp()) / "traces.jsonl"
+
+    async def passes():
+        runs, elapsed = [], 0.0
+        # The first pass builds agents and loads pyarrow; only the rest are measured
+        for n in range(args.passes + 1):
+            _clear_caches(app_main)
+            tracing.TRACE_LOG = str(trace_log) if n else None
+            start = time.perf_counter()
+            results = await _pass(app_main, args.concurrency, args.stream)
+            if n:
+                elapsed += time.perf_counter() - start
+                runs.extend(results)
+        tracing.TRACE_LOG = None
+        return runs, elapsed
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        runs, elapsed = asyncio.run(passes())
+        history.flush()
+
+    stages = {
+        stage: {"p50": round(p50, 2), "p95": round(p95, 2)}
+        for stage, count, p50, p95 in tracing.summarize(trace_log.read_text().splitlines())[0]
+    }
+    metrics = {
+        "questions": len(runs),
+        "throughput_qps": round(len(runs) / elapsed, 2),
+        "turns_per_question": round(sum(r.turns for r, _ in runs) / len(runs), 2),
+        "tokens_per_question": round(sum(r.tokens for r, _ in runs) / len(runs), 1),
+        "stages": stages,
+    }
+    answered = sum(1 for _, answer in runs if answer)
+
+    print(f"{len(QUESTIONS)} questions x {args.passes} passes, concurrency {args.concurrency}, "
+          f"latency scale {args.latency_scale:g}")
+    print(f"throughput:           {metrics['throughput_qps']:8.2f} questions/s")
+    print(f"model turns/question: {metrics['turns_per_question']:8.2f}")
+    print(f"tokens/question:      {metrics['tokens_per_question']:8.1f}")
+    print(f"answered:             {answered:8d} / {len(runs)}")
+    print(f"history items:        {len(history.table.items):8d}")
+    print(f"\n{'stage':<22} {'p50 ms':>10} {'p95 ms':>10}")
+    for stage, values in stages.items():
+        print(f"{stage:<22} {values['p50']:>10.2f} {values['p95']:>10.2f}")
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(metrics, indent=1))
+        print(f"\nbaseline saved to {args.save_baseline}")
+
+    failed = sorted(set(cassette.misses))
+    if answered < len(runs):
+        failed.append(f"{len(runs) - answered} questions came back without an answer")
+    if args.baseline:
+        failed += regressions(json.loads(Path(args.baseline).read_text()), metrics, args.tolerance)
+    if failed:
+        raise SystemExit("regression:\n  " + "\n  ".join(failed))
+
+
+def regressions(baseline: dict, metrics: dict, tolerance: float):
+    """What in `metrics` is worse than `baseline` by more than `tolerance` (a fraction)."""
+    failed = []
+    if metrics["throughput_qps"] < baseline["throughput_qps"] * (1 - tolerance):
+        failed.append(f"throughput {metrics['throughput_qps']} < {baseline['throughput_qps']} questions/s")
+    for key in ("turns_per_question", "tokens_per_question"):
+        if metrics[key] > baseline[key] * (1 + tolerance):
+            failed.append(f"{key} {metrics[key]} > {baseline[key]}")
+    for stage, values in metrics["stages"].items():
+        before = baseline["stages"].get(stage)
+        if before and values["p95"] > before["p95"] * (1 + tolerance) + STAGE_SLACK_MS:
+            failed.append(f"{stage} p95 {values['p95']} ms > {before['p95']} ms")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("mode", nargs="?", choices=("replay", "record"), default="replay")
+    parser.add_argument("--cassette", type=Path, default=CASSETTE)
+    parser.add_argument("--passes", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-scale", type=float, default=0.0)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--baseline")
+    parser.add_argument("--save-baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--model", choices=("bedrock", "scripted"), default="bedrock")
+    parser.add_argument("--model-latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.mode == "record":
+        record(args)
+    else:
+        replay(args)
+
+
+if __name__ == "__main__":
+    main()
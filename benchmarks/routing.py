@@ -0,0 +1,95 @@
+"""
+Accuracy and latency of the fast-path router on a labeled question set.
+
+A question counts as correctly routed when the router is confident and
+picks the labeled agent, splits a question labeled "fanout" into
+independent parts for the specialists, or defers to the Swarm for
+questions labeled "swarm" (including those that span specialists but need
+a join). Every confident or fanned-out route saves at least the master
+agent's LLM turn.
+
+    python -m benchmarks.routing
+"""
+import statistics
+import time
+
+from core.router import route_question
+
+LABELED_QUESTIONS = [
+    ("How many customers are there?", "customers_agent"),
+    ("List all corporate buyers", "customers_agent"),
+    ("How many customers signed up this year?", "customers_agent"),
+    ("Which country has the most customers?", "customers_agent"),
+    ("Which customer has the most orders?", "orders_products_agent"),
+    ("Show the top 5 customers by number of orders", "orders_products_agent"),
+    ("How many orders were cancelled?", "orders_products_agent"),
+    ("What is the most expensive product?", "orders_products_agent"),
+    ("List all electric vehicles", "orders_products_agent"),
+    ("How many SUV models do we sell?", "orders_products_agent"),
+    ("Average quantity per order item", "orders_products_agent"),
+    ("Which products launched after 2022?", "orders_products_agent"),
+    ("How many clients do we have?", "clients_agent"),
+    ("List clients in the EMEA region", "clients_agent"),
+    ("Which region has the most clients?", "clients_agent"),
+    ("When was each client onboarded?", "clients_agent"),
+    ("What is the total revenue?", "sales_agent"),
+    ("Break down sales by payment mode", "sales_agent"),
+    ("How much was paid by EMI?", "sales_agent"),
+    ("Monthly revenue for the last year", "sales_agent"),
+    ("What is the average transaction amount?", "sales_agent"),
+    ("Which payment mode is most popular?", "sales_agent"),
+    ("How many clients do we have and what is the total revenue?", "fanout"),
+    ("How many customers are there? Which payment mode is most popular?", "fanout"),
+    ("How many orders were cancelled, and how much was paid by EMI?", "fanout"),
+    ("How many clients do we have and what is their revenue?", "swarm"),
+    ("Which customers spend the most on sales?", "swarm"),
+    ("How many orders and sales transactions do we have?", "swarm"),
+    ("Revenue by client region", "swarm"),
+    ("Which client's products generate the most revenue?", "swarm"),
+    ("Compare sales revenue across product types", "swarm"),
+    ("Hello, what can you do?", "swarm"),
+    ("Give me a summary of the business", "swarm"),
+]
+
+REPEAT = 200
+
+
+def main():
+    correct = 0
+    saved = 0
+    latencies = []
+    misses = []
+
+    for question, label in LABELED_QUESTIONS:
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            route = route_question(question)
+            latencies.append(time.perf_counter() - start)
+
+        if route.confident:
+            chosen = route.agent
+        elif route.parts:
+            chosen = "fanout"
+        else:
+            chosen = "swarm"
+        if chosen == label:
+            correct += 1
+        else:
+            misses.append((question, label, chosen, route.confidence))
+        if chosen != "swarm":
+            saved += 1
+
+    total = len(LABELED_QUESTIONS)
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"questions:            {total}")
+    print(f"routing accuracy:     {correct / total:.1%}")
+    print(f"fast-path rate:       {saved / total:.1%}")
+    print(f"LLM calls saved/query:{saved / total:>6.2f}")
+    print(f"latency p50:          {quantiles[49] * 1e6:.1f} us")
+    print(f"latency p95:          {quantiles[94] * 1e6:.1f} us")
+    for question, label, chosen, confidence in misses:
+        print(f"  miss: {question!r} expected={label} got={chosen} ({confidence:.2f})")
+
+
+if __name__ == "__main__":
+    main()
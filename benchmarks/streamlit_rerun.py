@@ -0,0 +1,222 @@
+"""
+Rerun time of streamlit_app.py, driven with Streamlit's AppTest against a
+local DynamoDB stand-in that answers GetItem/Query/PutItem after a fixed
+delay, so the numbers show what each rerun waits on, and an agent runtime
+stand-in that streams an answer over --agent-latency seconds.
+
+Logs in once, then reruns the page the way widget interactions do, and
+times a click on "Older questions" and on a past question. Besides the wall
+time of each AppTest run, it reports the script's own time from its
+"streamlit_rerun" spans. Last, it sends --questions questions back to back
+and times each submit and how long until all of them are answered.
+--no-index answers Query as a table without the user_email index does:
+
+    python -m benchmarks.streamlit_rerun [--reruns 30] [--latency 0.03] [--agent-latency 2] [--questions 3] [--no-index]
+"""
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password"
+HISTORY_ITEMS = 50
+
+
+def _user_item():
+    return {
+        "email": {"S": EMAIL},
+        "name": {"S": "Bench User"},
+        "password": {"S": hashlib.sha256(PASSWORD.encode()).hexdigest()},
+    }
+
+
+def _history_item(n: int):
+    return {
+        "query_id": {"S": f"q-{n}"},
+        "user_email": {"S": EMAIL},
+        "timestamp": {"S": f"2026-01-01T00:00:{n:02d}+00:00"},
+        "question": {"S": f"Question {n}?"},
+        "answer": {"S": f"Answer {n}"},
+    }
+
+
+class DynamoDBStandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.03
+    has_index = True
+    calls = {}
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        operation = self.headers.get("X-Amz-Target", "").split(".")[-1]
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+        time.sleep(self.latency)
+        status = 200
+        if operation == "GetItem":
+            body = {"Item": _user_item()}
+        elif operation == "Query" and not self.has_index:
+            status = 400
+            body = {
+                "__type": "com.amazon.coral.validate#ValidationException",
+                "message": f"The table does not have the specified index: {request['IndexName']}",
+            }
+        elif operation == "Query":
+            # Newest first, Limit items after ExclusiveStartKey, like the user_email index
+            start = request.get("ExclusiveStartKey", {}).get("query_id", {}).get("S")
+            newest = range(HISTORY_ITEMS - 1, -1, -1)
+            first = next((i + 1 for i, n in enumerate(newest) if f"q-{n}" == start), 0)
+            page = [_history_item(n) for n in newest[first:first + request.get("Limit", HISTORY_ITEMS)]]
+            body = {"Items": page, "Count": len(page)}
+            if first + len(page) < HISTORY_ITEMS:
+                last = page[-1]
+                body["LastEvaluatedKey"] = {k: last[k] for k in ("query_id", "user_email", "timestamp")}
+        elif operation == "BatchWriteItem":
+            body = {"UnprocessedItems": {}}
+        else:
+            body = {}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/x-amz-json-1.0")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class AgentCoreStandIn(BaseHTTPRequestHandler):
+    """/invocations of a local runtime: progress, then the answer after `latency` seconds."""
+
+    protocol_version = "HTTP/1.1"
+    latency = 2.0
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        events = [
+            ({"type": "progress", "message": "Querying"}, self.latency),
+            ({"type": "text", "data": f"Answer to {request['prompt']}"}, 0),
+            ({"type": "final", "answer": f"Answer to {request['prompt']}", "data": []}, 0),
+        ]
+        for event, delay in events:
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(delay)
+
+    def log_message(self, *args):
+        pass
+
+
+def _script_times(trace_log: Path):
+    if not trace_log.exists():
+        return []
+    spans = map(json.loads, trace_log.read_text().splitlines())
+    return [s["duration_ms"] for s in spans if s["stage"] == "streamlit_rerun"]
+
+
+def _timed(app):
+    start = time.perf_counter()
+    app.run()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reruns", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.03)
+    parser.add_argument("--agent-latency", type=float, default=2.0)
+    parser.add_argument("--questions", type=int, default=3)
+    parser.add_argument("--script", default="streamlit_app.py")
+    parser.add_argument("--no-index", action="store_true")
+    args = parser.parse_args()
+
+    DynamoDBStandIn.latency = args.latency
+    DynamoDBStandIn.has_index = not args.no_index
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DynamoDBStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    AgentCoreStandIn.latency = args.agent_latency
+    runtime = ThreadingHTTPServer(("127.0.0.1", 0), AgentCoreStandIn)
+    threading.Thread(target=runtime.serve_forever, daemon=True).start()
+    trace_log = Path(tempfile.mkdtemp()) / "traces.jsonl"
+    os.environ.update({
+        "AWS_ENDPOINT_URL": f"http://127.0.0.1:{server.server_address[1]}",
+        "AWS_ACCESS_KEY_ID": "stand-in",
+        "AWS_SECRET_ACCESS_KEY": "stand-in",
+        "TRACE_LOG": str(trace_log),
+        "AGENTCORE_LOCAL_URL": f"http://127.0.0.1:{runtime.server_address[1]}",
+    })
+
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.abspath(args.script), default_timeout=30)
+    app.secrets["AWS_ACCESS_KEY_ID"] = "stand-in"
+    app.secrets["AWS_SECRET_ACCESS_KEY"] = "stand-in"
+
+    first = _timed(app)
+    app.sidebar.text_input(key="login_email").input(EMAIL)
+    app.sidebar.text_input(key="login_password").input(PASSWORD)
+    app.sidebar.button(key="login_btn").click()
+    login = _timed(app)
+    if not app.session_state["authenticated"]:
+        raise RuntimeError("login failed")
+
+    DynamoDBStandIn.calls.clear()
+    skip = _script_times(trace_log)
+    reruns = [_timed(app) for _ in range(args.reruns)]
+    script = _script_times(trace_log)[len(skip):]
+    calls = dict(DynamoDBStandIn.calls)
+
+    older = question = None
+    history = app.session_state["history"] if "history" in app.session_state else None
+    if history is not None and history.unavailable:
+        print(f"history unavailable: {history.unavailable}")
+    elif history is not None:
+        app.sidebar.button(key="history_older").click()
+        older = _timed(app)
+        app.sidebar.button(key=f"history_q-{HISTORY_ITEMS - 1}").click()
+        question = _timed(app)
+
+    submits = []
+    start = time.perf_counter()
+    for n in range(args.questions):
+        app.text_area(key="question_input").input(f"Question {n}?")
+        app.button(key="send_query_btn").click()
+        submits.append(_timed(app))
+    while sum(1 for b in app.button if (b.key or "").startswith("dismiss_")) < args.questions:
+        if time.perf_counter() - start > 60 + args.agent_latency * args.questions:
+            raise RuntimeError("questions did not finish")
+        time.sleep(0.1)
+        app.run()
+    answered = (time.perf_counter() - start) * 1000
+    server.shutdown()
+    runtime.shutdown()
+
+    print(f"DynamoDB latency {args.latency * 1000:.0f} ms per call")
+    print(f"first load:           {first:8.1f} ms")
+    print(f"login:                {login:8.1f} ms")
+    print(f"rerun p50:            {statistics.median(reruns):8.1f} ms")
+    print(f"rerun p95:            {statistics.quantiles(reruns, n=20)[18]:8.1f} ms")
+    if len(script) > 1:
+        print(f"  script alone p50:   {statistics.median(script):8.1f} ms")
+        print(f"  script alone p95:   {statistics.quantiles(script, n=20)[18]:8.1f} ms")
+    print(f"DynamoDB calls during {args.reruns} reruns: {sum(calls.values())} {calls}")
+    if older is not None:
+        print(f"older questions click: {older:8.1f} ms")
+        print(f"past question click:  {question:8.1f} ms")
+    print(f"submit click p50:     {statistics.median(submits):8.1f} ms ({args.questions} questions)")
+    print(f"all answered after:   {answered:8.1f} ms (agent takes {args.agent_latency * 1000:.0f} ms each)")
+
+
+if __name__ == "__main__":
+    main()
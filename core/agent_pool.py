@@ -0,0 +1,136 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from core.tracing import record
+
+AGENT_POOL_SIZE = int(os.environ.get("AGENT_POOL_SIZE", "8"))
+AGENT_QUEUE_LIMIT = int(os.environ.get("AGENT_QUEUE_LIMIT", "32"))
+AGENT_QUEUE_TIMEOUT = 60
+
+
+class AgentPoolFull(RuntimeError):
+    """No agents became free within the queue limit or timeout."""
+
+
+@dataclass
+class AgentSet:
+    """One request's agents: the specialists plus a Swarm over them and the master."""
+
+    master: object
+    specialists: dict
+    swarm: object
+
+    def reset(self):
+        self.master.messages.clear()
+        for agent in self.specialists.values():
+            agent.messages.clear()
+
+
+class AgentPool:
+    """
+    Hands each request its own AgentSet, so concurrent requests never share
+    conversation state.
+
+    At most `size` sets exist and run at once; sets are built on demand by
+    `factory` and reused. Up to `queue_limit` further requests wait (for at
+    most `queue_timeout` seconds) before AgentPoolFull is raised.
+    """
+
+    def __init__(
+        self,
+        factory,
+        size=AGENT_POOL_SIZE,
+        queue_limit=AGENT_QUEUE_LIMIT,
+        queue_timeout=AGENT_QUEUE_TIMEOUT,
+    ):
+        self.factory = factory
+        self.size = size
+        self.queue_limit = queue_limit
+        self.queue_timeout = queue_timeout
+        self.created = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._idle = deque()
+        self._slots = asyncio.Semaphore(size)
+        self._create_lock = threading.Lock()
+
+    @asynccontextmanager
+    async def lease(self):
+        start = time.perf_counter()
+        if not self._slots.locked():
+            # A free slot is taken without suspending, so the check stays accurate
+            await self._slots.acquire()
+        elif self.waiting >= self.queue_limit:
+            self.rejected += 1
+            raise AgentPoolFull(f"{self.waiting} requests already waiting for agents")
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise AgentPoolFull(f"no agents free after {self.queue_timeout}s") from None
+            finally:
+                self.waiting -= 1
+        record("agent_pool_wait", (time.perf_counter() - start) * 1000, in_use=self.in_use)
+
+        try:
+            agents = self._idle.pop()
+        except IndexError:
+            # Building a set (agents, Swarm, schema) blocks, and the prefill
+            # thread may hold the create lock; neither belongs on the event loop
+            try:
+                agents = await asyncio.to_thread(self._take)
+            except BaseException:
+                self._slots.release()
+                raise
+        try:
+            yield agents
+        finally:
+            agents.reset()
+            self._idle.append(agents)
+            self._slots.release()
+
+    @property
+    def in_use(self) -> int:
+        return self.created - len(self._idle)
+
+    def stats(self):
+        return {
+            "size": self.size,
+            "created": self.created,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+        }
+
+    def prefill(self, count: int):
+        """
+        Build up to `count` idle sets ahead of demand. Safe to call from a
+        background thread while requests are being served.
+        """
+        while True:
+            with self._create_lock:
+                if self.created >= min(count, self.size):
+                    return
+                self._idle.append(self._create())
+
+    def _take(self):
+        """An idle set, or a new one. Blocks, so lease() runs it in a worker thread."""
+        with self._create_lock:
+            # A set prefilled in the background while we waited is ready now
+            try:
+                return self._idle.pop()
+            except IndexError:
+                return self._create()
+
+    def _create(self):
+        agents = self.factory()
+        self.created += 1
+        print(f"[POOL] built agent set {self.created}/{self.size}")
+        return agents
@@ -0,0 +1,178 @@
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+
+import requests
+from botocore.exceptions import ClientError
+from botocore.exceptions import ConnectionError as BotoConnectionError
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from core.aws import get_client
+
+AGENTCORE_REGION = "ap-south-1"
+AGENTCORE_CONFIG = Path(__file__).resolve().parents[1] / ".bedrock_agentcore.yaml"
+AGENTCORE_TIMEOUT = 900
+AGENTCORE_MAX_ATTEMPTS = 3
+AGENTCORE_POOL_SIZE = 10
+AGENTCORE_RETRY_BACKOFF = 0.5
+# Errors the runtime returns before it takes the request on
+AGENTCORE_RETRYABLE_CODES = ("ThrottlingException",)
+
+# Set to e.g. http://localhost:8080 to talk to `python main.py` directly.
+AGENTCORE_LOCAL_URL = os.environ.get("AGENTCORE_LOCAL_URL")
+
+
+class AgentCoreError(RuntimeError):
+    """Raised when the runtime cannot be reached or returns an error."""
+
+
+def default_runtime_arn():
+    """ARN of the default agent in .bedrock_agentcore.yaml, or $AGENTCORE_RUNTIME_ARN."""
+    if os.environ.get("AGENTCORE_RUNTIME_ARN"):
+        return os.environ["AGENTCORE_RUNTIME_ARN"]
+    import yaml
+
+    config = yaml.safe_load(AGENTCORE_CONFIG.read_text())
+    agent = config["agents"][config["default_agent"]]
+    return agent["bedrock_agentcore"]["agent_arn"]
+
+
+def _parse_body(body: bytes, content_type: str):
+    text = body.decode("utf-8")
+    if "text/event-stream" in content_type:
+        chunks = [
+            line[len("data:"):].strip()
+            for line in text.splitlines()
+            if line.startswith("data:")
+        ]
+        text = "".join(json.loads(c) if c.startswith('"') else c for c in chunks)
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+class AgentCoreClient:
+    """
+    In-process client for the agent runtime.
+
+    Keeps one pooled, keep-alive connection set for the life of the process
+    instead of spawning the agentcore CLI per question. Talks to a local
+    BedrockAgentCoreApp over HTTP when `local_url` is set, otherwise to the
+    deployed runtime through the bedrock-agentcore API.
+    """
+
+    def __init__(
+        self,
+        local_url=AGENTCORE_LOCAL_URL,
+        runtime_arn=None,
+        session=None,
+        timeout=AGENTCORE_TIMEOUT,
+    ):
+        self.local_url = local_url.rstrip("/") if local_url else None
+        self.timeout = timeout
+
+        if self.local_url:
+            # Invocations are POSTs that run the agent, so only retry when the
+            # request never reached it: a failed connect, or a 429/503 the
+            # server sends before taking the request on. A read error or 5xx
+            # may come after the agent ran, so those are not retried.
+            retry = Retry(
+                total=AGENTCORE_MAX_ATTEMPTS - 1,
+                connect=AGENTCORE_MAX_ATTEMPTS - 1,
+                read=0,
+                other=0,
+                status=AGENTCORE_MAX_ATTEMPTS - 1,
+                backoff_factor=0.5,
+                status_forcelist=(429, 503),
+                allowed_methods=None,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=1, pool_maxsize=AGENTCORE_POOL_SIZE, max_retries=retry
+            )
+            self.http = requests.Session()
+            self.http.mount("http://", adapter)
+            self.http.mount("https://", adapter)
+        else:
+            self.runtime_arn = runtime_arn or default_runtime_arn()
+            # No botocore retries: its policies retry 5xx and read timeouts,
+            # which may come after the agent ran. _invoke_runtime retries the
+            # safe cases itself.
+            self.client = get_client(
+                "bedrock-agentcore",
+                region_name=AGENTCORE_REGION,
+                session=session,
+                read_timeout=timeout,
+                retries={"total_max_attempts": 1, "mode": "standard"},
+            )
+
+    def _invoke_runtime(self, session_id: str, payload: dict):
+        """
+        invoke_agent_runtime, retried only when the request never reached the
+        agent: a failed connect, or throttling.
+        """
+        for attempt in range(AGENTCORE_MAX_ATTEMPTS):
+            try:
+                return self.client.invoke_agent_runtime(
+                    agentRuntimeArn=self.runtime_arn,
+                    runtimeSessionId=session_id,
+                    payload=json.dumps(payload).encode("utf-8"),
+                )
+            except (BotoConnectionError, ClientError) as e:
+                retryable = isinstance(e, BotoConnectionError) or (
+                    e.response.get("Error", {}).get("Code") in AGENTCORE_RETRYABLE_CODES
+                )
+                if not retryable or attempt == AGENTCORE_MAX_ATTEMPTS - 1:
+                    raise
+                time.sleep(AGENTCORE_RETRY_BACKOFF * 2 ** attempt)
+
+    def invoke(self, payload: dict, session_id: str = None):
+        """
+        Send a payload to the entrypoint and return its decoded response.
+        """
+        session_id = session_id or f"client-{uuid.uuid4()}"
+        try:
+            if self.local_url:
+                response = self.http.post(
+                    f"{self.local_url}/invocations",
+                    json=payload,
+                    headers={"X-Amzn-Bedrock-AgentCore-Runtime-Session-Id": session_id},
+                    timeout=self.timeout,
+                )
+                response.raise_for_status()
+                return _parse_body(response.content, response.headers.get("Content-Type", ""))
+
+            response = self._invoke_runtime(session_id, payload)
+            return _parse_body(response["response"].read(), response.get("contentType", ""))
+        except Exception as e:
+            raise AgentCoreError(str(e)) from e
+
+    def stream(self, payload: dict, session_id: str = None):
+        """
+        Invoke the streaming entrypoint and yield its events as they arrive.
+        """
+        session_id = session_id or f"client-{uuid.uuid4()}"
+        payload = {**payload, "stream": True}
+        try:
+            if self.local_url:
+                response = self.http.post(
+                    f"{self.local_url}/invocations",
+                    json=payload,
+                    headers={"X-Amzn-Bedrock-AgentCore-Runtime-Session-Id": session_id},
+                    timeout=self.timeout,
+                    stream=True,
+                )
+                response.raise_for_status()
+                lines = response.iter_lines(decode_unicode=True)
+            else:
+                response = self._invoke_runtime(session_id, payload)
+                lines = (line.decode("utf-8") for line in response["response"].iter_lines())
+
+            for line in lines:
+                if line and line.startswith("data:"):
+                    yield json.loads(line[len("data:"):].strip())
+        except Exception as e:
+            raise AgentCoreError(str(e)) from e
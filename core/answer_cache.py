@@ -0,0 +1,226 @@
+"""
+Question-level answer cache.
+
+Questions are normalized (lower-cased, punctuation and filler words dropped,
+plurals folded) and compared by MinHash over word and word-pair shingles,
+so "How many customers are there?" and "how many customers do we have"
+share an entry. MinHash barely notices word order, so every candidate is
+confirmed exactly before it is returned: numbers must match ("top 5" never
+answers "top 10"), and so must the sequence of order, direction and
+negation words after folding synonyms, so "highest to lowest" never
+answers "lowest to highest", nor "most" "least", nor "cancelled" "not
+cancelled".
+
+Each answer remembers the tables its SQL read; invalidating any of them
+through the query cache drops it.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from core.query_cache import query_cache
+
+ANSWER_CACHE_TTL_SECONDS = 15 * 60
+ANSWER_CACHE_MAX_ENTRIES = 1000
+ANSWER_CACHE_THRESHOLD = float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.8"))
+MINHASH_PERMUTATIONS = 64
+
+_MERSENNE = (1 << 61) - 1
+_WORD = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_NUMBER = re.compile(r"^\d+(?:\.\d+)?$")
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "there", "do", "does", "did",
+    "we", "our", "us", "i", "me", "my", "you", "your", "have", "has", "had", "please",
+    "tell", "show", "give", "can", "could", "would", "what", "which", "of", "in", "on",
+    "for", "to", "at", "by", "with", "and", "currently", "right", "now", "total",
+}
+
+# Words that flip the meaning of an otherwise identical question, folded to
+# one canonical word per meaning; their order matters too
+ORDER_WORDS = {
+    **dict.fromkeys(
+        ("highest", "largest", "biggest", "most", "top", "max", "maximum", "best",
+         "descending", "desc", "decreasing"), "high"),
+    **dict.fromkeys(
+        ("lowest", "smallest", "least", "fewest", "bottom", "min", "minimum", "worst",
+         "ascending", "asc", "increasing"), "low"),
+    **dict.fromkeys(("more", "greater", "above", "over", "exceeding", "higher"), "gt"),
+    **dict.fromkeys(("less", "fewer", "below", "under", "lower"), "lt"),
+    **dict.fromkeys(("first", "earliest", "oldest"), "first"),
+    **dict.fromkeys(("last", "latest", "newest", "recent", "past"), "last"),
+    **dict.fromkeys(("before", "prior"), "before"),
+    **dict.fromkeys(("after", "since"), "after"),
+    **dict.fromkeys(("not", "no", "never", "without", "except", "excluding", "non"), "not"),
+}
+
+_tables_read = ContextVar("tables_read", default=None)
+
+
+def question_tokens(question: str):
+    """Content words of a question, with simple plurals folded."""
+    tokens = []
+    for word in _WORD.findall(question.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def order_words(tokens) -> tuple:
+    """The canonical order, direction and negation words in `tokens`, in sequence."""
+    return tuple(ORDER_WORDS[t] for t in tokens if t in ORDER_WORDS)
+
+
+def _permutations(n: int, seed: int = 1):
+    """n (a, b) pairs for the hash family (a * x + b) mod 2**61 - 1."""
+    pairs = []
+    for i in range(n):
+        digest = hashlib.blake2b(f"{seed}:{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], "big") % _MERSENNE | 1
+        b = int.from_bytes(digest[8:], "big") % _MERSENNE
+        pairs.append((a, b))
+    return pairs
+
+
+_PERMUTATIONS = _permutations(MINHASH_PERMUTATIONS)
+
+
+def minhash(tokens):
+    """MinHash signature over the tokens and adjacent token pairs."""
+    shingles = set(tokens) | {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+    if not shingles:
+        return ()
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big")
+        for s in shingles
+    ]
+    return tuple(min((a * h + b) % _MERSENNE for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(left, right) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    if not left or not right:
+        return 0.0
+    return sum(x == y for x, y in zip(left, right)) / len(left)
+
+
+def note_tables(tables):
+    """Record tables read while answering the current question, if one is being cached."""
+    collected = _tables_read.get()
+    if collected is not None:
+        collected.update(tables)
+
+
+@contextmanager
+def collect_tables():
+    """Yield the set of tables note_tables() sees in this context (and its tasks/threads)."""
+    tables = set()
+    token = _tables_read.set(tables)
+    try:
+        yield tables
+    finally:
+        _tables_read.reset(token)
+
+
+class AnswerCache:
+    """
+    Final answers keyed by normalized question, with TTL expiry and LRU
+    eviction by entry count.
+    """
+
+    def __init__(
+        self,
+        ttl=ANSWER_CACHE_TTL_SECONDS,
+        max_entries=ANSWER_CACHE_MAX_ENTRIES,
+        threshold=ANSWER_CACHE_THRESHOLD,
+        clock=time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, question: str):
+        """Return (answer, similarity, data) for the closest cached question, or None."""
+        query_cache.sync_manifest()
+        tokens = question_tokens(question)
+        key = " ".join(tokens)
+        numbers = {t for t in tokens if _NUMBER.match(t)}
+        order = order_words(tokens)
+        signature = None
+        with self._lock:
+            now = self.clock()
+            for stale in [k for k, e in self._entries.items() if e["expires"] <= now]:
+                del self._entries[stale]
+
+            best, score = self._entries.get(key), 1.0
+            if best is None and key:
+                signature = minhash(tokens)
+                for entry in self._entries.values():
+                    if entry["numbers"] != numbers or entry["order"] != order:
+                        continue
+                    candidate = similarity(signature, entry["signature"])
+                    if candidate >= self.threshold and (best is None or candidate > score):
+                        best, score = entry, candidate
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best["key"])
+            self.hits += 1
+            return best["answer"], score, best["data"]
+
+    def put(self, question: str, answer, tables, data=()):
+        """Cache `answer` and the result payloads (`data`) sent with it."""
+        if not answer or not isinstance(answer, str):
+            return
+        tokens = question_tokens(question)
+        key = " ".join(tokens)
+        if not key:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = {
+                "key": key,
+                "answer": answer,
+                "data": list(data),
+                "signature": minhash(tokens),
+                "numbers": {t for t in tokens if _NUMBER.match(t)},
+                "order": order_words(tokens),
+                "tables": {t.lower() for t in tables},
+                "expires": self.clock() + self.ttl,
+            }
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_tables(self, tables):
+        """Drop answers that read any of `tables`."""
+        tables = {t.lower() for t in tables}
+        with self._lock:
+            stale = [k for k, e in self._entries.items() if e["tables"] & tables]
+            for key in stale:
+                del self._entries[key]
+        if stale:
+            print(f"[ANSWER_CACHE] invalidated {len(stale)} answers for {sorted(tables)}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+answer_cache = AnswerCache()
+query_cache.on_invalidate(answer_cache.invalidate_tables)
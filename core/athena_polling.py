@@ -0,0 +1,99 @@
+import asyncio
+import random
+import time
+
+TERMINAL_STATES = ("SUCCEEDED", "FAILED", "CANCELLED")
+
+POLL_INITIAL_DELAY = 0.05
+POLL_MAX_DELAY = 1.0
+POLL_BACKOFF_RATIO = 0.5
+QUERY_TIMEOUT = 300
+
+
+class AthenaQueryTimeout(TimeoutError):
+    """Raised when a query outlives its deadline and has been cancelled."""
+
+    def __init__(self, query_id: str, timeout: float):
+        super().__init__(f"Athena query {query_id} cancelled after {timeout:.1f}s")
+        self.query_id = query_id
+        self.timeout = timeout
+
+
+def poll_delay(elapsed, initial=POLL_INITIAL_DELAY, maximum=POLL_MAX_DELAY, rng=random):
+    """
+    Return the next sleep interval for a query that has run `elapsed` seconds.
+
+    The interval grows with the query's age, so sub-second queries are seen
+    within tens of milliseconds. The interval is capped at POLL_MAX_DELAY, so
+    a long scan is seen no later than the old flat one-second loop would see
+    it, at a few more API calls than a higher cap; jitter keeps concurrent
+    pollers from hitting the API in lockstep.
+    """
+    base = min(maximum, max(initial, elapsed * POLL_BACKOFF_RATIO))
+    # Clamped after the jitter, so no wait exceeds POLL_MAX_DELAY
+    return min(maximum, base * rng.uniform(0.8, 1.2))
+
+
+def _query_state(status):
+    return status["QueryExecution"]["Status"]["State"]
+
+
+def wait_for_query(
+    client,
+    query_id: str,
+    timeout: float = QUERY_TIMEOUT,
+    sleep=time.sleep,
+    clock=time.monotonic,
+):
+    """
+    Block until the query reaches a terminal state and return its execution.
+
+    The query is cancelled with stop_query_execution once `timeout` elapses.
+    """
+    started = clock()
+    deadline = started + timeout
+
+    while True:
+        status = client.get_query_execution(QueryExecutionId=query_id)
+        if _query_state(status) in TERMINAL_STATES:
+            return status["QueryExecution"]
+
+        remaining = deadline - clock()
+        if remaining <= 0:
+            client.stop_query_execution(QueryExecutionId=query_id)
+            raise AthenaQueryTimeout(query_id, timeout)
+        sleep(min(poll_delay(clock() - started), remaining))
+
+
+async def wait_for_query_async(
+    client, query_id: str, timeout: float = QUERY_TIMEOUT, on_poll=None
+):
+    """
+    Asyncio variant of wait_for_query.
+
+    boto3 calls run in the default executor only for the duration of each
+    request; the waits between polls yield to the event loop instead of
+    holding a thread. `on_poll(state, elapsed)` is called after every poll
+    of a query that is still running.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + timeout
+
+    while True:
+        status = await asyncio.to_thread(
+            client.get_query_execution, QueryExecutionId=query_id
+        )
+        if _query_state(status) in TERMINAL_STATES:
+            return status["QueryExecution"]
+
+        if on_poll:
+            on_poll(_query_state(status), loop.time() - started)
+
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            await asyncio.to_thread(
+                client.stop_query_execution, QueryExecutionId=query_id
+            )
+            raise AthenaQueryTimeout(query_id, timeout)
+        await asyncio.sleep(min(poll_delay(loop.time() - started), remaining))
@@ -0,0 +1,107 @@
+import codecs
+import csv
+import json
+from operator import itemgetter, methodcaller
+from urllib.parse import urlparse
+
+PAGE_SIZE = 1000
+MAX_RESULT_ROWS = 500
+MAX_RESULT_BYTES = 64 * 1024
+
+_cell_value = methodcaller("get", "VarCharValue")
+
+
+class ResultRows(list):
+    """
+    Result rows as list[dict] of strings (or None), plus the column types
+    as [(name, athena_type)] when the backend knows them.
+    """
+
+    def __init__(self, rows=(), columns=None):
+        super().__init__(rows)
+        self.columns = columns
+
+
+def column_types(column_info):
+    """[(name, type)] from Athena's ResultSetMetadata.ColumnInfo."""
+    columns = []
+    for info in column_info:
+        dtype = info["Type"].lower()
+        if dtype == "decimal":
+            dtype = f"decimal({info.get('Precision', 38)},{info.get('Scale', 0)})"
+        columns.append((info["Name"], dtype))
+    return columns
+
+
+def decode_columns(rows, width: int):
+    """
+    Decode a page of Athena Rows into one list of values per column.
+
+    Each column is built with map() over C-level getters instead of a
+    per-cell Python loop.
+    """
+    data = [r["Data"] for r in rows]
+    return [list(map(_cell_value, map(itemgetter(i), data))) for i in range(width)]
+
+
+def to_records(headers, columns):
+    """Zip decoded columns back into row dicts."""
+    return [dict(zip(headers, row)) for row in zip(*columns)]
+
+
+def iter_api_rows(client, query_id: str, page_size: int = PAGE_SIZE, columns: list = None):
+    """
+    Yield result rows lazily, following NextToken across every page.
+
+    When `columns` is a list, the column types from the first page's
+    metadata are added to it.
+    """
+    paginator = client.get_paginator("get_query_results")
+    headers = None
+    for page in paginator.paginate(
+        QueryExecutionId=query_id, PaginationConfig={"PageSize": page_size}
+    ):
+        rows = page["ResultSet"]["Rows"]
+        if headers is None:
+            if columns is not None:
+                columns.extend(column_types(page["ResultSet"]["ResultSetMetadata"]["ColumnInfo"]))
+            if not rows:
+                return
+            headers = [c.get("VarCharValue") for c in rows[0]["Data"]]
+            rows = rows[1:]
+        yield from to_records(headers, decode_columns(rows, len(headers)))
+
+
+def iter_s3_rows(s3, output_location: str):
+    """
+    Yield result rows by streaming the CSV that Athena wrote to S3.
+
+    Cheaper than get_query_results for large pulls. Athena writes NULL as an
+    unquoted empty field, which csv cannot tell apart from '', so both come
+    back as None.
+    """
+    url = urlparse(output_location)
+    body = s3.get_object(Bucket=url.netloc, Key=url.path.lstrip("/"))["Body"]
+    reader = csv.reader(codecs.getreader("utf-8")(body))
+    headers = next(reader, None)
+    if headers is None:
+        return
+    for values in reader:
+        yield dict(zip(headers, [v if v != "" else None for v in values]))
+
+
+def cap_rows(rows, max_rows: int = MAX_RESULT_ROWS, max_bytes: int = MAX_RESULT_BYTES):
+    """
+    Collect rows until either cap is reached.
+
+    Returns (rows, truncated). The source iterator is not drained past the
+    cap, so no further pages are fetched.
+    """
+    collected = []
+    size = 0
+    for row in rows:
+        size += len(json.dumps(row, default=str))
+        if len(collected) >= max_rows or size > max_bytes:
+            return collected, True
+        collected.append(row)
+    return collected, False
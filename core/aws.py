@@ -0,0 +1,132 @@
+"""
+Shared boto3 session, clients and resources.
+
+One session resolves credentials once; clients are built once per service
+and region with a connection pool sized for concurrent tool calls, adaptive
+retries and TCP keep-alive. warm_up() resolves credentials and opens a
+connection to each service before the first request needs it.
+
+Point clients at local stand-ins with botocore's own AWS_ENDPOINT_URL or
+AWS_ENDPOINT_URL_<SERVICE> environment variables.
+"""
+import os
+import threading
+import time
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+from core.tracing import record
+
+AWS_REGION = "ap-south-1"
+AWS_MAX_POOL_CONNECTIONS = int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", "50"))
+AWS_MAX_ATTEMPTS = 5
+AWS_CONNECT_TIMEOUT = 5
+AWS_READ_TIMEOUT = 60
+
+# Cheap read-only call per service that opens a connection; access errors
+# still complete the TLS handshake, which is the point.
+WARM_UP_CALLS = {
+    "athena": ("list_work_groups", {"MaxResults": 1}),
+    "s3": ("list_buckets", {}),
+    "glue": ("get_databases", {"MaxResults": 1}),
+    "dynamodb": ("describe_limits", {}),
+}
+
+_session = None
+_clients = {}
+_resources = {}
+_lock = threading.Lock()
+
+
+def set_session(session):
+    """Use `session` (e.g. with explicit credentials) for clients built from now on."""
+    global _session
+    with _lock:
+        _session = session
+        _clients.clear()
+        _resources.clear()
+
+
+def get_session():
+    global _session
+    with _lock:
+        if _session is None:
+            _session = boto3.Session(region_name=AWS_REGION)
+        return _session
+
+
+def client_config(**overrides) -> Config:
+    """Pool, retry, keep-alive and timeout settings shared by every client."""
+    config = Config(
+        max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+        retries={"max_attempts": AWS_MAX_ATTEMPTS, "mode": "adaptive"},
+        tcp_keepalive=True,
+        connect_timeout=AWS_CONNECT_TIMEOUT,
+        read_timeout=AWS_READ_TIMEOUT,
+    )
+    return config.merge(Config(**overrides)) if overrides else config
+
+
+def _config_key(config: dict) -> tuple:
+    # Overrides such as retries are dicts, so key on their repr
+    return tuple(sorted((name, repr(value)) for name, value in config.items()))
+
+
+def get_client(service: str, region_name: str = None, session=None, **config):
+    """
+    The process-wide client for `service`, built on first use. Clients are
+    thread-safe; keyword arguments override client_config() settings.
+    """
+    session = session or get_session()
+    region_name = region_name or session.region_name
+    key = (service, region_name, id(session), _config_key(config))
+    with _lock:
+        if key not in _clients:
+            _clients[key] = session.client(service, region_name=region_name, config=client_config(**config))
+        return _clients[key]
+
+
+def get_resource(service: str, region_name: str = None, **config):
+    """
+    The process-wide boto3 resource for `service`. Table actions only call
+    the thread-safe client underneath; don't share objects whose attributes
+    are lazily loaded across threads.
+    """
+    session = get_session()
+    region_name = region_name or session.region_name
+    key = (service, region_name, id(session), _config_key(config))
+    with _lock:
+        if key not in _resources:
+            _resources[key] = session.resource(service, region_name=region_name, config=client_config(**config))
+        return _resources[key]
+
+
+def warm_up(services=tuple(WARM_UP_CALLS)):
+    """
+    Resolve credentials and open one connection per service. Returns
+    {step: milliseconds} and records each step as a "warm_up" span.
+    """
+    timings = {}
+    start = time.perf_counter()
+    get_session().get_credentials()
+    timings["credentials"] = (time.perf_counter() - start) * 1000
+    for service in services:
+        operation, params = WARM_UP_CALLS[service]
+        start = time.perf_counter()
+        try:
+            getattr(get_client(service), operation)(**params)
+        except (BotoCoreError, ClientError) as e:
+            print(f"[AWS] warm-up {service}: {type(e).__name__}")
+        timings[service] = (time.perf_counter() - start) * 1000
+    for step, ms in timings.items():
+        record("warm_up", ms, step=step)
+    return timings
+
+
+def start_warm_up(services=tuple(WARM_UP_CALLS)):
+    """Run warm_up() in a daemon thread so startup does not wait for it."""
+    thread = threading.Thread(target=warm_up, args=(services,), daemon=True)
+    thread.start()
+    return thread
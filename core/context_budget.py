@@ -0,0 +1,115 @@
+"""
+Keeps what the model sees per turn small.
+
+Query results go back to the model as a short pipe-separated preview; the
+full rows stay in an in-process ResultStore under a result id that the
+read_result tool pages through. Conversation history is trimmed before
+every model call to a message window and an estimated token budget, always
+keeping the original question.
+"""
+import json
+import threading
+import uuid
+from collections import OrderedDict
+
+from strands.agent.conversation_manager import SlidingWindowConversationManager
+
+TOOL_RESULT_PREVIEW_ROWS = 20
+CELL_MAX_CHARS = 60
+RESULT_STORE_MAX_ENTRIES = 256
+CONTEXT_WINDOW_MESSAGES = 12
+CONTEXT_MAX_TOKENS = 8000
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(messages) -> int:
+    """Rough token count of a message list (about 4 characters per token)."""
+    return len(json.dumps(messages, default=str)) // CHARS_PER_TOKEN
+
+
+class ResultStore:
+    """Full query results by id, LRU-bounded by entry count."""
+
+    def __init__(self, max_entries=RESULT_STORE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, rows) -> str:
+        result_id = uuid.uuid4().hex[:8]
+        with self._lock:
+            self._results[result_id] = rows
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        return result_id
+
+    def get(self, result_id: str):
+        with self._lock:
+            rows = self._results.get(result_id)
+            if rows is not None:
+                self._results.move_to_end(result_id)
+            return rows
+
+
+result_store = ResultStore()
+
+
+def _cell(value) -> str:
+    if value is None:
+        return "NULL"
+    text = str(value).replace("\n", " ").replace("|", "/")
+    return text if len(text) <= CELL_MAX_CHARS else text[:CELL_MAX_CHARS - 3] + "..."
+
+
+def summarize_rows(rows, result_id: str = None, offset: int = 0, limit: int = TOOL_RESULT_PREVIEW_ROWS) -> str:
+    """
+    Compact text table of rows[offset:offset + limit] for the model.
+
+    A trailing {"truncated": ...} row from capped_rows() becomes a note.
+    """
+    note = None
+    if rows and set(rows[-1]) == {"truncated"}:
+        rows, note = rows[:-1], rows[-1]["truncated"]
+    if not rows:
+        return "\n".join(filter(None, ["0 rows", note]))
+
+    columns = list(rows[0])
+    page = rows[offset:offset + limit]
+    lines = [f"{len(rows)} rows", " | ".join(columns)]
+    lines += [" | ".join(_cell(row.get(c)) for c in columns) for row in page]
+    shown_to = offset + len(page)
+    if offset or shown_to < len(rows):
+        more = f"rows {offset + 1}-{shown_to} of {len(rows)}"
+        if result_id and shown_to < len(rows):
+            more += f"; call read_result('{result_id}', {shown_to}) for more"
+        lines.append(f"({more})")
+    if note:
+        lines.append(note)
+    return "\n".join(lines)
+
+
+class TokenBudgetConversationManager(SlidingWindowConversationManager):
+    """
+    Before every model call, drops the oldest exchanges after the question
+    until the history is within `window_size` messages and `max_tokens`.
+    The question and the latest exchange are always kept; on a context
+    overflow the sliding window's tool-result truncation still applies.
+    """
+
+    def __init__(self, window_size=CONTEXT_WINDOW_MESSAGES, max_tokens=CONTEXT_MAX_TOKENS):
+        super().__init__(window_size=window_size, should_truncate_results=True, per_turn=True)
+        self.max_tokens = max_tokens
+
+    def apply_management(self, agent, **kwargs):
+        messages = agent.messages
+        while len(messages) > self.window_size or estimate_tokens(messages) > self.max_tokens:
+            # Cut up to the next assistant message so roles keep alternating
+            # and no toolResult is left without its toolUse
+            cut = next(
+                (i for i in range(3, len(messages) - 1) if messages[i]["role"] == "assistant"),
+                None,
+            )
+            if cut is None:
+                return
+            self.removed_message_count += cut - 1
+            del messages[1:cut]
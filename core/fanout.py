@@ -0,0 +1,84 @@
+import asyncio
+from dataclasses import dataclass
+
+from core.result_extractor import extract_agent_answer
+from core.tracing import record_usage
+
+FANOUT_BRANCH_TIMEOUT = 120
+
+
+@dataclass
+class Branch:
+    """One independent part of a question, the specialist asked, and how it went."""
+
+    agent: str
+    question: str
+    answer: str = None
+    error: str = None
+
+
+async def _run_branch(agent, question: str, timeout: float) -> Branch:
+    branch = Branch(agent.name, question)
+    try:
+        result = await asyncio.wait_for(agent.invoke_async(question), timeout)
+        record_usage(result, agent=agent.name)
+        branch.answer = extract_agent_answer(result)
+        if not branch.answer:
+            branch.error = "no answer"
+    except asyncio.TimeoutError:
+        print(f"[FANOUT] {agent.name} timed out after {timeout}s")
+        branch.error = f"timed out after {timeout:g}s"
+    except Exception as e:
+        print(f"[FANOUT] {agent.name} failed: {str(e)}")
+        branch.error = "failed"
+    finally:
+        agent.messages.clear()
+    return branch
+
+
+async def fan_out_async(parts, timeout: float = FANOUT_BRANCH_TIMEOUT):
+    """
+    Ask each (agent, question) pair concurrently.
+
+    `parts` are the independent sub-questions of one question (see
+    core.router). Returns one Branch per part, in order; a branch that
+    fails or exceeds `timeout` carries its error without holding up the
+    others.
+    """
+    return list(await asyncio.gather(
+        *(_run_branch(agent, question, timeout) for agent, question in parts)
+    ))
+
+
+def complete(branches) -> bool:
+    """True when every part was answered; only then is the merged answer worth caching."""
+    return all(branch.answer for branch in branches)
+
+
+def agent_label(agent_name: str) -> str:
+    """Display name for an agent, e.g. sales_agent -> Sales."""
+    return agent_name.removesuffix('_agent').replace('_', ' ').title()
+
+
+def merge_answers(branches) -> str:
+    """
+    Combine branch answers into a single response, one section per part.
+    Parts that failed are named, so the user knows what to ask again.
+    """
+    if len(branches) == 1 and branches[0].answer:
+        return branches[0].answer
+    sections = []
+    for branch in branches:
+        body = branch.answer or f"_Could not answer “{branch.question}”: {branch.error}. Please ask it again._"
+        sections.append(f"**{agent_label(branch.agent)}**\n{body}")
+    return "\n\n".join(sections)
+
+
+def fan_out(parts, timeout: float = FANOUT_BRANCH_TIMEOUT):
+    """
+    Answer the independent parts of a question in parallel and merge them.
+
+    Wall-clock time is bounded by the slowest branch (or `timeout`), not the
+    sum of all branches.
+    """
+    return merge_answers(asyncio.run(fan_out_async(parts, timeout)))
@@ -0,0 +1,301 @@
+import atexit
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from core.tracing import span
+
+HISTORY_TABLE = "demo_agent_history"
+# Global secondary index: partition key user_email, sort key timestamp
+HISTORY_USER_INDEX = "user_email-timestamp-index"
+HISTORY_PAGE_SIZE = 20
+# Attributes the index carries besides its keys, enough to show an answer
+HISTORY_INDEX_ATTRIBUTES = ['question', 'answer']
+HISTORY_MAX_PENDING = 1000
+HISTORY_FLUSH_INTERVAL = 1.0
+HISTORY_BATCH_SIZE = 25
+
+# What submit() does when HISTORY_MAX_PENDING records are already queued:
+# "drop_oldest" discards the oldest pending record, "block" waits up to
+# HISTORY_BLOCK_TIMEOUT for the writer to catch up and then drops the new one.
+HISTORY_FULL_POLICY = "drop_oldest"
+HISTORY_BLOCK_TIMEOUT = 0.5
+
+
+def new_request_id() -> str:
+    return str(uuid.uuid4())
+
+
+def history_record(request_id: str, question: str, answer, user_email: str = None) -> dict:
+    """The one item shape both entry points write to demo_agent_history."""
+    item = {
+        'query_id': request_id,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'question': question,
+        'answer': str(answer),
+    }
+    if user_email:
+        item['user_email'] = user_email
+    return item
+
+
+class HistoryIndexMissing(RuntimeError):
+    """HISTORY_USER_INDEX does not exist yet, or is still backfilling."""
+
+
+def user_history(table, user_email: str, limit: int = HISTORY_PAGE_SIZE, start_key: dict = None):
+    """
+    One page of a user's history, newest first, read through the user_email
+    index. Returns (items, key to pass as start_key for the next page, or None).
+    Raises HistoryIndexMissing until `python -m core.history create-index`
+    has run and the index is ACTIVE.
+    """
+    from boto3.dynamodb.conditions import Key
+    from botocore.exceptions import ClientError
+
+    params = {
+        'IndexName': HISTORY_USER_INDEX,
+        'KeyConditionExpression': Key('user_email').eq(user_email),
+        'ScanIndexForward': False,
+        'Limit': limit,
+    }
+    if start_key:
+        params['ExclusiveStartKey'] = start_key
+    with span("dynamodb_query", limit=limit) as stats:
+        try:
+            response = table.query(**params)
+        except ClientError as e:
+            error = e.response.get('Error', {})
+            # "does not have the specified index" / "backfilling global secondary index"
+            if error.get('Code') == 'ValidationException' and HISTORY_USER_INDEX in error.get('Message', ''):
+                raise HistoryIndexMissing(error['Message']) from e
+            raise
+        stats["items"] = len(response.get('Items', []))
+    return response.get('Items', []), response.get('LastEvaluatedKey')
+
+
+class HistoryPages:
+    """
+    A user's history read one indexed page at a time, newest first, so reads
+    stay at page size however large the table grows. The next page is
+    fetched on `executor` as soon as the previous one is taken, so showing
+    older questions rarely waits on DynamoDB.
+
+    Without the user_email index there is nothing to page through:
+    `unavailable` holds the reason, and only records added this session
+    are shown.
+    """
+
+    def __init__(self, table, user_email: str, executor, page_size: int = HISTORY_PAGE_SIZE):
+        self.table = table
+        self.user_email = user_email
+        self.executor = executor
+        self.page_size = page_size
+        self.items = []
+        self.unavailable = None
+        self._by_id = {}
+        self._fetch(None)
+
+    def _fetch(self, start_key):
+        self._start_key = start_key
+        self._next = self.executor.submit(
+            user_history, self.table, self.user_email, self.page_size, start_key
+        )
+
+    @property
+    def has_more(self) -> bool:
+        return self._next is not None
+
+    def ready(self) -> bool:
+        """True when advance() will not wait."""
+        return self._next is None or self._next.done()
+
+    def advance(self) -> list:
+        """
+        Append the prefetched page to items and start fetching the one after
+        it. If the query failed, its error is raised and it is fetched again;
+        a missing index instead ends paging for this session.
+        """
+        if self._next is None:
+            return []
+        try:
+            page, key = self._next.result()
+        except HistoryIndexMissing as e:
+            self._next = None
+            self.unavailable = str(e)
+            print(f"[HISTORY] {self.unavailable}; run `python -m core.history create-index`")
+            return []
+        except Exception:
+            self._fetch(self._start_key)
+            raise
+        for item in page:
+            if item['query_id'] not in self._by_id:
+                self.items.append(item)
+                self._by_id[item['query_id']] = item
+        if key:
+            self._fetch(key)
+        else:
+            self._next = None
+        return page
+
+    def add(self, item: dict):
+        """Show a record just submitted to the writer before it reaches the index."""
+        if item['query_id'] not in self._by_id:
+            self.items.insert(0, item)
+            self._by_id[item['query_id']] = item
+
+    def get(self, query_id: str):
+        return self._by_id.get(query_id)
+
+
+def create_user_index(client, table_name: str = HISTORY_TABLE) -> str:
+    """
+    Add HISTORY_USER_INDEX to the history table unless it exists. Returns
+    the index status; DynamoDB backfills a new index in the background
+    (status CREATING, then ACTIVE).
+    """
+    table = client.describe_table(TableName=table_name)['Table']
+    for index in table.get('GlobalSecondaryIndexes', []):
+        if index['IndexName'] == HISTORY_USER_INDEX:
+            return index['IndexStatus']
+
+    create = {
+        'IndexName': HISTORY_USER_INDEX,
+        'KeySchema': [
+            {'AttributeName': 'user_email', 'KeyType': 'HASH'},
+            {'AttributeName': 'timestamp', 'KeyType': 'RANGE'},
+        ],
+        'Projection': {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': HISTORY_INDEX_ATTRIBUTES},
+    }
+    if table.get('BillingModeSummary', {}).get('BillingMode') != 'PAY_PER_REQUEST':
+        throughput = table['ProvisionedThroughput']
+        create['ProvisionedThroughput'] = {
+            'ReadCapacityUnits': throughput['ReadCapacityUnits'],
+            'WriteCapacityUnits': throughput['WriteCapacityUnits'],
+        }
+    client.update_table(
+        TableName=table_name,
+        AttributeDefinitions=[
+            {'AttributeName': 'user_email', 'AttributeType': 'S'},
+            {'AttributeName': 'timestamp', 'AttributeType': 'S'},
+        ],
+        GlobalSecondaryIndexUpdates=[{'Create': create}],
+    )
+    return 'CREATING'
+
+
+class HistoryWriter:
+    """
+    Queues history records and writes them to DynamoDB from a background
+    thread with batch_writer, so the request path never waits on DynamoDB.
+
+    Records are keyed by query_id: submitting the same request twice merges
+    into one pending item and one write.
+    """
+
+    def __init__(
+        self,
+        table,
+        max_pending=HISTORY_MAX_PENDING,
+        flush_interval=HISTORY_FLUSH_INTERVAL,
+        full_policy=HISTORY_FULL_POLICY,
+    ):
+        self.table = table
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.full_policy = full_policy
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._pending = OrderedDict()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, item: dict) -> bool:
+        """Queue a record without blocking on DynamoDB. Returns False if it was dropped."""
+        key = item['query_id']
+        with self._cond:
+            if key in self._pending:
+                self._pending[key].update(item)
+                return True
+            if len(self._pending) >= self.max_pending:
+                if self.full_policy == "block":
+                    self._cond.wait_for(
+                        lambda: len(self._pending) < self.max_pending, HISTORY_BLOCK_TIMEOUT
+                    )
+                    if len(self._pending) >= self.max_pending:
+                        self.dropped += 1
+                        return False
+                else:
+                    self._pending.popitem(last=False)
+                    self.dropped += 1
+            self._pending[key] = dict(item)
+            if len(self._pending) >= HISTORY_BATCH_SIZE:
+                self._cond.notify_all()
+        return True
+
+    def flush(self):
+        """Write everything queued so far; called from the background thread and at exit."""
+        with self._cond:
+            batch = list(self._pending.values())
+            self._pending.clear()
+            self._cond.notify_all()
+        if not batch:
+            return
+        try:
+            with span("dynamodb_write", items=len(batch)):
+                with self.table.batch_writer(overwrite_by_pkeys=['query_id']) as writer:
+                    for item in batch:
+                        writer.put_item(Item=item)
+            self.written += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"Error storing to DynamoDB: {str(e)}")
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def stats(self):
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._closed or len(self._pending) >= HISTORY_BATCH_SIZE,
+                    self.flush_interval,
+                )
+                if self._closed:
+                    return
+            self.flush()
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] != "create-index":
+        print("usage: python -m core.history create-index")
+        return 2
+    from core.aws import get_client
+
+    status = create_user_index(get_client('dynamodb'))
+    print(f"[HISTORY] {HISTORY_USER_INDEX} on {HISTORY_TABLE}: {status}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,130 @@
+"""
+Questions run as background jobs, so no UI thread waits on the agent.
+
+submit() queues a question and returns its job ID at once. A worker pool
+runs it through `run`, which streams progress and answer text into the Job
+as they arrive, and the UI polls the Job for them. Jobs live in the
+process, keyed by user, so a page reload (a new Streamlit session) finds
+them again; finished ones are kept for JOB_RETENTION seconds.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from core.history import new_request_id
+from core.tracing import record
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "8"))
+JOB_MAX_ACTIVE_PER_USER = int(os.environ.get("JOB_MAX_ACTIVE_PER_USER", "4"))
+JOB_RETENTION = 3600
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobLimitError(RuntimeError):
+    """The user already has JOB_MAX_ACTIVE_PER_USER unfinished jobs."""
+
+
+@dataclass
+class Job:
+    """One question and what is known of its answer so far; written only by its worker."""
+
+    id: str
+    user_email: str
+    question: str
+    status: str = QUEUED
+    progress: str = ""
+    text: str = ""
+    answer: str = None
+    data: list = field(default_factory=list)
+    error: str = None
+    submitted: float = field(default_factory=time.time)
+    finished: float = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+
+class JobStore:
+    """
+    Runs jobs on a thread pool and keeps them for polling.
+
+    `run(job, **context)` does the work, updating job.progress and job.text
+    as it goes, and returns (answer, data); an exception fails the job with
+    its message. At most `max_active` jobs per user are queued or running.
+    """
+
+    def __init__(
+        self,
+        run,
+        workers=JOB_WORKERS,
+        max_active=JOB_MAX_ACTIVE_PER_USER,
+        retention=JOB_RETENTION,
+    ):
+        self.run = run
+        self.max_active = max_active
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, user_email: str, question: str, job_id: str = None, **context) -> str:
+        """Queue a question and return its job ID without waiting for it."""
+        with self._lock:
+            self._prune()
+            active = sum(1 for j in self._jobs.values() if j.user_email == user_email and j.active)
+            if active >= self.max_active:
+                raise JobLimitError(
+                    f"{active} questions are already running; wait for one to finish"
+                )
+            job = Job(job_id or new_request_id(), user_email, question)
+            self._jobs[job.id] = job
+        self._executor.submit(self._execute, job, context)
+        return job.id
+
+    def get(self, job_id: str):
+        return self._jobs.get(job_id)
+
+    def for_user(self, user_email: str) -> list:
+        """The user's jobs, newest first."""
+        with self._lock:
+            jobs = [j for j in self._jobs.values() if j.user_email == user_email]
+        return jobs[::-1]
+
+    def dismiss(self, job_id: str):
+        """Forget a finished job; running ones are kept."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and not job.active:
+                del self._jobs[job_id]
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished < cutoff]:
+            del self._jobs[job_id]
+
+    def _execute(self, job: Job, context: dict):
+        job.status = RUNNING
+        queued_ms = (time.time() - job.submitted) * 1000
+        start = time.perf_counter()
+        try:
+            job.answer, job.data = self.run(job, **context)
+            job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+            print(f"[JOB] {job.id} failed: {str(e)}")
+        finally:
+            job.finished = time.time()
+            record(
+                "job",
+                (time.perf_counter() - start) * 1000,
+                status=job.status,
+                queued_ms=round(queued_ms, 1),
+            )
@@ -0,0 +1,295 @@
+"""
+Pre-aggregated summary tables for the questions agents ask most.
+
+Each view stores additive partial aggregates plus the highest source id it
+has absorbed (max_id). A refresh appends aggregates for rows above that
+watermark with INSERT INTO, so it only reads new data; rewritten queries
+re-aggregate with SUM. Views are rebuilt in full when their source table is
+reloaded.
+
+Appending by watermark assumes source tables only grow: ids increase and
+rows are never updated or deleted in place. After any other kind of load,
+rebuild with --full.
+
+Queries are only rewritten onto a view that was refreshed, or verified to
+have absorbed its source's highest id, within the last MV_MAX_AGE seconds,
+so a view nobody refreshes stops answering instead of serving old totals.
+The embedded engine refreshes its views in the server; on Athena the
+server only verifies them, and they are maintained with:
+
+    python -m core.materialized_views refresh [--full]
+"""
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+from core.query_cache import normalize_sql, query_cache
+
+MV_TIMEOUT = 600
+MV_REFRESH_SECONDS = 15 * 60
+MV_MAX_AGE = 2 * MV_REFRESH_SECONDS
+
+
+@dataclass
+class MaterializedView:
+    name: str
+    source: str
+    watermark: str
+    select: str
+
+    def query(self, where: str = "") -> str:
+        return self.select.format(where=where)
+
+
+VIEWS = [
+    MaterializedView(
+        name="mv_revenue_by_month",
+        source="sales_transactions",
+        watermark="transaction_id",
+        select=(
+            "SELECT date_trunc('month', transaction_date) AS month, payment_mode, "
+            "COUNT(*) AS transactions, SUM(amount_paid) AS revenue, MAX(transaction_id) AS max_id "
+            "FROM sales_transactions{where} GROUP BY 1, 2"
+        ),
+    ),
+    MaterializedView(
+        name="mv_orders_per_customer",
+        source="orders",
+        watermark="order_id",
+        select=(
+            "SELECT customer_id, COUNT(*) AS order_count, SUM(total_order_value) AS order_value, "
+            "MAX(order_id) AS max_id FROM orders{where} GROUP BY customer_id"
+        ),
+    ),
+    MaterializedView(
+        name="mv_product_sales",
+        source="order_items",
+        watermark="order_item_id",
+        select=(
+            "SELECT product_id, SUM(quantity) AS units, SUM(line_total) AS revenue, "
+            "MAX(order_item_id) AS max_id FROM order_items{where} GROUP BY product_id"
+        ),
+    ),
+]
+
+
+def _alias(name: str) -> str:
+    return rf"(?:(?:as )?(?!from\b)(?P<{name}>\w+))?"
+
+
+_TAIL = r"(?P<tail>(?: order by (?:\w+|\d+)(?: asc| desc)?)?(?: limit \d+)?)$"
+
+# (view, pattern over normalize_sql() output, replacement). Replacements use
+# {alias} for " as <alias>" (or nothing) and {tail} for ORDER BY/LIMIT.
+REWRITES = [
+    (
+        "mv_revenue_by_month",
+        rf"select payment_mode,count\(\*\){_alias('n')},sum\(amount_paid\){_alias('s')} ?"
+        rf"from sales_transactions group by (?:payment_mode|1){_TAIL}",
+        "select payment_mode,sum(transactions){n},sum(revenue){s} "
+        "from mv_revenue_by_month group by payment_mode{tail}",
+    ),
+    (
+        "mv_revenue_by_month",
+        rf"select payment_mode,sum\(amount_paid\){_alias('s')} ?"
+        rf"from sales_transactions group by (?:payment_mode|1){_TAIL}",
+        "select payment_mode,sum(revenue){s} from mv_revenue_by_month group by payment_mode{tail}",
+    ),
+    (
+        "mv_revenue_by_month",
+        rf"select date_trunc\('month',transaction_date\){_alias('m')},sum\(amount_paid\){_alias('s')} ?"
+        rf"from sales_transactions group by (?:1|date_trunc\('month',transaction_date\)){_TAIL}",
+        "select month{m},sum(revenue){s} from mv_revenue_by_month group by month{tail}",
+    ),
+    (
+        "mv_revenue_by_month",
+        rf"select sum\(amount_paid\){_alias('s')} ?from sales_transactions$",
+        "select sum(revenue){s} from mv_revenue_by_month",
+    ),
+    (
+        "mv_orders_per_customer",
+        rf"select customer_id,count\((?:\*|order_id)\){_alias('n')} ?"
+        rf"from orders group by (?:customer_id|1){_TAIL}",
+        "select customer_id,sum(order_count){n} from mv_orders_per_customer group by customer_id{tail}",
+    ),
+    (
+        "mv_orders_per_customer",
+        rf"select c\.customer_name,count\(o\.order_id\){_alias('n')} ?"
+        rf"from orders o join customers c on o\.customer_id=c\.customer_id "
+        rf"group by c\.customer_id,c\.customer_name{_TAIL}",
+        "select c.customer_name,sum(o.order_count){n} from mv_orders_per_customer o "
+        "join customers c on o.customer_id=c.customer_id group by c.customer_id,c.customer_name{tail}",
+    ),
+    (
+        "mv_product_sales",
+        rf"select product_id,sum\(quantity\){_alias('u')} ?from order_items group by (?:product_id|1){_TAIL}",
+        "select product_id,sum(units){u} from mv_product_sales group by product_id{tail}",
+    ),
+    (
+        "mv_product_sales",
+        rf"select product_id,sum\(line_total\){_alias('r')} ?from order_items group by (?:product_id|1){_TAIL}",
+        "select product_id,sum(revenue){r} from mv_product_sales group by product_id{tail}",
+    ),
+]
+
+
+class MaterializedViews:
+    """Builds, refreshes and rewrites queries onto the summary tables."""
+
+    def __init__(self, views=VIEWS, rewrites=REWRITES, max_age=MV_MAX_AGE):
+        self.views = {view.name: view for view in views}
+        self.rewrites = [(name, re.compile(pattern), template) for name, pattern, template in rewrites]
+        self.max_age = max_age
+        self._ready = set()
+        self._stale = set()
+        self._current_at = {}
+        self._timer = None
+        self._lock = threading.Lock()
+        query_cache.on_invalidate(self._on_invalidate)
+
+    def _usable(self, name: str) -> bool:
+        return name in self._ready and time.time() - self._current_at.get(name, 0) <= self.max_age
+
+    def rewrite(self, sql: str) -> str:
+        """Return SQL that reads a summary table if one answers `sql`, else `sql`."""
+        normalized = normalize_sql(sql)
+        for name, pattern, template in self.rewrites:
+            if not self._usable(name):
+                continue
+            match = pattern.match(normalized)
+            if not match:
+                continue
+            parts = {
+                key: (value or "") if key == "tail" else (f" as {value}" if value else "")
+                for key, value in match.groupdict().items()
+            }
+            rewritten = template.format(**parts)
+            print(f"[MV] {name}: {rewritten}")
+            return rewritten
+        return sql
+
+    def refresh(self, backend, full: bool = False):
+        """Incrementally refresh every view, rebuilding those that are new or stale."""
+        for view in self.views.values():
+            with self._lock:
+                rebuild = full or view.name in self._stale
+            if not rebuild:
+                try:
+                    self._append(backend, view)
+                except Exception as e:
+                    print(f"[MV] {view.name}: incremental refresh failed, rebuilding: {str(e)}")
+                    rebuild = True
+            if rebuild:
+                self._build(backend, view)
+            self._mark_current(view.name)
+            query_cache.invalidate_tables(view.name)
+
+    def verify(self, backend):
+        """
+        Mark each view that has absorbed its source's highest id as current,
+        and stop rewriting onto the rest. Read-only, for views maintained
+        elsewhere (e.g. by the CLI on Athena).
+        """
+        for view in self.views.values():
+            try:
+                rows = self._execute(
+                    backend,
+                    f"SELECT (SELECT MAX(max_id) FROM {view.name}) AS view_max, "
+                    f"(SELECT MAX({view.watermark}) FROM {view.source}) AS source_max",
+                )
+            except Exception as e:
+                print(f"[MV] {view.name}: not verified: {str(e)}")
+                continue
+            row = rows[0] if rows else {}
+            view_max, source_max = row.get("view_max"), row.get("source_max")
+            if view_max is not None and view_max == source_max:
+                self._mark_current(view.name)
+            else:
+                print(f"[MV] {view.name}: behind {view.source} ({view_max} < {source_max}); not rewriting")
+                with self._lock:
+                    self._ready.discard(view.name)
+
+    def start_verify(self, backend, delay: float = 0, interval: float = MV_REFRESH_SECONDS):
+        """verify() on `backend` after `delay`, then every `interval`, in a daemon timer."""
+        self._schedule(self.verify, backend, delay, interval)
+
+    def start_refresh(self, backend, delay: float = 0, interval: float = MV_REFRESH_SECONDS):
+        """Refresh on `backend` after `delay`, then every `interval`, in a daemon timer."""
+        self._schedule(self.refresh, backend, delay, interval)
+
+    def _schedule(self, task, backend, delay, interval):
+        def tick():
+            try:
+                task(backend)
+            except Exception as e:
+                print(f"[MV] {task.__name__} failed: {str(e)}")
+            self._schedule(task, backend, interval, interval)
+
+        self._timer = threading.Timer(delay, tick)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _mark_current(self, name: str):
+        with self._lock:
+            self._stale.discard(name)
+            self._ready.add(name)
+            self._current_at[name] = time.time()
+
+    def forget(self):
+        """Stop rewriting until the next refresh, e.g. after the engine dropped its tables."""
+        with self._lock:
+            self._stale |= self._ready
+            self._ready.clear()
+
+    def _execute(self, backend, sql: str):
+        return backend.execute(sql, MV_TIMEOUT, 1, 64 * 1024)
+
+    def _build(self, backend, view):
+        print(f"[MV] building {view.name}")
+        if backend.name == "duckdb":
+            self._execute(backend, f"CREATE OR REPLACE TABLE {view.name} AS {view.query()}")
+            return
+        self._execute(backend, f"DROP TABLE IF EXISTS {view.name}")
+        self._execute(
+            backend,
+            f"CREATE TABLE {view.name} WITH (format = 'PARQUET', write_compression = 'ZSTD') "
+            f"AS {view.query()}",
+        )
+
+    def _append(self, backend, view):
+        rows = self._execute(backend, f"SELECT MAX(max_id) AS watermark FROM {view.name}")
+        watermark = rows[0]["watermark"] if rows else None
+        if watermark is None:
+            raise RuntimeError("no watermark")
+        print(f"[MV] appending to {view.name} above {view.watermark} {watermark}")
+        self._execute(
+            backend,
+            f"INSERT INTO {view.name} {view.query(f' WHERE {view.watermark} > {int(watermark)}')}",
+        )
+
+    def _on_invalidate(self, tables):
+        with self._lock:
+            for view in self.views.values():
+                if view.source in tables:
+                    self._stale.add(view.name)
+                    self._ready.discard(view.name)
+
+
+materialized_views = MaterializedViews()
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] != "refresh":
+        print("usage: python -m core.materialized_views refresh [--full]")
+        return 2
+    from tools.athena_tool import backend
+
+    target = getattr(backend, "remote", backend)
+    materialized_views.refresh(target, full="--full" in argv)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
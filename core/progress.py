@@ -0,0 +1,24 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_progress_sink = ContextVar("progress_sink", default=None)
+
+
+def emit_progress(message: str):
+    """Report a progress message to the current streaming request, if any."""
+    sink = _progress_sink.get()
+    if sink is not None:
+        sink(message)
+
+
+@contextmanager
+def progress_to(sink):
+    """
+    Route emit_progress() calls made in this context (and in tasks or
+    threads started from it) to `sink`.
+    """
+    token = _progress_sink.set(sink)
+    try:
+        yield
+    finally:
+        _progress_sink.reset(token)
@@ -0,0 +1,190 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+CACHE_TTL_SECONDS = 15 * 60
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+RESULT_REUSE_MAX_AGE_MINUTES = 60
+
+DATA_MANIFEST = Path(__file__).resolve().parents[1] / "data" / "_manifest.json"
+MANIFEST_CHECK_INTERVAL = 5
+
+_TOKEN = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|\d+(?:\.\d+)?|\w+|\s+|.""")
+_PUNCTUATION = set("(),=<>+-*/;")
+
+
+def _normalize_number(token: str) -> str:
+    if "." in token:
+        whole, frac = token.split(".")
+        return f"{whole.lstrip('0') or '0'}.{frac}"
+    return token.lstrip("0") or "0"
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Canonical form of a query for cache lookups.
+
+    Collapses whitespace, lower-cases everything outside string literals
+    (Athena identifiers are case-insensitive), drops redundant spacing
+    around punctuation and a trailing semicolon, and strips leading zeros
+    from numeric literals. String literal contents are left untouched.
+    """
+    out = []
+    for token in _TOKEN.findall(sql.strip().rstrip(";").strip()):
+        if token.isspace():
+            if out and out[-1] != " " and out[-1] not in _PUNCTUATION:
+                out.append(" ")
+            continue
+        if token.startswith("'"):
+            out.append(token)
+        elif token[0].isdigit():
+            out.append(_normalize_number(token))
+        else:
+            if token in _PUNCTUATION and out and out[-1] == " ":
+                out.pop()
+            out.append(token.lower())
+    return "".join(out).strip()
+
+
+def referenced_tables(sql: str):
+    """Return the unqualified table names a query reads from."""
+    # Parsed, so CTE names and FROM inside extract()/substring() don't count
+    from core.sql_guard import stored_tables
+
+    return set(stored_tables(sql))
+
+
+class QueryCache:
+    """
+    In-process result cache with TTL expiry and LRU eviction bounded by size.
+
+    Entries remember which tables they read, so a data reload can flush just
+    the affected results via invalidate_tables().
+    """
+
+    def __init__(self, ttl=CACHE_TTL_SECONDS, max_bytes=CACHE_MAX_BYTES, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._reloaded_at = {}
+        self._manifest = {}
+        self._manifest_checked = 0.0
+        self._manifest_mtime = None
+        self._listeners = []
+
+    def get(self, key):
+        self.sync_manifest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["expires"] <= self.clock():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["value"]
+
+    def put(self, key, value, tables):
+        size = len(json.dumps(value, default=str)) + sys.getsizeof(key)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = {
+                "value": value,
+                "size": size,
+                "tables": set(tables),
+                "expires": self.clock() + self.ttl,
+            }
+            self._size += size
+            while self._size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def on_invalidate(self, callback):
+        """Call `callback(tables)` whenever tables are invalidated."""
+        self._listeners.append(callback)
+
+    def invalidate_tables(self, *tables):
+        """Drop every cached result that reads any of `tables`."""
+        tables = {t.lower() for t in tables}
+        with self._lock:
+            now = self.clock()
+            for table in tables:
+                self._reloaded_at[table] = now
+            stale = [k for k, e in self._entries.items() if e["tables"] & tables]
+            for key in stale:
+                self._drop(key)
+        if stale:
+            print(f"[CACHE] invalidated {len(stale)} entries for {sorted(tables)}")
+        for callback in self._listeners:
+            callback(tables)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def allow_result_reuse(self, tables) -> bool:
+        """
+        Whether Athena's own result reuse is safe for a query on `tables`.
+
+        Athena keeps reused results for RESULT_REUSE_MAX_AGE_MINUTES and has
+        no invalidation API, so reuse is switched off for that long after a
+        table is reloaded.
+        """
+        horizon = self.clock() - RESULT_REUSE_MAX_AGE_MINUTES * 60
+        return all(self._reloaded_at.get(t, horizon) <= horizon for t in tables)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+            }
+
+    def _drop(self, key):
+        self._size -= self._entries.pop(key)["size"]
+
+    def sync_manifest(self):
+        """Invalidate tables that data_generation.py has rewritten since last check."""
+        now = self.clock()
+        if now - self._manifest_checked < MANIFEST_CHECK_INTERVAL:
+            return
+        self._manifest_checked = now
+        try:
+            mtime = os.stat(DATA_MANIFEST).st_mtime
+        except OSError:
+            return
+        if mtime == self._manifest_mtime:
+            return
+        with open(DATA_MANIFEST) as f:
+            manifest = json.load(f)
+        changed = [t for t, v in manifest.items() if self._manifest.get(t) != v]
+        if self._manifest_mtime is not None and changed:
+            self.invalidate_tables(*changed)
+        self._manifest = manifest
+        self._manifest_mtime = mtime
+
+
+query_cache = QueryCache()
+
+
+def invalidate_tables(*tables):
+    query_cache.invalidate_tables(*tables)
@@ -1,4 +1,12 @@
 
+def _message_texts(message):
+    return [
+        item["text"]
+        for item in message.get("content", [])
+        if isinstance(item, dict) and "text" in item
+    ]
+
+
 def extract_final_answer(swarm_result):
     """
     Extract the final user-facing answer from a Strands SwarmResult.
@@ -17,8 +25,18 @@ def extract_final_answer(swarm_result):
         if not message:
             continue
 
-        for item in message.get("content", []):
-            if isinstance(item, dict) and "text" in item:
-                answers.append(item["text"])
+        answers.extend(_message_texts(message))
+
+    return answers[-1] if answers else None
+
+
+def extract_agent_answer(agent_result):
+    """
+    Extract the final answer from a single Strands AgentResult.
+    """
+    message = getattr(agent_result, "message", None)
+    if not message:
+        return None
 
-    return answers[-1] if answers else None
\ No newline at end of file
+    answers = _message_texts(message)
+    return answers[-1] if answers else None
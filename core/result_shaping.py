@@ -0,0 +1,150 @@
+"""
+Typed query results for the UI.
+
+Backends return values as Athena does, every one a string or None, with the
+column types alongside (ResultRows). Here they are decoded into Arrow
+tables by those types, and the results a request's queries produced travel
+next to the text answer as base64 Arrow IPC, so the UI can draw tables and
+charts from the numbers themselves instead of re-reading the answer text.
+
+pyarrow is imported on first use to keep it off the server's startup path.
+"""
+import base64
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime
+from decimal import Decimal
+
+RESULT_PAYLOAD_MAX_TABLES = 3
+
+_results = ContextVar("query_results", default=None)
+
+
+def _parse_bool(value: str) -> bool:
+    return value.lower() == "true"
+
+
+# Athena type -> (parser for the string value, Arrow type name)
+_DECODERS = {
+    "tinyint": (int, "int8"),
+    "smallint": (int, "int16"),
+    "integer": (int, "int32"),
+    "int": (int, "int32"),
+    "bigint": (int, "int64"),
+    "real": (float, "float32"),
+    "float": (float, "float64"),
+    "double": (float, "float64"),
+    "boolean": (_parse_bool, "bool_"),
+    "date": (date.fromisoformat, "date32"),
+    "timestamp": (datetime.fromisoformat, "timestamp"),
+}
+
+
+def decode_column(values, athena_type: str):
+    """
+    Arrow array of the string `values` decoded as `athena_type`. Types with
+    no decoder (varchar, arrays, maps, ...) and values that fail to parse
+    stay text.
+    """
+    import pyarrow as pa
+
+    kind, _, params = (athena_type or "varchar").partition("(")
+    try:
+        if kind == "decimal":
+            precision, scale = (int(p) for p in params.rstrip(")").split(","))
+            return pa.array(
+                [None if v is None else Decimal(v) for v in values], pa.decimal128(precision, scale)
+            )
+        if kind in _DECODERS:
+            parse, arrow_type = _DECODERS[kind]
+            arrow_type = pa.timestamp("ms") if arrow_type == "timestamp" else getattr(pa, arrow_type)()
+            return pa.array([None if v is None else parse(v) for v in values], arrow_type)
+    except (ValueError, ArithmeticError, pa.ArrowException) as e:
+        print(f"[RESULTS] keeping {athena_type} column as text: {str(e)}")
+    return pa.array(values, pa.string())
+
+
+def to_arrow(rows):
+    """
+    Arrow table of `rows`, typed by rows.columns when the backend reported
+    them. A trailing truncation row becomes the "truncated" schema metadata.
+    """
+    import pyarrow as pa
+
+    columns = getattr(rows, "columns", None)
+    note = None
+    if rows and set(rows[-1]) == {"truncated"}:
+        rows, note = rows[:-1], rows[-1]["truncated"]
+    if not columns:
+        columns = [(name, "varchar") for name in (rows[0] if rows else ())]
+
+    table = pa.table({
+        name: decode_column([row.get(name) for row in rows], dtype) for name, dtype in columns
+    })
+    return table.replace_schema_metadata({"truncated": note}) if note else table
+
+
+def result_payload(sql: str, rows) -> dict:
+    """JSON-safe payload for one result: the SQL, row count and Arrow IPC stream."""
+    import pyarrow as pa
+
+    table = to_arrow(rows)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return {
+        "sql": sql,
+        "rows": table.num_rows,
+        "arrow": base64.b64encode(sink.getvalue().to_pybytes()).decode("ascii"),
+    }
+
+
+def read_payload(payload: dict):
+    """The Arrow table in a result_payload() dict."""
+    import pyarrow as pa
+
+    return pa.ipc.open_stream(base64.b64decode(payload["arrow"])).read_all()
+
+
+def note_result(sql: str, rows):
+    """Record a query result for the current request, if one is collecting them."""
+    collected = _results.get()
+    if collected is not None:
+        collected.append((sql, rows))
+
+
+@contextmanager
+def collect_results():
+    """Yield the list of (sql, rows) note_result() sees in this context (and its tasks/threads)."""
+    results = []
+    token = _results.set(results)
+    try:
+        yield results
+    finally:
+        _results.reset(token)
+
+
+def result_payloads(results, limit: int = RESULT_PAYLOAD_MAX_TABLES):
+    """Payloads for the last `limit` distinct queries that returned columns."""
+    payloads, seen = [], set()
+    for sql, rows in reversed(results):
+        if sql in seen or not (getattr(rows, "columns", None) or rows):
+            continue
+        seen.add(sql)
+        try:
+            payloads.append(result_payload(sql, rows))
+        except Exception as e:
+            print(f"[RESULTS] could not encode result: {str(e)}")
+        if len(payloads) == limit:
+            break
+    return payloads[::-1]
+
+
+def to_dataframe(table):
+    """NumPy-backed DataFrame of an Arrow table, with decimals as float64 and dates as datetime64."""
+    import pyarrow as pa
+
+    for i, field in enumerate(table.schema):
+        if pa.types.is_decimal(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.float64()))
+    return table.to_pandas(date_as_object=False)
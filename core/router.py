@@ -0,0 +1,124 @@
+import re
+from dataclasses import dataclass
+
+ROUTER_MIN_CONFIDENCE = 0.8
+
+# Same keyword rules as the master agent prompt, plus the table vocabulary
+# each specialist owns.
+KEYWORDS = {
+    "clients_agent": {"client", "region", "industry", "onboard", "onboarded", "manufacturer"},
+    "customers_agent": {"customer", "buyer"},
+    "orders_products_agent": {
+        "order", "product", "vehicle", "item", "model", "fuel",
+        "sedan", "suv", "truck", "hatchback", "electric", "diesel", "petrol",
+    },
+    "sales_agent": {"sale", "sales", "revenue", "payment", "transaction", "paid", "emi", "lease", "cash"},
+}
+
+# Combinations the master prompt sends to a single agent, e.g.
+# "which customer has most orders" is answered from the orders tables.
+JOINT_RULES = {
+    frozenset({"customers_agent", "orders_products_agent"}): "orders_products_agent",
+}
+
+_WORD = re.compile(r"[a-z]+")
+
+# Where one question holds several: sentence breaks, and "and"/"also" that
+# start a new question ("... and what is the total revenue?"). "Customers
+# and their sales" is one question about a join, so a bare "and" between
+# nouns does not split.
+_CLAUSE_BREAK = re.compile(
+    r"[?;]+\s*|\.\s+|,?\s+(?:and|also|plus)\s+(?:also\s+)?"
+    r"(?=(?:how|what|which|who|when|where|list|show|give|count|tell)\b)",
+    re.IGNORECASE,
+)
+# A clause that points back at another ("... and what is their revenue?")
+# depends on it, so the question is not independent parts
+_BACK_REFERENCES = {"their", "them", "they", "those", "these", "it", "its", "same"}
+
+
+@dataclass
+class Route:
+    agent: str
+    confidence: float
+    agents: tuple
+    # (agent, sub-question) pairs when the question is several independent
+    # questions for different specialists; empty otherwise
+    parts: tuple = ()
+
+    @property
+    def confident(self) -> bool:
+        return self.agent is not None and self.confidence >= ROUTER_MIN_CONFIDENCE
+
+
+def _stem(word: str) -> str:
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("s") and not word.endswith("ss") and word not in KEYWORDS["sales_agent"]:
+        return word[:-1]
+    return word
+
+
+def route_question(question: str) -> Route:
+    """
+    Route a question to a specialist agent without an LLM call.
+
+    `confidence` is the share of keyword hits that went to the chosen agent;
+    callers fall back to the Swarm when the route is not `confident`.
+    `agents` lists every specialist that matched, strongest first.
+    `parts` is set when an unconfident question splits into independent
+    questions that each route confidently; those can be answered in
+    parallel. Anything else that spans domains needs a join, so the Swarm
+    answers it as one question.
+    """
+    route = _route(question)
+    if len(route.agents) > 1 and not route.confident:
+        route.parts = independent_parts(question)
+    return route
+
+
+def independent_parts(question: str) -> tuple:
+    """
+    (agent, sub-question) pairs, one per specialist, if every clause of the
+    question routes confidently and more than one specialist is involved;
+    otherwise ().
+    """
+    clauses = [c.strip(" ,") for c in _CLAUSE_BREAK.split(question)]
+    clauses = [c for c in clauses if c]
+    if len(clauses) < 2:
+        return ()
+    by_agent = {}
+    for clause in clauses:
+        if _BACK_REFERENCES.intersection(_WORD.findall(clause.lower())):
+            return ()
+        route = _route(clause)
+        if not route.confident:
+            return ()
+        by_agent.setdefault(route.agent, []).append(clause)
+    if len(by_agent) < 2:
+        return ()
+    parts = []
+    for agent, agent_clauses in by_agent.items():
+        text = "; ".join(agent_clauses)
+        parts.append((agent, text[:1].upper() + text[1:] + "?"))
+    return tuple(parts)
+
+
+def _route(question: str) -> Route:
+    words = [_stem(w) for w in _WORD.findall(question.lower())]
+    hits = {}
+    for agent, keywords in KEYWORDS.items():
+        count = sum(1 for w in words if w in keywords)
+        if count:
+            hits[agent] = count
+
+    agents = tuple(sorted(hits, key=hits.get, reverse=True))
+    if not agents:
+        return Route(None, 0.0, agents)
+
+    joint = JOINT_RULES.get(frozenset(agents))
+    if joint:
+        return Route(joint, 1.0, agents)
+
+    top = agents[0]
+    return Route(top, hits[top] / sum(hits.values()), agents)
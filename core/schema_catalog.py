@@ -0,0 +1,140 @@
+import threading
+import time
+
+from core.aws import get_client
+
+SCHEMA_REFRESH_SECONDS = 30 * 60
+SCHEMA_MAX_COLUMNS = 100_000
+SCHEMA_MAX_BYTES = 64 * 1024 * 1024
+
+
+def split_tables(allowed_tables):
+    if isinstance(allowed_tables, str):
+        allowed_tables = allowed_tables.split(",")
+    return [t.strip().lower() for t in allowed_tables if t.strip()]
+
+
+def load_from_glue(glue, database: str):
+    """Return {table: [(column, type), ...]} from the Glue Data Catalog."""
+    tables = {}
+    for page in glue.get_paginator("get_tables").paginate(DatabaseName=database):
+        for table in page["TableList"]:
+            columns = table.get("StorageDescriptor", {}).get("Columns", [])
+            columns = columns + table.get("PartitionKeys", [])
+            tables[table["Name"].lower()] = [(c["Name"], c["Type"]) for c in columns]
+    return tables
+
+
+def load_from_information_schema(backend, database: str):
+    """
+    Fallback loader: one information_schema query through the configured
+    query backend, so an embedded engine describes its own tables.
+    """
+    from core.athena_polling import QUERY_TIMEOUT
+
+    tables = {}
+    rows = backend.execute(
+        "SELECT table_name, column_name, data_type FROM information_schema.columns "
+        f"WHERE table_schema = '{database}' ORDER BY table_name, ordinal_position",
+        QUERY_TIMEOUT,
+        SCHEMA_MAX_COLUMNS,
+        SCHEMA_MAX_BYTES,
+    )
+    for row in rows:
+        tables.setdefault(row["table_name"].lower(), []).append(
+            (row["column_name"], row["data_type"].lower())
+        )
+    return tables
+
+
+class SchemaCatalog:
+    """
+    Column metadata for the Athena database, loaded once and refreshed on a
+    schedule, so agents get their schema in the system prompt instead of
+    querying information_schema at the start of every conversation.
+    """
+
+    def __init__(self, database: str, region: str, refresh_seconds=SCHEMA_REFRESH_SECONDS):
+        self.database = database
+        self.region = region
+        self.refresh_seconds = refresh_seconds
+        self.loaded_at = None
+        self._tables = None
+        self._bindings = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def load(self):
+        from tools.athena_tool import backend
+
+        if backend.name == "duckdb":
+            # The local engine is the catalog; Glue describes Athena's tables
+            tables = load_from_information_schema(backend, self.database)
+        else:
+            try:
+                glue = get_client("glue", region_name=self.region)
+                tables = load_from_glue(glue, self.database)
+            except Exception as e:
+                print(f"[SCHEMA] Glue lookup failed, using information_schema: {str(e)}")
+                tables = load_from_information_schema(backend, self.database)
+        self.set_tables(tables)
+        print(f"[SCHEMA] loaded {len(tables)} tables from {self.database}")
+        return tables
+
+    def set_tables(self, tables):
+        """Use `tables` as the schema, e.g. the one recorded with a benchmark cassette."""
+        with self._lock:
+            self._tables = tables
+            self.loaded_at = time.time()
+
+    @property
+    def tables(self):
+        if self._tables is None:
+            self.load()
+        return self._tables
+
+    def columns(self, table: str):
+        return self.tables.get(table.lower(), [])
+
+    def describe(self, allowed_tables) -> str:
+        """Compact schema for the given tables, one line per table."""
+        lines = []
+        for table in split_tables(allowed_tables):
+            columns = ", ".join(f"{name} {dtype}" for name, dtype in self.columns(table))
+            lines.append(f"{self.database}.{table}({columns})")
+        return "\n".join(lines)
+
+    def bind(self, agent, allowed_tables, build_prompt):
+        """
+        Set the agent's system prompt from its schema and keep it current
+        across refreshes. `build_prompt` receives the describe() output.
+        """
+        binding = (agent, allowed_tables, build_prompt)
+        self._bindings.append(binding)
+        self._apply(binding)
+        return agent
+
+    def refresh(self):
+        self.load()
+        for binding in self._bindings:
+            self._apply(binding)
+
+    def start_refresh(self):
+        """Refresh in a daemon timer every refresh_seconds."""
+        def tick():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[SCHEMA] refresh failed: {str(e)}")
+            self.start_refresh()
+
+        self._timer = threading.Timer(self.refresh_seconds, tick)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _apply(self, binding):
+        agent, allowed_tables, build_prompt = binding
+        agent.system_prompt = build_prompt(self.describe(allowed_tables))
+
+
+schema_catalog = SchemaCatalog(database="demo", region="ap-south-1")
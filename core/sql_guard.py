@@ -0,0 +1,317 @@
+"""
+Local validation and safe rewrites of agent SQL before it is executed.
+
+Queries are parsed with sqlglot against the cached schema, so a wrong
+table or column, or a table outside the calling agent's allowed_tables,
+comes back to the agent at once with a precise error instead of after
+Athena's queue and planning time. Queries that pass get three rewrites
+that never change what the agent sees:
+
+- an unbounded SELECT gets a LIMIT just past the result cap, so Athena
+  stops early instead of producing rows that would be dropped
+- SELECT * inside a CTE or subquery is pruned to the columns the outer
+  query uses
+- year(d) and date_trunc(unit, d) comparisons on DATE columns become
+  plain ranges on d, which partition projection and Parquet statistics
+  can prune on
+
+Rewrites that need the query regenerated only do so when they apply, so
+other queries keep their text (and their cache and summary table matches).
+"""
+import datetime
+from functools import lru_cache
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import OptimizeError, SqlglotError
+from sqlglot.optimizer.pushdown_projections import pushdown_projections
+from sqlglot.optimizer.qualify import qualify
+
+from core.athena_results import MAX_RESULT_ROWS
+from core.schema_catalog import schema_catalog, split_tables
+
+SQL_DIALECT = "athena"
+SQL_DEFAULT_LIMIT = MAX_RESULT_ROWS + 1
+METADATA_SCHEMAS = {"information_schema"}
+
+
+class SQLRejected(ValueError):
+    """The query cannot run as written; the message says why, for the agent."""
+
+
+def _tables(tree):
+    """Table nodes that read stored tables, not CTEs."""
+    ctes = {cte.alias_or_name.lower() for cte in tree.find_all(exp.CTE)}
+    return [
+        table for table in tree.find_all(exp.Table)
+        if table.name and not (not table.db and table.name.lower() in ctes)
+    ]
+
+
+@lru_cache(maxsize=512)
+def stored_tables(sql: str) -> frozenset:
+    """
+    Lower-case names of the stored tables `sql` reads: not CTEs, not
+    information_schema, and not words like the FROM in extract(month FROM d).
+    Empty if it does not parse.
+    """
+    try:
+        statements = sqlglot.parse(sql, dialect=SQL_DIALECT)
+    except SqlglotError:
+        return frozenset()
+    return frozenset(
+        table.name.lower()
+        for tree in statements if tree is not None
+        for table in _tables(tree)
+        if table.db.lower() not in METADATA_SCHEMAS
+    )
+
+
+def _check_tables(tree, catalog, allowed, database):
+    known = catalog.tables
+    read = set()
+    for table in _tables(tree):
+        name, db = table.name.lower(), table.db.lower()
+        if db in METADATA_SCHEMAS:
+            continue
+        if db and db != database:
+            raise SQLRejected(f"Database '{table.db}' is not available; use '{database}'.")
+        if allowed is not None and name not in allowed:
+            raise SQLRejected(
+                f"Table '{table.name}' is not allowed here; query only: {', '.join(sorted(allowed))}."
+            )
+        if name not in known:
+            choices = sorted(allowed if allowed is not None else known)
+            raise SQLRejected(f"Unknown table '{table.name}'. Tables: {', '.join(choices)}.")
+        read.add(name)
+    return read
+
+
+def _sqlglot_schema(catalog, database, tables):
+    return {database: {t: {name: dtype for name, dtype in catalog.columns(t)} for t in tables}}
+
+
+def _check_columns(tree, catalog, database, read):
+    # Columns qualified with a stored table or its alias; the qualifier
+    # below only resolves unqualified ones
+    aliases = {t.alias_or_name.lower(): t.name.lower() for t in _tables(tree) if t.name.lower() in read}
+    for column in tree.find_all(exp.Column):
+        table = aliases.get(column.table.lower())
+        if table and not column.is_star and column.name.lower() not in {
+            name.lower() for name, _ in catalog.columns(table)
+        }:
+            raise SQLRejected(
+                f"Column '{column.sql(dialect=SQL_DIALECT)}' could not be resolved. "
+                f"Columns: {table}: {', '.join(name for name, _ in catalog.columns(table))}."
+            )
+    try:
+        qualify(
+            tree.copy(),
+            schema=_sqlglot_schema(catalog, database, read),
+            db=database,
+            dialect=SQL_DIALECT,
+            quote_identifiers=False,
+            validate_qualify_columns=True,
+        )
+    except OptimizeError as e:
+        if "could not be resolved" not in str(e):
+            return  # a construct the qualifier doesn't follow; let the engine decide
+        columns = "; ".join(
+            f"{t}: {', '.join(name for name, _ in catalog.columns(t))}" for t in sorted(read)
+        )
+        raise SQLRejected(f"{str(e).split('. Line')[0]}. Columns: {columns}.") from None
+
+
+def _aggregates(projection) -> bool:
+    """
+    True if the projection aggregates the select's rows. An aggregate under
+    OVER (...) or inside a subquery keeps one output row per input row.
+    """
+    for agg in projection.find_all(exp.AggFunc):
+        node = agg
+        while node is not projection:
+            node = node.parent
+            if isinstance(node, (exp.Window, exp.Select)):
+                break
+        else:
+            return True
+    return False
+
+
+def _is_single_row(select) -> bool:
+    return not select.args.get("group") and any(
+        _aggregates(projection) for projection in select.expressions
+    )
+
+
+def _needs_limit(tree) -> bool:
+    if not isinstance(tree, (exp.Select, exp.Union)) or tree.args.get("limit"):
+        return False
+    return not (isinstance(tree, exp.Select) and _is_single_row(tree))
+
+
+def _output_selects(tree) -> list:
+    if isinstance(tree, exp.SetOperation):
+        return _output_selects(tree.left) + _output_selects(tree.right)
+    if isinstance(tree, exp.Subquery):
+        return _output_selects(tree.this)
+    return [tree] if isinstance(tree, exp.Select) else []
+
+
+def _has_inner_star(tree) -> bool:
+    return any(
+        select is not tree and any(isinstance(p, exp.Star) or p.is_star for p in select.expressions)
+        for select in tree.find_all(exp.Select)
+    )
+
+
+def _date_columns(catalog, read):
+    return {name.lower() for t in read for name, dtype in catalog.columns(t) if dtype.lower() == "date"}
+
+
+def _date(value: str):
+    return exp.cast(exp.Literal.string(value.isoformat()), exp.DataType.build("date"))
+
+
+def _truncation(node, dates):
+    """(column, unit) for year(d) or date_trunc(unit, d) on a DATE column d, else None."""
+    if isinstance(node, exp.Year):
+        column, unit = node.this, "year"
+    elif isinstance(node, (exp.DateTrunc, exp.TimestampTrunc)) and node.unit:
+        column, unit = node.this, node.unit.name.lower()
+    else:
+        return None
+    if unit not in ("year", "month", "day") or not isinstance(column, exp.Column):
+        return None
+    return (column, unit) if column.name.lower() in dates else None
+
+
+def _next(day, unit):
+    if unit == "day":
+        return day + datetime.timedelta(days=1)
+    if unit == "year" or day.month == 12:
+        return datetime.date(day.year + 1, 1, 1)
+    return datetime.date(day.year, day.month + 1, 1)
+
+
+def _period(node, value, unit):
+    """[start, end) of the whole period `value` names, or None if it names none."""
+    if isinstance(node, exp.Year):
+        if not (isinstance(value, exp.Literal) and value.is_int):
+            return None
+        start = datetime.date(int(value.name), 1, 1)
+    else:
+        if isinstance(value, exp.Cast) and value.to.is_type("date"):
+            value = value.this
+        if not (isinstance(value, exp.Literal) and value.is_string):
+            return None
+        start = datetime.date.fromisoformat(value.name)
+        aligned = {"year": start.replace(month=1, day=1), "month": start.replace(day=1), "day": start}
+        if start != aligned[unit]:
+            return None
+    return start, _next(start, unit)
+
+
+def _range(column, low=None, high=None):
+    """column >= low AND column < high (either bound optional)."""
+    bounds = []
+    if low is not None:
+        bounds.append(exp.GTE(this=column.copy(), expression=_date(low)))
+    if high is not None:
+        bounds.append(exp.LT(this=column.copy(), expression=_date(high)))
+    return exp.paren(exp.and_(*bounds)) if len(bounds) > 1 else bounds[0]
+
+
+def _sargable(node, dates):
+    """A range on the bare date column equivalent to `node`, or None."""
+    if isinstance(node, exp.Between):
+        truncation = _truncation(node.this, dates)
+        if not truncation:
+            return None
+        column, unit = truncation
+        low = _period(node.this, node.args["low"], unit)
+        high = _period(node.this, node.args["high"], unit)
+        return _range(column, low[0], high[1]) if low and high else None
+
+    truncation = _truncation(node.this, dates)
+    if not truncation:
+        return None
+    column, unit = truncation
+    period = _period(node.this, node.expression, unit)
+    if not period:
+        return None
+    start, end = period
+    if isinstance(node, exp.EQ):
+        return _range(column, start, end)
+    if isinstance(node, exp.GTE):
+        return _range(column, low=start)
+    if isinstance(node, exp.GT):
+        return _range(column, low=end)
+    if isinstance(node, exp.LT):
+        return _range(column, high=start)
+    return _range(column, high=end)
+
+
+def _push_date_ranges(tree, dates) -> bool:
+    changed = False
+    for where in tree.find_all(exp.Where):
+        for node in list(where.find_all(exp.Between, exp.EQ, exp.GT, exp.GTE, exp.LT, exp.LTE)):
+            try:
+                replacement = _sargable(node, dates)
+            except ValueError:
+                continue  # not a valid date literal; leave it to the engine
+            if replacement is not None:
+                node.replace(replacement)
+                changed = True
+    return changed
+
+
+def prepare_sql(sql: str, allowed_tables=None, catalog=schema_catalog) -> str:
+    """
+    Validate `sql` for an agent limited to `allowed_tables` (None: any
+    table in the catalog) and return it with the safe rewrites applied.
+    Raises SQLRejected with an error the agent can act on.
+    """
+    try:
+        statements = [s for s in sqlglot.parse(sql, dialect=SQL_DIALECT) if s is not None]
+    except SqlglotError as e:
+        raise SQLRejected(f"SQL syntax error: {str(e).splitlines()[0]}") from None
+    if len(statements) != 1:
+        raise SQLRejected("Send exactly one SQL statement per run_athena call.")
+    tree = statements[0]
+    if not isinstance(tree, exp.Query):
+        raise SQLRejected("Only SELECT queries are allowed.")
+
+    database = catalog.database
+    allowed = set(split_tables(allowed_tables)) if allowed_tables else None
+    read = _check_tables(tree, catalog, allowed, database)
+    if read:
+        _check_columns(tree, catalog, database, read)
+
+    regenerate = False
+    try:
+        if read and _push_date_ranges(tree, _date_columns(catalog, read)):
+            regenerate = True
+        if read and _has_inner_star(tree):
+            # qualify names unnamed output columns _col_<n> where Athena would
+            # say _col<n>, so the outer projections are kept as written
+            outputs = [[p.copy() for p in select.expressions] for select in _output_selects(tree)]
+            tree = pushdown_projections(
+                qualify(tree, schema=_sqlglot_schema(catalog, database, read), db=database,
+                        dialect=SQL_DIALECT, quote_identifiers=False)
+            )
+            for select, projections in zip(_output_selects(tree), outputs):
+                select.set("expressions", projections)
+            regenerate = True
+    except SqlglotError as e:
+        print(f"[SQL] rewrite skipped: {str(e)}")
+        return sql
+
+    limit = _needs_limit(tree)
+    if regenerate or (limit and "--" in sql):
+        if limit:
+            tree = tree.limit(SQL_DEFAULT_LIMIT)
+        return tree.sql(dialect=SQL_DIALECT)
+    if limit:
+        return f"{sql.strip().rstrip(';').rstrip()} LIMIT {SQL_DEFAULT_LIMIT}"
+    return sql
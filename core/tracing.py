@@ -0,0 +1,178 @@
+"""
+Per-stage latency tracing.
+
+Every span is emitted as one JSON line on stdout (picked up by the runtime's
+log stream) and appended to $TRACE_LOG when set. If OpenTelemetry is
+installed, spans are also exported through the active tracer provider.
+
+Summarise a log with:
+
+    python -m core.tracing traces.jsonl
+"""
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+try:
+    from opentelemetry import trace as otel_trace
+
+    _tracer = otel_trace.get_tracer("agent-query-system")
+except ImportError:
+    _tracer = None
+
+TRACE_LOG = os.environ.get("TRACE_LOG")
+
+_trace_id = ContextVar("trace_id", default=None)
+_write_lock = threading.Lock()
+
+
+@contextmanager
+def start_trace(trace_id: str):
+    """Tag every span recorded in this context with `trace_id`."""
+    token = _trace_id.set(trace_id)
+    try:
+        yield
+    finally:
+        _trace_id.reset(token)
+
+
+def record(stage: str, duration_ms: float, **attrs):
+    """Emit a span whose timing was measured elsewhere."""
+    event = {
+        "trace_id": _trace_id.get(),
+        "stage": stage,
+        "duration_ms": round(duration_ms, 2),
+        "ts": time.time(),
+        **attrs,
+    }
+    line = json.dumps(event, default=str)
+    with _write_lock:
+        print(line)
+        if TRACE_LOG:
+            with open(TRACE_LOG, "a") as f:
+                f.write(line + "\n")
+
+
+@contextmanager
+def span(stage: str, **attrs):
+    """
+    Time the enclosed block as `stage`. Yields a dict that the block can
+    add attributes to, e.g. bytes scanned once they are known.
+    """
+    extra = dict(attrs)
+    otel_span = _tracer.start_span(stage) if _tracer else None
+    start = time.perf_counter()
+    try:
+        yield extra
+    except Exception as e:
+        extra["error"] = type(e).__name__
+        raise
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        if otel_span is not None:
+            for key, value in extra.items():
+                if value is None:
+                    continue
+                otel_span.set_attribute(key, value if isinstance(value, (str, int, float, bool)) else str(value))
+            otel_span.end()
+        record(stage, duration_ms, **extra)
+
+
+def record_swarm(swarm_result):
+    """Emit one span per Swarm node execution (i.e. per handoff)."""
+    for node_id, node_result in getattr(swarm_result, "results", {}).items():
+        record("swarm_node", getattr(node_result, "execution_time", 0), node=node_id)
+
+
+def record_usage(result, **attrs):
+    """Emit the token usage of an AgentResult or Swarm result as a "tokens" span."""
+    usage = getattr(result, "accumulated_usage", None)
+    if usage is None:
+        usage = getattr(getattr(result, "metrics", None), "accumulated_usage", None)
+    if not usage:
+        return
+    record(
+        "tokens",
+        0,
+        input_tokens=usage.get("inputTokens", 0),
+        output_tokens=usage.get("outputTokens", 0),
+        total_tokens=usage.get("totalTokens", 0),
+        **attrs,
+    )
+
+
+def athena_statistics(execution: dict) -> dict:
+    """Pull the cost and timing fields out of a QueryExecution."""
+    stats = execution.get("Statistics", {})
+    return {
+        "data_scanned_bytes": stats.get("DataScannedInBytes"),
+        "engine_ms": stats.get("EngineExecutionTimeInMillis"),
+        "queue_ms": stats.get("QueryQueueTimeInMillis"),
+        "planning_ms": stats.get("QueryPlanningTimeInMillis"),
+        "total_ms": stats.get("TotalExecutionTimeInMillis"),
+        "reused": stats.get("ResultReuseInformation", {}).get("ReusedPreviousResult"),
+    }
+
+
+def _pct(values, p):
+    if len(values) < 2:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[p - 1]
+
+
+def summarize(lines):
+    """p50/p95 per stage, Athena bytes scanned and tokens per invocation, from JSON span lines."""
+    durations = defaultdict(list)
+    scanned = []
+    tokens = defaultdict(int)
+    for line in lines:
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(event, dict) or "stage" not in event:
+            continue
+        if event["stage"] == "tokens":
+            tokens[event.get("trace_id")] += event.get("total_tokens", 0)
+            continue
+        durations[event["stage"]].append(event["duration_ms"])
+        if event["stage"] == "athena":
+            for key in ("queue_ms", "engine_ms"):
+                if event.get(key) is not None:
+                    durations[f"athena.{key[:-3]}"].append(event[key])
+            if event.get("data_scanned_bytes") is not None:
+                scanned.append(event["data_scanned_bytes"])
+
+    rows = [
+        (stage, len(values), _pct(values, 50), _pct(values, 95))
+        for stage, values in sorted(durations.items())
+    ]
+    return rows, scanned, list(tokens.values())
+
+
+def main(argv):
+    lines = open(argv[1]) if len(argv) > 1 else sys.stdin
+    rows, scanned, tokens = summarize(lines)
+    print(f"{'stage':<22} {'count':>6} {'p50 ms':>10} {'p95 ms':>10}")
+    for stage, count, p50, p95 in rows:
+        print(f"{stage:<22} {count:>6} {p50:>10.1f} {p95:>10.1f}")
+    if scanned:
+        print(
+            f"\nathena bytes scanned/query: p50={_pct(scanned, 50):,.0f} "
+            f"p95={_pct(scanned, 95):,.0f} total={sum(scanned):,}"
+        )
+    if tokens:
+        print(
+            f"tokens/invocation: p50={_pct(tokens, 50):,.0f} "
+            f"p95={_pct(tokens, 95):,.0f} total={sum(tokens):,}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv)
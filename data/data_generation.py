@@ -1,8 +1,14 @@
 from faker import Faker
 import pandas as pd
+import argparse
+import json
+import os
 import random
-from datetime import datetime
+import shutil
+from datetime import datetime, timezone
 
+# Seeded, so the CSV and Parquet runs write the same rows
+Faker.seed(42)
 fake = Faker()
 random.seed(42)
 
@@ -12,119 +18,267 @@ NUM_PRODUCTS = 20
 NUM_CUSTOMERS = 100
 NUM_ORDERS = 300
 
-# ---------------- CLIENTS ----------------
-clients = []
-regions = ["North", "South", "East", "West", "APAC", "EMEA"]
-
-for cid in range(1, NUM_CLIENTS + 1):
-    clients.append({
-        "client_id": cid,
-        "client_name": f"{fake.company()} Motors",
-        "industry": "Automobile",
-        "region": random.choice(regions),
-        "country": fake.country(),
-        "onboarded_date": fake.date_between(start_date="-5y", end_date="-1y")
-    })
-
-clients_df = pd.DataFrame(clients)
-
-# ---------------- PRODUCTS (VEHICLES) ----------------
-products = []
-product_types = ["Sedan", "SUV", "Truck", "Hatchback"]
-fuel_types = ["Petrol", "Diesel", "Electric"]
-
-for pid in range(1, NUM_PRODUCTS + 1):
-    cost = round(random.uniform(500000, 1500000), 2)
-    price = round(cost * random.uniform(1.25, 1.8), 2)
-
-    products.append({
-        "product_id": pid,
-        "client_id": random.randint(1, NUM_CLIENTS),
-        "product_name": f"Model-{pid}",
-        "product_type": random.choice(product_types),
-        "fuel_type": random.choice(fuel_types),
-        "unit_price": price,
-        "manufacturing_cost": cost,
-        "launch_year": random.randint(2018, 2025),
-        "is_active": True
-    })
-
-products_df = pd.DataFrame(products)
-
-# ---------------- CUSTOMERS ----------------
-customers = []
-
-for cust_id in range(1, NUM_CUSTOMERS + 1):
-    customers.append({
-        "customer_id": cust_id,
-        "customer_name": fake.name(),
-        "customer_type": random.choice(["Individual", "Corporate", "Fleet"]),
-        "country": fake.country(),
-        "created_at": fake.date_time_between(start_date="-2y", end_date="now")
-    })
-
-customers_df = pd.DataFrame(customers)
-
-# ---------------- ORDERS ----------------
-orders = []
-order_items = []
-sales_transactions = []
-
-order_item_id = 1
-transaction_id = 1
-
-for order_id in range(1, NUM_ORDERS + 1):
-    customer_id = random.randint(1, NUM_CUSTOMERS)
-    order_date = fake.date_between(start_date="-1y", end_date="today")
-    order_status = random.choice(["Booked", "Delivered", "Cancelled"])
-
-    selected_products = random.sample(products, random.randint(1, 3))
-    total_order_value = 0
-
-    for prod in selected_products:
-        quantity = random.randint(1, 5)
-        line_total = round(quantity * prod["unit_price"], 2)
-        total_order_value += line_total
-
-        order_items.append({
-            "order_item_id": order_item_id,
+# Where the parquet/ folder is uploaded; used for the Glue table locations
+PARQUET_S3_PREFIX = "s3://s3-bucket-demo-athena-data/parquet"
+PARQUET_DATABASE = "demo_parquet"
+
+# ---------------- WRITE PARQUET FILES ----------------
+# Date-partitioned so date-filtered queries prune partitions, and columnar
+# so Athena reads only the columns a query touches.
+PARTITION_COLUMNS = {"orders": "order_date", "sales_transactions": "transaction_date"}
+ATHENA_TYPES = {
+    "int64": "bigint",
+    "double": "double",
+    "bool": "boolean",
+    "string": "string",
+    "large_string": "string",
+    "date32[day]": "date",
+}
+
+
+def athena_type(arrow_type) -> str:
+    if str(arrow_type).startswith("timestamp"):
+        return "timestamp"
+    return ATHENA_TYPES[str(arrow_type)]
+
+
+def glue_ddl(name, schema, partition, compression, s3_prefix) -> str:
+    """CREATE EXTERNAL TABLE for one parquet table, with partition projection."""
+    location = f"{s3_prefix.rstrip('/')}/{name}/"
+    columns = ",\n".join(
+        f"  {field.name} {athena_type(field.type)}"
+        for field in schema
+        if field.name != partition
+    )
+    properties = [f"'parquet.compression'='{compression.upper()}'"]
+    partitioned_by = ""
+    if partition:
+        partitioned_by = f"PARTITIONED BY ({partition} date)\n"
+        properties += [
+            "'projection.enabled'='true'",
+            f"'projection.{partition}.type'='date'",
+            f"'projection.{partition}.range'='2015-01-01,NOW'",
+            f"'projection.{partition}.format'='yyyy-MM-dd'",
+            f"'projection.{partition}.interval'='1'",
+            f"'projection.{partition}.interval.unit'='DAYS'",
+            f"'storage.location.template'='{location}{partition}=${{{partition}}}/'",
+        ]
+    return (
+        f"CREATE EXTERNAL TABLE IF NOT EXISTS {PARQUET_DATABASE}.{name} (\n{columns}\n)\n"
+        f"{partitioned_by}"
+        f"STORED AS PARQUET\n"
+        f"LOCATION '{location}'\n"
+        f"TBLPROPERTIES (\n  " + ",\n  ".join(properties) + "\n);\n"
+    )
+
+
+def write_parquet(name, df, compression, s3_prefix) -> str:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    partition = PARTITION_COLUMNS.get(name)
+    df = df.copy()
+    for column in df.columns:
+        if df[column].dtype == object and isinstance(df[column].iloc[0], datetime):
+            df[column] = pd.to_datetime(df[column])
+    if partition:
+        df[partition] = pd.to_datetime(df[partition]).dt.strftime("%Y-%m-%d")
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # delete_matching only replaces the partitions this run writes; dates
+    # from an earlier run would survive next to them
+    root = os.path.join("parquet", name)
+    shutil.rmtree(root, ignore_errors=True)
+    pq.write_to_dataset(
+        table,
+        root_path=root,
+        partition_cols=[partition] if partition else None,
+        compression=compression,
+        coerce_timestamps="ms",
+        allow_truncated_timestamps=True,
+        existing_data_behavior="delete_matching",
+    )
+    return glue_ddl(name, table.schema, partition, compression, s3_prefix)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate the demo dataset.")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--compression", choices=["snappy", "zstd"], default="zstd")
+    parser.add_argument("--s3-prefix", default=PARQUET_S3_PREFIX)
+    parser.add_argument("--scale-factor", type=float,
+                        help="use the vectorized, chunked generator at this scale (1 = 300 orders)")
+    parser.add_argument("--workers", type=int, help="processes for --scale-factor (default: all cores)")
+    parser.add_argument("--output-dir", default="scale", help="output directory for --scale-factor")
+    return parser.parse_args()
+
+
+def build_tables() -> dict:
+    """The six demo tables at the base size, as DataFrames."""
+    # ---------------- CLIENTS ----------------
+    clients = []
+    regions = ["North", "South", "East", "West", "APAC", "EMEA"]
+
+    for cid in range(1, NUM_CLIENTS + 1):
+        clients.append({
+            "client_id": cid,
+            "client_name": f"{fake.company()} Motors",
+            "industry": "Automobile",
+            "region": random.choice(regions),
+            "country": fake.country(),
+            "onboarded_date": fake.date_between(start_date="-5y", end_date="-1y")
+        })
+
+    clients_df = pd.DataFrame(clients)
+
+    # ---------------- PRODUCTS (VEHICLES) ----------------
+    products = []
+    product_types = ["Sedan", "SUV", "Truck", "Hatchback"]
+    fuel_types = ["Petrol", "Diesel", "Electric"]
+
+    for pid in range(1, NUM_PRODUCTS + 1):
+        cost = round(random.uniform(500000, 1500000), 2)
+        price = round(cost * random.uniform(1.25, 1.8), 2)
+
+        products.append({
+            "product_id": pid,
+            "client_id": random.randint(1, NUM_CLIENTS),
+            "product_name": f"Model-{pid}",
+            "product_type": random.choice(product_types),
+            "fuel_type": random.choice(fuel_types),
+            "unit_price": price,
+            "manufacturing_cost": cost,
+            "launch_year": random.randint(2018, 2025),
+            "is_active": True
+        })
+
+    products_df = pd.DataFrame(products)
+
+    # ---------------- CUSTOMERS ----------------
+    customers = []
+
+    for cust_id in range(1, NUM_CUSTOMERS + 1):
+        customers.append({
+            "customer_id": cust_id,
+            "customer_name": fake.name(),
+            "customer_type": random.choice(["Individual", "Corporate", "Fleet"]),
+            "country": fake.country(),
+            "created_at": fake.date_time_between(start_date="-2y", end_date="now")
+        })
+
+    customers_df = pd.DataFrame(customers)
+
+    # ---------------- ORDERS ----------------
+    orders = []
+    order_items = []
+    sales_transactions = []
+
+    order_item_id = 1
+    transaction_id = 1
+
+    for order_id in range(1, NUM_ORDERS + 1):
+        customer_id = random.randint(1, NUM_CUSTOMERS)
+        order_date = fake.date_between(start_date="-1y", end_date="today")
+        order_status = random.choice(["Booked", "Delivered", "Cancelled"])
+
+        selected_products = random.sample(products, random.randint(1, 3))
+        total_order_value = 0
+
+        for prod in selected_products:
+            quantity = random.randint(1, 5)
+            line_total = round(quantity * prod["unit_price"], 2)
+            total_order_value += line_total
+
+            order_items.append({
+                "order_item_id": order_item_id,
+                "order_id": order_id,
+                "product_id": prod["product_id"],
+                "quantity": quantity,
+                "unit_price": prod["unit_price"],
+                "line_total": line_total
+            })
+
+            order_item_id += 1
+
+        orders.append({
+            "order_id": order_id,
+            "customer_id": customer_id,
+            "order_date": order_date,
+            "order_status": order_status,
+            "total_order_value": round(total_order_value, 2)
+        })
+
+        sales_transactions.append({
+            "transaction_id": transaction_id,
             "order_id": order_id,
-            "product_id": prod["product_id"],
-            "quantity": quantity,
-            "unit_price": prod["unit_price"],
-            "line_total": line_total
+            "payment_mode": random.choice(["Cash", "EMI", "Lease", "Bank"]),
+            "amount_paid": round(total_order_value, 2),
+            "transaction_date": datetime.combine(order_date, datetime.min.time())
         })
 
-        order_item_id += 1
-
-    orders.append({
-        "order_id": order_id,
-        "customer_id": customer_id,
-        "order_date": order_date,
-        "order_status": order_status,
-        "total_order_value": round(total_order_value, 2)
-    })
-
-    sales_transactions.append({
-        "transaction_id": transaction_id,
-        "order_id": order_id,
-        "payment_mode": random.choice(["Cash", "EMI", "Lease", "Bank"]),
-        "amount_paid": round(total_order_value, 2),
-        "transaction_date": datetime.combine(order_date, datetime.min.time())
-    })
-
-    transaction_id += 1
-
-orders_df = pd.DataFrame(orders)
-order_items_df = pd.DataFrame(order_items)
-sales_transactions_df = pd.DataFrame(sales_transactions)
-
-# ---------------- WRITE CSV FILES ----------------
-clients_df.to_csv("clients.csv", index=False)
-products_df.to_csv("products.csv", index=False)
-customers_df.to_csv("customers.csv", index=False)
-orders_df.to_csv("orders.csv", index=False)
-order_items_df.to_csv("order_items.csv", index=False)
-sales_transactions_df.to_csv("sales_transactions.csv", index=False)
-
-print("CSV files generated successfully as per finalized schema.")
+        transaction_id += 1
+
+    orders_df = pd.DataFrame(orders)
+    order_items_df = pd.DataFrame(order_items)
+    sales_transactions_df = pd.DataFrame(sales_transactions)
+
+    return {
+        "clients": clients_df,
+        "products": products_df,
+        "customers": customers_df,
+        "orders": orders_df,
+        "order_items": order_items_df,
+        "sales_transactions": sales_transactions_df,
+    }
+
+
+def write_manifest(tables):
+    # Running agents watch this file and flush cached query results for every
+    # table whose generated_at changed (see core/query_cache.py).
+    generated_at = datetime.now(timezone.utc).isoformat()
+    with open("_manifest.json", "w") as f:
+        json.dump({table: generated_at for table in tables}, f, indent=2)
+
+
+def main():
+    args = parse_args()
+
+    # ---------------- LOAD-TEST SCALE ----------------
+    if args.scale_factor is not None:
+        from vectorized_generation import generate
+
+        counts = generate(
+            args.scale_factor,
+            fmt=args.format,
+            compression=args.compression,
+            output_dir=args.output_dir,
+            workers=args.workers,
+        )
+        # Only the parquet/ folder here is served to the agents; a scale run
+        # written anywhere else must not flush their query cache
+        if args.format == "parquet" and os.path.realpath(args.output_dir) == os.path.realpath("parquet"):
+            write_manifest(counts)
+        else:
+            print(f"Skipped _manifest.json: {args.output_dir}/ is not the served data directory.")
+        return
+
+    tables = build_tables()
+
+    if args.format == "parquet":
+        ddl = [f"CREATE DATABASE IF NOT EXISTS {PARQUET_DATABASE};\n"]
+        ddl += [write_parquet(name, df, args.compression, args.s3_prefix) for name, df in tables.items()]
+        with open(os.path.join("parquet", "glue_ddl.sql"), "w") as f:
+            f.write("\n".join(ddl))
+
+    # ---------------- WRITE CSV FILES ----------------
+    else:
+        for name, df in tables.items():
+            df.to_csv(f"{name}.csv", index=False)
+
+    # ---------------- MANIFEST ----------------
+    write_manifest(tables)
+    print(f"{args.format.upper()} files generated successfully as per finalized schema.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Vectorized, chunked generator for load-test sized datasets.
+
+Produces the same six tables and columns as data_generation.py with NumPy
+draws instead of per-row Faker calls. Orders are generated in fixed-size
+chunks, each in its own process with a seed derived from (seed, chunk), so
+output is deterministic regardless of worker count and memory stays flat.
+
+Scale factor 1 matches data_generation.py (300 orders); order_items grow
+with orders at ~2 per order, so 100M order_items is roughly
+--scale-factor 170000.
+"""
+import math
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+BASE_CLIENTS = 5
+BASE_PRODUCTS = 20
+BASE_CUSTOMERS = 100
+BASE_ORDERS = 300
+MAX_ITEMS_PER_ORDER = 3
+CHUNK_ORDERS = 1_000_000
+NAME_POOL_SIZE = 2000
+
+REGIONS = np.array(["North", "South", "East", "West", "APAC", "EMEA"])
+PRODUCT_TYPES = np.array(["Sedan", "SUV", "Truck", "Hatchback"])
+FUEL_TYPES = np.array(["Petrol", "Diesel", "Electric"])
+CUSTOMER_TYPES = np.array(["Individual", "Corporate", "Fleet"])
+ORDER_STATUSES = np.array(["Booked", "Delivered", "Cancelled"])
+PAYMENT_MODES = np.array(["Cash", "EMI", "Lease", "Bank"])
+
+PARTITION_COLUMNS = {"orders": "order_date", "sales_transactions": "transaction_date"}
+
+
+def table_sizes(scale_factor: float):
+    """Row counts per table. Dimension tables grow with sqrt(scale_factor)."""
+    dim = math.sqrt(scale_factor)
+    return {
+        "clients": max(BASE_CLIENTS, round(BASE_CLIENTS * dim)),
+        "products": max(BASE_PRODUCTS, round(BASE_PRODUCTS * dim)),
+        "customers": max(1, round(BASE_CUSTOMERS * scale_factor)),
+        "orders": max(1, round(BASE_ORDERS * scale_factor)),
+    }
+
+
+def _rng(seed: int, *stream):
+    return np.random.default_rng([seed, *stream])
+
+
+def _name_pools(seed: int):
+    """Small Faker-made pools that vectorized draws pick from."""
+    from faker import Faker
+
+    fake = Faker()
+    fake.seed_instance(seed)
+    return {
+        "company": np.array([f"{fake.company()} Motors" for _ in range(NAME_POOL_SIZE)]),
+        "person": np.array([fake.name() for _ in range(NAME_POOL_SIZE)]),
+        "country": np.array([fake.country() for _ in range(NAME_POOL_SIZE)]),
+    }
+
+
+def _today():
+    return np.datetime64("today", "D")
+
+
+def _write(table: pa.Table, name: str, part: int, fmt: str, compression: str, output_dir: str):
+    path = os.path.join(output_dir, name)
+    os.makedirs(path, exist_ok=True)
+    if fmt == "csv":
+        pa_csv.write_csv(table, os.path.join(path, f"part-{part:05d}.csv"))
+        return
+    partition = PARTITION_COLUMNS.get(name)
+    if partition:
+        # Partition directories are named by day (transaction_date is a
+        # midnight timestamp), matching data_generation.py
+        table = table.set_column(
+            table.schema.get_field_index(partition),
+            partition,
+            table[partition].cast(pa.date32()).cast(pa.string()),
+        )
+    pq.write_to_dataset(
+        table,
+        root_path=path,
+        partition_cols=[partition] if partition else None,
+        basename_template=f"part-{part:05d}-{{i}}.parquet",
+        compression=compression,
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def dimension_tables(sizes: dict, seed: int):
+    pools = _name_pools(seed)
+    rng = _rng(seed, 0)
+    today = _today()
+
+    n = sizes["clients"]
+    clients = pa.table({
+        "client_id": np.arange(1, n + 1),
+        "client_name": rng.choice(pools["company"], n),
+        "industry": np.full(n, "Automobile"),
+        "region": rng.choice(REGIONS, n),
+        "country": rng.choice(pools["country"], n),
+        "onboarded_date": today - rng.integers(365, 5 * 365, n).astype("timedelta64[D]"),
+    })
+
+    n = sizes["products"]
+    cost = np.round(rng.uniform(500000, 1500000, n), 2)
+    products = pa.table({
+        "product_id": np.arange(1, n + 1),
+        "client_id": rng.integers(1, sizes["clients"] + 1, n),
+        "product_name": np.char.add("Model-", np.arange(1, n + 1).astype(str)),
+        "product_type": rng.choice(PRODUCT_TYPES, n),
+        "fuel_type": rng.choice(FUEL_TYPES, n),
+        "unit_price": np.round(cost * rng.uniform(1.25, 1.8, n), 2),
+        "manufacturing_cost": cost,
+        "launch_year": rng.integers(2018, 2026, n),
+        "is_active": np.ones(n, dtype=bool),
+    })
+    return {"clients": clients, "products": products}, pools
+
+
+def customer_chunk(chunk: int, start: int, stop: int, seed: int, pools: dict):
+    rng = _rng(seed, 1, chunk)
+    n = stop - start
+    now = np.datetime64("now", "s")
+    return pa.table({
+        "customer_id": np.arange(start + 1, stop + 1),
+        "customer_name": rng.choice(pools["person"], n),
+        "customer_type": rng.choice(CUSTOMER_TYPES, n),
+        "country": rng.choice(pools["country"], n),
+        "created_at": now - rng.integers(0, 2 * 365 * 86400, n).astype("timedelta64[s]"),
+    })
+
+
+def order_chunk(chunk: int, start: int, stop: int, seed: int, sizes: dict, unit_prices):
+    """
+    Orders start+1..stop with their items and transactions.
+
+    order_item_id is (order_id - 1) * MAX_ITEMS_PER_ORDER + slot, so ids stay
+    unique and deterministic without coordinating between chunks.
+    """
+    rng = _rng(seed, 2, chunk)
+    n = stop - start
+    n_products = len(unit_prices)
+    order_ids = np.arange(start + 1, stop + 1)
+    order_dates = _today() - rng.integers(0, 365, n).astype("timedelta64[D]")
+
+    # 1-3 distinct products per order: a base product plus two distinct
+    # non-zero offsets from it.
+    items_per_order = rng.integers(1, MAX_ITEMS_PER_ORDER + 1, n)
+    base = rng.integers(0, n_products, n)
+    offset_a = rng.integers(1, n_products, n)
+    offset_b = rng.integers(1, max(n_products - 1, 2), n)
+    offset_b += offset_b >= offset_a
+    slots = np.stack([base, (base + offset_a) % n_products, (base + offset_b) % n_products], axis=1)
+
+    mask = np.arange(MAX_ITEMS_PER_ORDER) < items_per_order[:, None]
+    item_order = np.repeat(order_ids, items_per_order)
+    item_slot = np.nonzero(mask)[1]
+    product_idx = slots[mask]
+    quantity = rng.integers(1, 6, len(product_idx))
+    price = unit_prices[product_idx]
+    line_total = np.round(quantity * price, 2)
+
+    totals = np.round(np.bincount(item_order - start - 1, weights=line_total, minlength=n), 2)
+
+    order_items = pa.table({
+        "order_item_id": (item_order - 1) * MAX_ITEMS_PER_ORDER + item_slot + 1,
+        "order_id": item_order,
+        "product_id": product_idx + 1,
+        "quantity": quantity,
+        "unit_price": price,
+        "line_total": line_total,
+    })
+    orders = pa.table({
+        "order_id": order_ids,
+        "customer_id": rng.integers(1, sizes["customers"] + 1, n),
+        "order_date": order_dates,
+        "order_status": rng.choice(ORDER_STATUSES, n),
+        "total_order_value": totals,
+    })
+    sales_transactions = pa.table({
+        "transaction_id": order_ids,
+        "order_id": order_ids,
+        "payment_mode": rng.choice(PAYMENT_MODES, n),
+        "amount_paid": totals,
+        # A timestamp, as in data_generation.py, so both write the same schema
+        "transaction_date": order_dates.astype("datetime64[ms]"),
+    })
+    return {"orders": orders, "order_items": order_items, "sales_transactions": sales_transactions}
+
+
+def _write_customers(args):
+    chunk, start, stop, seed, pools, fmt, compression, output_dir = args
+    _write(customer_chunk(chunk, start, stop, seed, pools), "customers", chunk, fmt, compression, output_dir)
+    return stop - start
+
+
+def _write_orders(args):
+    chunk, start, stop, seed, sizes, unit_prices, fmt, compression, output_dir = args
+    tables = order_chunk(chunk, start, stop, seed, sizes, unit_prices)
+    for name, table in tables.items():
+        _write(table, name, chunk, fmt, compression, output_dir)
+    return tables["orders"].num_rows, tables["order_items"].num_rows
+
+
+def _chunks(total: int, size: int):
+    return [(i, start, min(start + size, total)) for i, start in enumerate(range(0, total, size))]
+
+
+def generate(
+    scale_factor: float,
+    fmt: str = "parquet",
+    compression: str = "zstd",
+    output_dir: str = "scale",
+    workers: int = None,
+    chunk_orders: int = CHUNK_ORDERS,
+    seed: int = 42,
+):
+    """Write every table under output_dir/<table>/ and return the row counts."""
+    started = time.perf_counter()
+    # Chunks write side by side into the same partition directories, so no
+    # single write may delete "matching" files; clear the tables up front
+    # instead, or a smaller rerun would leave the old run's parts behind.
+    for name in ("clients", "products", "customers", "orders", "order_items", "sales_transactions"):
+        shutil.rmtree(os.path.join(output_dir, name), ignore_errors=True)
+    sizes = table_sizes(scale_factor)
+    dims, pools = dimension_tables(sizes, seed)
+    for name, table in dims.items():
+        _write(table, name, 0, fmt, compression, output_dir)
+    unit_prices = dims["products"]["unit_price"].to_numpy()
+
+    customer_jobs = [
+        (i, start, stop, seed, pools, fmt, compression, output_dir)
+        for i, start, stop in _chunks(sizes["customers"], chunk_orders)
+    ]
+    order_jobs = [
+        (i, start, stop, seed, sizes, unit_prices, fmt, compression, output_dir)
+        for i, start, stop in _chunks(sizes["orders"], chunk_orders)
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        customers = sum(pool.map(_write_customers, customer_jobs))
+        written = list(pool.map(_write_orders, order_jobs))
+
+    counts = {
+        "clients": sizes["clients"],
+        "products": sizes["products"],
+        "customers": customers,
+        "orders": sizes["orders"],
+        "order_items": sum(items for _, items in written),
+        "sales_transactions": sizes["orders"],
+    }
+    print(f"Generated {counts} in {time.perf_counter() - started:.1f}s under {output_dir}/")
+    return counts
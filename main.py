@@ -1,53 +1,326 @@
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
-from strands.multiagent import Swarm
-import boto3
-from datetime import datetime, timezone
-import uuid
-
-from agents.master_agent import master_agent
-from agents.clients_agent import clients_agent
-from agents.customers_agent import customers_agent
-from agents.orders_products_agent import orders_products_agent
-from agents.sales_agent import sales_agent
-from core.result_extractor import extract_final_answer
-
-# DynamoDB setup
-dynamodb = boto3.resource('dynamodb', region_name='ap-south-1')
-table = dynamodb.Table('demo_agent_history')
-
-swarm = Swarm(
-    [
-        master_agent,
-        clients_agent,
-        customers_agent,
-        orders_products_agent,
-        sales_agent
-    ],
-    max_turns=10,  # Limit conversation turns
-)
-
-app = BedrockAgentCoreApp()
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from core.agent_pool import AgentPool, AgentPoolFull, AgentSet
+from core.answer_cache import answer_cache, collect_tables
+from core.aws import client_config, get_resource, start_warm_up
+from core.result_extractor import extract_agent_answer, extract_final_answer
+from core.materialized_views import materialized_views
+from core.history import HISTORY_TABLE, HistoryWriter, history_record, new_request_id
+from core.fanout import agent_label, complete, fan_out_async, merge_answers
+from core.progress import progress_to
+from core.result_shaping import collect_results, result_payload, result_payloads
+from core.router import route_question
+from core.schema_catalog import schema_catalog
+from core.tracing import record, record_swarm, record_usage, span, start_trace
+
+# Strands (with its MCP dependencies), the agents and the query tools take
+# well over a second to import and build, so nothing here does that at import
+# time: warm_start() does it in the background once the server is up, and a
+# request that arrives first just does it itself.
+#
+#     python -X importtime -c "import main" 2>&1 | sort -t'|' -k2 -n | tail
+#     python -m benchmarks.cold_start
+
+BUSY_MESSAGE = "The assistant is busy with other requests. Please try again in a moment."
+
+_bedrock_model = None
+_history = None
+_lazy_lock = threading.Lock()
+
+
+def get_history():
+    """The DynamoDB history writer, built on first use."""
+    global _history
+    with _lazy_lock:
+        if _history is None:
+            _history = HistoryWriter(get_resource('dynamodb').Table(HISTORY_TABLE))
+        return _history
+
+
+def bedrock_model():
+    """One Bedrock model (and connection pool) shared by every agent."""
+    global _bedrock_model
+    with _lazy_lock:
+        if _bedrock_model is None:
+            from strands.models.bedrock import BedrockModel
+
+            _bedrock_model = BedrockModel(boto_client_config=client_config(read_timeout=120))
+        return _bedrock_model
+
+
+def make_agents(model=None):
+    """A complete, independent set of agents for one request at a time."""
+    from strands.multiagent import Swarm
+
+    from agents.clients_agent import make_clients_agent
+    from agents.customers_agent import make_customers_agent
+    from agents.master_agent import make_master_agent
+    from agents.orders_products_agent import make_orders_products_agent
+    from agents.sales_agent import make_sales_agent
+
+    model = model or bedrock_model()
+    specialists = {
+        agent.name: agent
+        for agent in [
+            make_clients_agent(model),
+            make_customers_agent(model),
+            make_orders_products_agent(model),
+            make_sales_agent(model),
+        ]
+    }
+    master = make_master_agent(model)
+    swarm = Swarm(
+        [master, *specialists.values()],
+        max_iterations=10,  # Limit conversation turns
+    )
+    return AgentSet(master=master, specialists=specialists, swarm=swarm)
+
+
+# Agents hold conversation state, so concurrent requests lease separate sets
+agent_pool = AgentPool(make_agents)
+
+
+def warm_start():
+    """
+    Everything the first request would otherwise wait for: AWS credentials
+    and connections (in their own thread), the query tools and schema, and
+    one agent set.
+    """
+    start = time.perf_counter()
+    start_warm_up()
+    get_history()
 
-@app.entrypoint
-def invoke(payload: dict):
-    query = payload.get("prompt", "")
-    result = swarm(query)
-    final_answer = extract_final_answer(result)
-    
-    # Store question and answer in DynamoDB
     try:
-        table.put_item(
-            Item={
-                'query_id': str(uuid.uuid4()),
-                'timestamp': datetime.now(timezone.utc).isoformat(),
-                'question': query,
-                'answer': str(final_answer)
-            }
-        )
+        agent_pool.prefill(1)
     except Exception as e:
-        print(f"Error storing to DynamoDB: {str(e)}")
-    
+        # The first request builds its own agents and reports the error
+        print(f"[STARTUP] agent prefill failed: {str(e)}")
+
+    from tools.athena_tool import QUERY_BACKEND, backend
+
+    # The first encode loads most of pyarrow; pay for it here, not in a request
+    result_payload("SELECT 1", [{"warm": "1"}])
+
+    # Agents read the schema when built; keep it fresh in the background
+    schema_catalog.start_refresh()
+
+    # The embedded engine keeps its summary tables in memory, so build them here.
+    # On Athena they are maintained by `python -m core.materialized_views refresh`;
+    # queries are only rewritten onto them while they are verified current.
+    if QUERY_BACKEND == "duckdb":
+        materialized_views.start_refresh(backend)
+    else:
+        materialized_views.start_verify(getattr(backend, "remote", backend))
+    record("warm_start", (time.perf_counter() - start) * 1000)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Start warming once the server is starting up, without holding it back
+    threading.Thread(target=warm_start, daemon=True).start()
+    yield
+
+
+app = BedrockAgentCoreApp(lifespan=lifespan)
+
+def save_history(payload: dict, query: str, final_answer):
+    """Queue the question and answer for DynamoDB under the caller's request ID"""
+    get_history().submit(history_record(
+        payload["request_id"],
+        query,
+        final_answer,
+        user_email=payload.get("user_email"),
+    ))
+
+
+def _event_text(event: dict):
+    """Text delta from an Agent event, or from an Agent event wrapped by the Swarm."""
+    if "data" in event:
+        return event["data"]
+    inner = event.get("event")
+    if isinstance(inner, dict) and isinstance(inner.get("data"), str):
+        return inner["data"]
+    return None
+
+
+async def stream_answer(payload: dict, query: str):
+    """
+    Yield progress, partial text and the final answer as they happen.
+
+    Events are dicts with a "type" of "progress", "text" or "final". The
+    final event's "data" holds the query results behind the answer as
+    core.result_shaping payloads.
+
+    The work runs in its own task, traced like a non-streaming invocation
+    (an "invoke" span around the same per-route spans as compute_answer),
+    and this generator only relays its events.
+    """
+    queue = asyncio.Queue()
+    loop = asyncio.get_running_loop()
+    done = object()
+
+    def progress(message):
+        return {"type": "progress", "message": message}
+
+    def on_progress(message):
+        # Tools may report from worker threads
+        loop.call_soon_threadsafe(queue.put_nowait, progress(message))
+
+    async def stream_from(source, **attrs):
+        outcome = {"node": None}
+        with span(attrs.pop("stage"), **attrs):
+            async for event in source.stream_async(query):
+                text = _event_text(event)
+                # Swarm nodes take turns; label each one's text, so the master
+                # agent's handoff is not read as part of the answer
+                node = event.get("node_id") if event.get("type") == "multiagent_node_stream" else None
+                if text and node and node != outcome["node"]:
+                    header = f"**{agent_label(node)}**\n"
+                    text = (header if outcome["node"] is None else f"\n\n{header}") + text
+                    outcome["node"] = node
+                if text:
+                    await queue.put({"type": "text", "data": text})
+                if "result" in event:
+                    outcome["result"] = event["result"]
+        return outcome.get("result")
+
+    async def answer_with_agents(agents):
+        """(answer, complete), streaming text from whichever agents answer."""
+        with span("route"):
+            route = route_question(query)
+
+        if route.confident:
+            queue.put_nowait(progress(f"Routing to {route.agent}"))
+            result = await stream_from(agents.specialists[route.agent], stage="specialist", agent=route.agent)
+            record_usage(result, agent=route.agent)
+            with span("extract"):
+                return extract_agent_answer(result), True
+
+        if route.parts:
+            queue.put_nowait(progress(f"Asking {', '.join(a for a, _ in route.parts)}"))
+            with span("fanout", agents=",".join(a for a, _ in route.parts)) as stats:
+                branches = await fan_out_async([(agents.specialists[a], q) for a, q in route.parts])
+                stats["failed"] = sum(1 for b in branches if not b.answer)
+            return merge_answers(branches), complete(branches)
+
+        queue.put_nowait(progress("Routing to swarm"))
+        result = await stream_from(agents.swarm, stage="swarm")
+        record_usage(result, agent="swarm")
+        record_swarm(result)
+        with span("extract"):
+            return extract_final_answer(result), True
+
+    async def produce():
+        try:
+            with start_trace(payload["request_id"]), span("invoke"):
+                cached = answer_cache.get(query)
+                if cached is not None:
+                    final_answer, score, data = cached
+                    record("answer_cache_hit", 0, similarity=score)
+                    queue.put_nowait(progress("Answered from cache"))
+                else:
+                    try:
+                        with (
+                            progress_to(on_progress),
+                            collect_tables() as tables,
+                            collect_results() as results,
+                        ):
+                            async with agent_pool.lease() as agents:
+                                final_answer, cacheable = await answer_with_agents(agents)
+                    except AgentPoolFull as e:
+                        print(f"[POOL] rejected {payload['request_id']}: {str(e)}")
+                        queue.put_nowait({"type": "final", "answer": BUSY_MESSAGE})
+                        return
+                    with span("shape_results"):
+                        data = await asyncio.to_thread(result_payloads, results)
+                    # A partial answer would keep being served after the failed part recovers
+                    if cacheable:
+                        answer_cache.put(query, final_answer, tables, data)
+
+                with span("history_submit"):
+                    save_history(payload, query, final_answer)
+                queue.put_nowait({"type": "final", "answer": final_answer, "data": data})
+        finally:
+            await queue.put(done)
+
+    task = asyncio.create_task(produce())
+    while (item := await queue.get()) is not done:
+        yield item
+    await task
+
+
+async def compute_answer(agents: AgentSet, query: str):
+    """
+    Answer `query` with the leased agents. Returns (answer, complete), where
+    complete is False when some independent part of the question failed.
+    """
+    with span("route"):
+        route = route_question(query)
+
+    # Unambiguous questions skip the master agent's routing turn
+    if route.confident:
+        with span("specialist", agent=route.agent):
+            result = await agents.specialists[route.agent].invoke_async(query)
+        record_usage(result, agent=route.agent)
+        with span("extract"):
+            final_answer = extract_agent_answer(result)
+    elif route.parts:
+        # Independent questions for different specialists run in parallel;
+        # anything that needs a join across their tables goes to the Swarm
+        with span("fanout", agents=",".join(a for a, _ in route.parts)) as stats:
+            branches = await fan_out_async([(agents.specialists[a], q) for a, q in route.parts])
+            final_answer = merge_answers(branches)
+            stats["failed"] = sum(1 for b in branches if not b.answer)
+        return final_answer, complete(branches)
+    else:
+        with span("swarm"):
+            result = await agents.swarm.invoke_async(query)
+        record_usage(result, agent="swarm")
+        record_swarm(result)
+        with span("extract"):
+            final_answer = extract_final_answer(result)
+    return final_answer, True
+
+
+async def answer(payload: dict, query: str):
+    # Rephrasings of a recently answered question skip the agents entirely
+    cached = answer_cache.get(query)
+    if cached is not None:
+        final_answer, score, _ = cached
+        record("answer_cache_hit", 0, similarity=score)
+    else:
+        try:
+            async with agent_pool.lease() as agents:
+                with collect_tables() as tables, collect_results() as results:
+                    final_answer, cacheable = await compute_answer(agents, query)
+        except AgentPoolFull as e:
+            print(f"[POOL] rejected {payload['request_id']}: {str(e)}")
+            return BUSY_MESSAGE
+        # Kept with the answer so a streamed cache hit can still send the data
+        with span("shape_results"):
+            data = await asyncio.to_thread(result_payloads, results)
+        # A partial answer would keep being served after the failed part recovers
+        if cacheable:
+            answer_cache.put(query, final_answer, tables, data)
+
+    with span("history_submit"):
+        save_history(payload, query, final_answer)
     return final_answer
 
+
+@app.entrypoint
+async def invoke(payload: dict):
+    query = payload.get("prompt", "")
+    request_id = payload.setdefault("request_id", new_request_id())
+    if payload.get("stream"):
+        return stream_answer(payload, query)
+
+    with start_trace(request_id), span("invoke"):
+        return await answer(payload, query)
+
 if __name__ == "__main__":
     app.run()
@@ -1,51 +1,60 @@
 import streamlit as st
 import boto3
 import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import json
-import subprocess
-import os
-import re
 import uuid
 import warnings
 import warnings
 from requests.exceptions import RequestsDependencyWarning
 
+from core.agentcore_client import AgentCoreClient, AgentCoreError
+from core.aws import get_resource, get_session, set_session
+from core.history import HISTORY_TABLE, HistoryPages, history_record
+from core.jobs import JobStore
+from core.result_shaping import read_payload, to_dataframe
+from core.tracing import record
+
+# Streamlit runs this whole script on every interaction; time each run
+rerun_start = time.perf_counter()
+
 warnings.filterwarnings("ignore", category=RequestsDependencyWarning)
 # Load AWS credentials from Streamlit secrets or environment
+@st.cache_resource
 def get_boto3_session():
-    """Create boto3 session with credentials from secrets or environment"""
+    """Shared boto3 session, using credentials from secrets when present; resolved once per process"""
+    # Try to get credentials from Streamlit secrets (a missing secrets.toml raises)
     try:
-        # Try to get credentials from Streamlit secrets
-        if 'AWS_ACCESS_KEY_ID' in st.secrets:
-            session = boto3.Session(
+        from_secrets = 'AWS_ACCESS_KEY_ID' in st.secrets
+    except FileNotFoundError:
+        from_secrets = False
+    if from_secrets:
+        credentials = get_session().get_credentials()
+        if credentials is None or credentials.access_key != st.secrets['AWS_ACCESS_KEY_ID']:
+            set_session(boto3.Session(
                 aws_access_key_id=st.secrets['AWS_ACCESS_KEY_ID'],
                 aws_secret_access_key=st.secrets['AWS_SECRET_ACCESS_KEY'],
                 region_name=st.secrets.get('AWS_DEFAULT_REGION', 'ap-south-1')
-            )
-        else:
-            # Fall back to environment variables or IAM role
-            session = boto3.Session(region_name='ap-south-1')
-        return session
-    except Exception as e:
-        st.error(f"AWS Configuration Error: {str(e)}")
-        return None
+            ))
+    # Otherwise environment variables or IAM role
+    return get_session()
 
-# DynamoDB setup
+@st.cache_resource
+def get_tables():
+    """DynamoDB user and history tables, built once per process rather than on every rerun"""
+    get_boto3_session()
+    dynamodb = get_resource('dynamodb')
+    return dynamodb.Table('user_login_details'), dynamodb.Table(HISTORY_TABLE)
+
+# DynamoDB setup (cached: a rerun only looks the tables up)
 try:
-    session = get_boto3_session()
-    if session:
-        dynamodb = session.resource('dynamodb')
-        users_table = dynamodb.Table('user_login_details')
-        queries_table = dynamodb.Table('demo_agent_history')
-    else:
-        st.error("Failed to initialize AWS session")
-        st.stop()
+    users_table, queries_table = get_tables()
 except Exception as e:
-    st.error(f"DynamoDB Error: {str(e)}")
+    st.error(f"AWS Configuration Error: {str(e)}")
     st.stop()
 
-# AgentCore configuration is handled by local CLI and .bedrock_agentcore.yaml
+# AgentCore runtime is read from .bedrock_agentcore.yaml (or AGENTCORE_LOCAL_URL)
 
 def hash_password(password: str) -> str:
     """Hash password using SHA256"""
@@ -95,57 +104,180 @@ def authenticate_user(email: str, password: str) -> dict:
         st.error(f"Error authenticating user: {str(e)}")
         return None
 
-def invoke_agentcore(query: str) -> str:
+@st.cache_resource
+def get_agentcore_client() -> AgentCoreClient:
+    """Pooled AgentCore client shared across reruns and sessions"""
+    return AgentCoreClient(session=get_boto3_session())
+
+@st.cache_resource
+def get_prefetch_executor() -> ThreadPoolExecutor:
+    """Threads that load data a later rerun will show, so no rerun waits on DynamoDB"""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch")
+
+def start_history(email: str):
+    """Start loading the user's history in the background, once per session"""
+    if 'history' not in st.session_state:
+        st.session_state.history = HistoryPages(queries_table, email, get_prefetch_executor())
+
+def log_in(user: dict):
+    """Keep the authenticated user in session state; reruns never fetch it again"""
+    st.session_state.authenticated = True
+    st.session_state.user = user
+    st.session_state.session_id = f"streamlit-{user['email']}-{uuid.uuid4()}"
+    start_history(user['email'])
+
+def log_out():
+    st.session_state.authenticated = False
+    st.session_state.user = None
+    for key in ('session_id', 'history', 'history_error', 'selected_query'):
+        st.session_state.pop(key, None)
+
+def select_history(query_id: str):
+    st.session_state.selected_query = query_id
+
+def close_history():
+    st.session_state.pop('selected_query', None)
+
+def load_older_history():
+    """Show the next page, usually already prefetched"""
     try:
-        # Primary attempt with extended timeout
-        result = subprocess.run(
-            ["agentcore", "invoke", json.dumps({"prompt": query})],
-            capture_output=True,
-            text=True,
-            timeout=300,
-            cwd=os.path.dirname(__file__)
+        st.session_state.history.advance()
+        st.session_state.pop('history_error', None)
+    except Exception as e:
+        st.session_state.history_error = str(e)
+
+@st.fragment(run_every=1)
+def history_loading():
+    """Poll until the first history page arrives, then redraw the page with it"""
+    if st.session_state.history.ready():
+        st.rerun()
+    st.caption("Loading history…")
+
+def show_history_panel():
+    """The user's past questions, a page at a time; clicking one shows its stored answer"""
+    history = st.session_state.get('history')
+    if history is None:
+        return
+    st.caption("History")
+    if not history.items and history.has_more:
+        if not history.ready():
+            history_loading()
+            return
+        load_older_history()
+    if 'history_error' in st.session_state:
+        st.caption(f"History unavailable: {st.session_state.history_error}")
+    if history.unavailable:
+        st.caption("Past questions appear here once history indexing is set up")
+    elif not history.items and not history.has_more:
+        st.caption("No questions yet")
+    for item in history.items:
+        question = item.get('question', '')
+        st.button(
+            question if len(question) <= 60 else question[:57] + "…",
+            key=f"history_{item['query_id']}",
+            help=question,
+            on_click=select_history,
+            args=(item['query_id'],),
+            use_container_width=True,
         )
-        output = (result.stdout + result.stderr).strip()
+    if history.has_more:
+        st.button("Older questions", key="history_older", on_click=load_older_history)
 
-        if not output:
-            return "No response from agent"
+def show_selected_history():
+    """The stored answer to the past question picked in the sidebar, straight from session state"""
+    history = st.session_state.get('history')
+    item = history.get(st.session_state.get('selected_query')) if history else None
+    if item is None:
+        return
+    with st.container(border=True):
+        st.caption(f"🕘 Asked {item.get('timestamp', '')[:19].replace('T', ' ')}")
+        st.markdown(f"**{item.get('question', '')}**")
+        st.markdown(item.get('answer', ''))
+        st.button("Close", key="history_close", on_click=close_history)
 
-        # Extract only the Response content
-        if 'Response:' in output:
-            # Split by 'Response:' and take everything after it
-            response_part = output.split('Response:', 1)[1].strip()
-            return response_part
-        
-        return output
-    except FileNotFoundError:
-        return "AgentCore not installed"
-    except subprocess.TimeoutExpired:
-        # Single retry with a longer timeout
-        try:
-            retry = subprocess.run(
-                ["agentcore", "invoke", json.dumps({"prompt": query})],
-                capture_output=True,
-                text=True,
-                timeout=600,
-                cwd=os.path.dirname(__file__)
-            )
-            output = (retry.stdout + retry.stderr).strip()
-            if not output:
-                return "No response from agent"
-
-            # Extract only the Response content
-            if 'Response:' in output:
-                # Split by 'Response:' and take everything after it
-                response_part = output.split('Response:', 1)[1].strip()
-                return response_part
-            
-            return output
-        except subprocess.TimeoutExpired:
-            return "Agent timeout. Please verify the AgentCore container is running and responsive."
-        except Exception as e:
-            return f"Error after retry: {str(e)}"
-    except Exception as e:
-        return f"Error: {str(e)}"
+def run_question(job, client: AgentCoreClient, session_id: str = None):
+    """Job worker: stream the agent's answer into the job; the runtime stores it in history"""
+    payload = {'prompt': job.question, 'request_id': job.id, 'user_email': job.user_email}
+    answer, data = None, []
+    for event in client.stream(payload, session_id=session_id):
+        kind = event.get('type') if isinstance(event, dict) else None
+        if kind == 'progress':
+            job.progress = event['message']
+        elif kind == 'text':
+            job.text += event['data']
+        elif kind == 'final':
+            answer = str(event.get('answer') or "No response from agent")
+            data = event.get('data') or []
+        elif isinstance(event, dict) and 'error' in event:
+            raise AgentCoreError(event['error'])
+    answer = answer or job.text or "No response from agent"
+    return answer, data
+
+@st.cache_resource
+def get_job_store() -> JobStore:
+    """Questions running in the background, shared across reruns and sessions so a reload finds them"""
+    return JobStore(run_question)
+
+def submit_question():
+    """Queue the typed question as a job and clear the box for the next one"""
+    question = st.session_state.get('question_input', '').strip()
+    if not question:
+        st.session_state.submit_warning = "⚠️ Please enter a question before sending"
+        return
+    try:
+        # Cached resources are looked up here; the worker thread has no script context
+        get_job_store().submit(
+            st.session_state.user['email'],
+            question,
+            client=get_agentcore_client(),
+            session_id=st.session_state.get('session_id'),
+        )
+    except Exception as e:  # JobLimitError, or no agent runtime configured
+        st.session_state.submit_warning = f"⚠️ {str(e)}"
+        return
+    st.session_state.question_input = ""
+
+@st.fragment(run_every=1)
+def show_running_jobs(jobs: list):
+    """Progress of unfinished jobs, polled every second; redraws the page when one finishes"""
+    if any(not job.active for job in jobs):
+        st.rerun()
+    for job in jobs:
+        with st.container(border=True):
+            st.markdown(f"**{job.question}**")
+            if job.status == 'queued':
+                st.caption("⏳ Queued")
+            else:
+                st.caption(f"🔄 {job.progress or 'Processing your query...'}")
+            if job.text:
+                st.markdown(job.text)
+
+def show_finished_job(job):
+    with st.container(border=True):
+        st.markdown(f"**{job.question}**")
+        if job.error:
+            st.error(f"Error: {job.error}")
+        else:
+            st.markdown(job.answer)
+            render_results(job.data)
+        st.button("Dismiss", key=f"dismiss_{job.id}", on_click=get_job_store().dismiss, args=(job.id,))
+
+def render_results(payloads: list):
+    """Show each query result sent with the answer as a table, and a chart when it has one label column"""
+    for payload in payloads:
+        table = read_payload(payload)
+        frame = to_dataframe(table)
+        with st.expander(f"📊 {payload['rows']} rows · {payload['sql']}", expanded=len(payloads) == 1):
+            st.dataframe(frame, use_container_width=True, hide_index=True)
+            if (table.schema.metadata or {}).get(b'truncated'):
+                st.caption(table.schema.metadata[b'truncated'].decode())
+            numeric = list(frame.select_dtypes('number').columns)
+            labels = [c for c in frame.columns if c not in numeric]
+            if len(frame) > 1 and numeric and len(labels) == 1:
+                if str(frame[labels[0]].dtype).startswith('datetime'):
+                    st.line_chart(frame, x=labels[0], y=numeric)
+                else:
+                    st.bar_chart(frame, x=labels[0], y=numeric)
 
 # Page configuration
 st.set_page_config(page_title="Agent Query System", layout="wide", initial_sidebar_state="expanded")
@@ -158,10 +290,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize session state for processing
-if 'is_processing' not in st.session_state:
-    st.session_state.is_processing = False
-
 # Initialize session state
 if 'authenticated' not in st.session_state:
     st.session_state.authenticated = False
@@ -179,9 +307,7 @@ with st.sidebar:
             if st.button("Login", key="login_btn"):
                 user = authenticate_user(login_email, login_password)
                 if user:
-                    st.session_state.authenticated = True
-                    st.session_state.user = user
-                    st.session_state.session_id = f"streamlit-{user['email']}-{uuid.uuid4()}"
+                    log_in(user)
                     st.rerun()
                 else:
                     st.error("Invalid email or password")
@@ -206,57 +332,42 @@ with st.sidebar:
         st.subheader(st.session_state.user['name'])
         st.text(st.session_state.user['email'])
         if st.button("Logout", key="logout_btn"):
-            st.session_state.authenticated = False
-            st.session_state.user = None
+            log_out()
             st.rerun()
+        start_history(st.session_state.user['email'])
+        # Answers finished in the background join the panel before the runtime's write reaches the index
+        for job in reversed(get_job_store().for_user(st.session_state.user['email'])):
+            if job.status == 'done':
+                st.session_state.history.add(history_record(job.id, job.question, job.answer, user_email=job.user_email))
+        show_history_panel()
 
 # Main content
 if st.session_state.authenticated:
     st.title("🤖 Agent Query System")
     if st.button("🚪 Logout", key="logout_btn_top"):
-        st.session_state.authenticated = False
-        st.session_state.user = None
+        log_out()
         st.rerun()
     
     st.divider()
     
     # Welcome message
     st.info(f"Welcome, {st.session_state.user['name']}! Ask me anything about your data.")
+    show_selected_history()
     
     st.subheader("💬 Ask a Question")
-    user_query = st.text_area("Enter your question:", height=120, placeholder="e.g., How many customers are there?", disabled=st.session_state.is_processing)
-    
-    send_btn = st.button("🚀 Send Query", key="send_query_btn", disabled=st.session_state.is_processing)
-    
-    if send_btn:
-        if user_query.strip():
-            st.session_state.is_processing = True
-    
-    if st.session_state.is_processing:
-        if user_query.strip():
-            with st.spinner("🔄 Processing your query..."):
-                response = invoke_agentcore(user_query)
-                st.session_state.is_processing = False
-                
-                st.success("✅ Response received!")
-                st.write(response)
-                
-                # Store in history
-                try:
-                    queries_table.put_item(
-                        Item={
-                            'query_id': f"{st.session_state.user['email']}-{datetime.utcnow().timestamp()}",
-                            'user_email': st.session_state.user['email'],
-                            'question': user_query,
-                            'answer': response,
-                            'timestamp': datetime.utcnow().isoformat()
-                        }
-                    )
-                except Exception as e:
-                    st.warning(f"⚠️ Could not save to history: {str(e)}")
-        else:
-            st.warning("⚠️ Please enter a question before sending")
-            st.session_state.is_processing = False
+    st.text_area("Enter your question:", height=120, placeholder="e.g., How many customers are there?", key="question_input")
+    st.button("🚀 Send Query", key="send_query_btn", on_click=submit_question)
+    if 'submit_warning' in st.session_state:
+        st.warning(st.session_state.pop('submit_warning'))
+
+    # Questions run as background jobs; this run only draws their state
+    jobs = get_job_store().for_user(st.session_state.user['email'])
+    running = [job for job in jobs if job.active]
+    if running:
+        show_running_jobs(running)
+    for job in jobs:
+        if not job.active:
+            show_finished_job(job)
 
 else:
     # Login/Signup page styling
@@ -286,3 +397,6 @@ else:
             </p>
         </div>
         """, unsafe_allow_html=True)
+
+record("streamlit_rerun", (time.perf_counter() - rerun_start) * 1000,
+       authenticated=st.session_state.authenticated)
@@ -0,0 +1,36 @@
+from core.answer_cache import AnswerCache
+
+DESCENDING = (
+    "Show me every transaction with its order id, payment mode, amount paid and "
+    "transaction date, sorted from highest to lowest in the sales transactions table"
+)
+ASCENDING = DESCENDING.replace("highest to lowest", "lowest to highest")
+
+
+def make_cache():
+    cache = AnswerCache()
+    cache.put(DESCENDING, "newest answer, descending", ["sales_transactions"])
+    return cache
+
+
+def test_reversed_sort_order_is_a_miss():
+    assert make_cache().get(ASCENDING) is None
+
+
+def test_rephrasing_with_the_same_order_is_a_hit():
+    rephrased = DESCENDING.replace("Show me", "List").replace("highest", "largest")
+    hit = make_cache().get(rephrased)
+    assert hit is not None
+    assert hit[0] == "newest answer, descending"
+
+
+def test_negation_is_a_miss():
+    cache = AnswerCache()
+    cache.put("How many orders were cancelled last month in the orders table?", "12", ["orders"])
+    assert cache.get("How many orders were not cancelled last month in the orders table?") is None
+
+
+def test_numbers_must_match():
+    cache = AnswerCache()
+    cache.put("Show the top 5 customers by number of orders", "five", ["orders"])
+    assert cache.get("Show the top 10 customers by number of orders") is None
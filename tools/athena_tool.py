@@ -1,42 +1,241 @@
-import time
-import boto3
-from strands import tool
+import asyncio
+import os
+from strands import ToolContext, tool
+
+from core.answer_cache import note_tables
+from core.aws import get_client
+from core.athena_polling import QUERY_TIMEOUT, wait_for_query, wait_for_query_async
+from core.athena_results import (
+    MAX_RESULT_BYTES,
+    MAX_RESULT_ROWS,
+    ResultRows,
+    column_types,
+    iter_api_rows,
+    iter_s3_rows,
+)
+from core.context_budget import TOOL_RESULT_PREVIEW_ROWS, result_store, summarize_rows
+from core.materialized_views import materialized_views
+from core.progress import emit_progress
+from core.result_shaping import note_result
+from core.tracing import athena_statistics, record, span
+from core.query_cache import (
+    RESULT_REUSE_MAX_AGE_MINUTES,
+    normalize_sql,
+    query_cache,
+    referenced_tables,
+)
+from core.sql_guard import SQLRejected, prepare_sql
+from tools.backends import DuckDBBackend, QueryBackend, RoutingBackend, capped_rows
 
 ATHENA_REGION = "ap-south-1"
 ATHENA_DATABASE = "demo"
 ATHENA_OUTPUT = "s3://s3-bucket-demo-athena-result/query_result/"
 
-athena = boto3.client("athena", region_name=ATHENA_REGION)
+# "api" pages through get_query_results; "s3" streams the result CSV.
+ATHENA_RESULT_SOURCE = "api"
 
+# "athena", "duckdb" (local data/ files only) or "auto" (small tables locally).
+QUERY_BACKEND = os.environ.get("QUERY_BACKEND", "athena")
+
+athena = get_client("athena", region_name=ATHENA_REGION)
+s3 = get_client("s3", region_name=ATHENA_REGION)
 
-@tool
-def run_athena(sql: str):
-    """
-    Execute Athena SQL and return rows as list[dict].
-    """
-    print(f"[ATHENA] {sql}")
 
-    qid = athena.start_query_execution(
+def _start_query(sql: str) -> str:
+    print(f"[ATHENA] {sql}")
+    return athena.start_query_execution(
         QueryString=sql,
         QueryExecutionContext={"Database": ATHENA_DATABASE},
         ResultConfiguration={"OutputLocation": ATHENA_OUTPUT},
+        ResultReuseConfiguration={
+            "ResultReuseByAgeConfiguration": {
+                "Enabled": query_cache.allow_result_reuse(referenced_tables(sql)),
+                "MaxAgeInMinutes": RESULT_REUSE_MAX_AGE_MINUTES,
+            }
+        },
     )["QueryExecutionId"]
 
-    while True:
-        status = athena.get_query_execution(QueryExecutionId=qid)
-        state = status["QueryExecution"]["Status"]["State"]
-        if state in ("SUCCEEDED", "FAILED", "CANCELLED"):
-            break
-        time.sleep(1)
 
+def _iter_rows(execution: dict, source: str, columns: list = None):
+    state = execution["Status"]["State"]
     if state != "SUCCEEDED":
-        raise RuntimeError(f"Athena query failed: {state}")
+        reason = execution["Status"].get("StateChangeReason", "")
+        raise RuntimeError(f"Athena query failed: {state} {reason}".strip())
+
+    if source == "s3":
+        if columns is not None:
+            # The CSV has no types; one metadata-only page has them
+            metadata = athena.get_query_results(
+                QueryExecutionId=execution["QueryExecutionId"], MaxResults=1
+            )["ResultSet"]["ResultSetMetadata"]
+            columns.extend(column_types(metadata["ColumnInfo"]))
+        return iter_s3_rows(s3, execution["ResultConfiguration"]["OutputLocation"])
+    return iter_api_rows(athena, execution["QueryExecutionId"], columns=columns)
+
+
+def _cache_key(sql: str, max_rows: int, max_bytes: int):
+    normalized = normalize_sql(sql)
+    if not normalized.startswith(("select", "with")):
+        return None
+    return (normalized, max_rows, max_bytes)
+
+
+def iter_athena(sql: str, timeout: float = QUERY_TIMEOUT, source: str = ATHENA_RESULT_SOURCE):
+    """
+    Execute Athena SQL and yield rows as dicts, fetching pages lazily.
+    """
+    qid = _start_query(sql)
+    yield from _iter_rows(wait_for_query(athena, qid, timeout=timeout), source)
+
+
+class AthenaBackend(QueryBackend):
+    name = "athena"
+
+    def __init__(self, source: str = ATHENA_RESULT_SOURCE):
+        self.source = source
+
+    def execute(self, sql: str, timeout: float, max_rows: int, max_bytes: int):
+        with span("athena") as stats:
+            qid = _start_query(sql)
+            execution = wait_for_query(athena, qid, timeout=timeout)
+            stats.update(athena_statistics(execution), query_id=qid)
+        with span("athena_decode", source=self.source) as decoded:
+            columns = []
+            rows = capped_rows(_iter_rows(execution, self.source, columns), max_rows, max_bytes, "ATHENA")
+            decoded["rows"] = len(rows)
+        return ResultRows(rows, columns)
+
+    async def execute_async(self, sql: str, timeout: float, max_rows: int, max_bytes: int):
+        with span("athena") as stats:
+            qid = await asyncio.to_thread(_start_query, sql)
+            execution = await wait_for_query_async(
+                athena,
+                qid,
+                timeout=timeout,
+                on_poll=lambda state, elapsed: emit_progress(
+                    f"Athena query {state.lower()}, {elapsed:.1f}s"
+                ),
+            )
+            stats.update(athena_statistics(execution), query_id=qid)
+        with span("athena_decode", source=self.source) as decoded:
+            columns = []
+            rows = await asyncio.to_thread(
+                capped_rows, _iter_rows(execution, self.source, columns), max_rows, max_bytes, "ATHENA"
+            )
+            decoded["rows"] = len(rows)
+        return ResultRows(rows, columns)
+
+
+def make_backend(kind: str) -> QueryBackend:
+    """Build the backend named by QUERY_BACKEND: athena, duckdb or auto."""
+    if kind == "athena":
+        return AthenaBackend()
+    local = DuckDBBackend()
+
+    def reload(tables):
+        # Refreshed summary tables are invalidated too; they live in the
+        # same connection and must not trigger a reload of the sources.
+        if tables & set(local.table_bytes):
+            local.reload()
+            if kind == "duckdb":
+                materialized_views.forget()
 
-    result = athena.get_query_results(QueryExecutionId=qid)
-    rows = result["ResultSet"]["Rows"]
+    query_cache.on_invalidate(reload)
+    if kind == "duckdb":
+        return local
+    if kind == "auto":
+        return RoutingBackend(local, AthenaBackend())
+    raise ValueError(f"Unknown QUERY_BACKEND: {kind}")
 
-    headers = [c["VarCharValue"] for c in rows[0]["Data"]]
-    return [
-        dict(zip(headers, [d.get("VarCharValue") for d in r["Data"]]))
-        for r in rows[1:]
-    ]
+
+backend = make_backend(QUERY_BACKEND)
+
+
+def query_athena(
+    sql: str,
+    timeout: float = QUERY_TIMEOUT,
+    max_rows: int = MAX_RESULT_ROWS,
+    max_bytes: int = MAX_RESULT_BYTES,
+):
+    """
+    Execute SQL on the configured backend and return rows as list[dict].
+    """
+    note_tables(referenced_tables(sql))
+    sql = materialized_views.rewrite(sql)
+    key = _cache_key(sql, max_rows, max_bytes)
+    rows = query_cache.get(key) if key else None
+    if rows is not None:
+        record("athena_cache_hit", 0)
+        return rows
+
+    rows = backend.execute(sql, timeout, max_rows, max_bytes)
+    if key:
+        query_cache.put(key, rows, referenced_tables(sql))
+    return rows
+
+
+async def query_athena_async(
+    sql: str,
+    timeout: float = QUERY_TIMEOUT,
+    max_rows: int = MAX_RESULT_ROWS,
+    max_bytes: int = MAX_RESULT_BYTES,
+):
+    """
+    Execute SQL on the configured backend without blocking the event loop.
+    """
+    note_tables(referenced_tables(sql))
+    sql = materialized_views.rewrite(sql)
+    key = _cache_key(sql, max_rows, max_bytes)
+    rows = query_cache.get(key) if key else None
+    if rows is not None:
+        record("athena_cache_hit", 0)
+        return rows
+
+    rows = await backend.execute_async(sql, timeout, max_rows, max_bytes)
+    if key:
+        query_cache.put(key, rows, referenced_tables(sql))
+    return rows
+
+
+def _checked_sql(sql: str, allowed_tables):
+    with span("sql_guard") as stats:
+        try:
+            checked = prepare_sql(sql, allowed_tables)
+        except SQLRejected as e:
+            stats["rejected"] = True
+            print(f"[SQL] rejected: {str(e)}")
+            raise
+        except Exception as e:
+            # e.g. the schema could not be loaded; the engine still validates
+            print(f"[SQL] validation skipped: {str(e)}")
+            return sql
+        stats["rewritten"] = checked != sql
+    return checked
+
+
+@tool(context=True)
+async def run_athena(sql: str, tool_context: ToolContext):
+    """
+    Execute Athena SQL. Returns a row count, the columns and the first rows
+    as a compact table; larger results come with a result id for read_result.
+    """
+    # Checked locally against the schema and this agent's allowed_tables
+    try:
+        sql = _checked_sql(sql, tool_context.agent.state.get("allowed_tables"))
+    except SQLRejected as e:
+        return f"Query rejected before execution: {str(e)}"
+    rows = await query_athena_async(sql)
+    note_result(sql, rows)
+    result_id = result_store.put(rows) if len(rows) > TOOL_RESULT_PREVIEW_ROWS else None
+    return summarize_rows(rows, result_id)
+
+
+@tool
+def read_result(result_id: str, offset: int = 0):
+    """
+    Read more rows of an earlier run_athena result, starting at `offset`.
+    """
+    rows = result_store.get(result_id)
+    if rows is None:
+        return f"Result {result_id} has expired; run the query again."
+    return summarize_rows(rows, result_id, offset)
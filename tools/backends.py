@@ -0,0 +1,195 @@
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from core.athena_results import ResultRows, cap_rows
+from core.query_cache import referenced_tables
+from core.tracing import span
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+LOCAL_DATABASE = "demo"
+LOCAL_TABLE_MAX_BYTES = 256 * 1024 * 1024
+FETCH_BATCH_SIZE = 1000
+
+
+def capped_rows(rows, max_rows: int, max_bytes: int, label: str):
+    """Apply the result caps and tell the model when rows were cut off."""
+    rows, truncated = cap_rows(rows, max_rows, max_bytes)
+    if truncated:
+        print(f"[{label}] result truncated at {len(rows)} rows")
+        rows.append({
+            "truncated": f"Result capped at {len(rows)} rows. "
+            "Use filters or aggregates to narrow the query."
+        })
+    return rows
+
+
+class QueryBackend(ABC):
+    """
+    Somewhere run_athena can send SQL. Implementations return rows as
+    list[dict] with values as strings (or None), the way Athena does,
+    preferably as ResultRows carrying the column types.
+    """
+
+    name = "backend"
+
+    @abstractmethod
+    def execute(self, sql: str, timeout: float, max_rows: int, max_bytes: int):
+        """Run `sql` and return at most `max_rows` rows (and about `max_bytes`)."""
+
+    async def execute_async(self, sql: str, timeout: float, max_rows: int, max_bytes: int):
+        return await asyncio.to_thread(self.execute, sql, timeout, max_rows, max_bytes)
+
+    def handles(self, tables) -> bool:
+        return True
+
+
+def _athena_type(duckdb_type) -> str:
+    """DuckDB type as the Athena type name it reads back as: BIGINT -> bigint."""
+    dtype = str(duckdb_type).lower().replace(" ", "")
+    return {"float": "real", "hugeint": "decimal(38,0)"}.get(dtype, dtype)
+
+
+def _athena_text(value):
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+
+class DuckDBBackend(QueryBackend):
+    """
+    Embedded DuckDB engine over the demo tables in data/.
+
+    Loads every data/<table>.csv (or data/parquet/<table>/ when generated
+    with --format parquet) into an in-memory `demo` schema on first use
+    and answers the same SQL locally in milliseconds, with no network.
+    """
+
+    name = "duckdb"
+
+    def __init__(self, data_dir=DATA_DIR, database=LOCAL_DATABASE):
+        self.data_dir = Path(data_dir)
+        self.database = database
+        self.table_bytes = {}
+        self._conn = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _table_sources(self):
+        """{table: (scan expression, bytes on disk)}; parquet/ wins over CSV."""
+        sources = {
+            path.stem.lower(): (f"read_csv_auto('{path.as_posix()}')", path.stat().st_size)
+            for path in sorted(self.data_dir.glob("*.csv"))
+        }
+        for path in sorted((self.data_dir / "parquet").glob("*/")):
+            files = list(path.rglob("*.parquet"))
+            if files:
+                sources[path.name.lower()] = (
+                    f"read_parquet('{path.as_posix()}/**/*.parquet', hive_partitioning = true)",
+                    sum(f.stat().st_size for f in files),
+                )
+        return sources
+
+    def connect(self):
+        with self._lock:
+            if self._conn is None:
+                import duckdb
+
+                conn = duckdb.connect()
+                conn.execute(f"CREATE SCHEMA IF NOT EXISTS {self.database}")
+                for table, (scan, size) in self._table_sources().items():
+                    conn.execute(
+                        f"CREATE OR REPLACE TABLE {self.database}.{table} AS SELECT * FROM {scan}"
+                    )
+                    self.table_bytes[table] = size
+                conn.execute(f"USE memory.{self.database}")
+                print(f"[DUCKDB] loaded {len(self.table_bytes)} tables from {self.data_dir}")
+                self._conn = conn
+        return self._conn
+
+    def reload(self):
+        """Drop the loaded tables; the next query reloads them from disk."""
+        with self._lock:
+            self._conn = None
+            self.table_bytes = {}
+            self._local = threading.local()
+
+    def _cursor(self):
+        conn = self.connect()
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None or getattr(self._local, "conn", None) is not conn:
+            cursor = conn.cursor()
+            cursor.execute(f"USE memory.{self.database}")
+            self._local.cursor = cursor
+            self._local.conn = conn
+        return cursor
+
+    def handles(self, tables) -> bool:
+        self.connect()
+        return bool(tables) and all(
+            self.table_bytes.get(t, LOCAL_TABLE_MAX_BYTES + 1) <= LOCAL_TABLE_MAX_BYTES
+            for t in tables
+        )
+
+    def _iter_rows(self, cursor):
+        if cursor.description is None:
+            return
+        columns = [d[0] for d in cursor.description]
+        while batch := cursor.fetchmany(FETCH_BATCH_SIZE):
+            for values in batch:
+                yield dict(zip(columns, map(_athena_text, values)))
+
+    def execute(self, sql: str, timeout: float, max_rows: int, max_bytes: int):
+        print(f"[DUCKDB] {sql}")
+        cursor = self._cursor()
+        watchdog = threading.Timer(timeout, cursor.interrupt)
+        watchdog.daemon = True
+        with span("duckdb") as stats:
+            watchdog.start()
+            try:
+                cursor.execute(sql)
+                columns = [(d[0], _athena_type(d[1])) for d in cursor.description or ()]
+                rows = capped_rows(self._iter_rows(cursor), max_rows, max_bytes, "DUCKDB")
+            finally:
+                watchdog.cancel()
+            stats["rows"] = len(rows)
+        return ResultRows(rows, columns)
+
+
+class RoutingBackend(QueryBackend):
+    """
+    Runs queries whose tables are all small enough locally and sends
+    everything else (large scans, information_schema, unknown tables) to
+    the remote backend. Local failures, e.g. dialect differences, are
+    retried remotely.
+    """
+
+    name = "auto"
+
+    def __init__(self, local: QueryBackend, remote: QueryBackend):
+        self.local = local
+        self.remote = remote
+
+    def pick(self, sql: str) -> QueryBackend:
+        return self.local if self.local.handles(referenced_tables(sql)) else self.remote
+
+    def execute(self, sql: str, timeout: float, max_rows: int, max_bytes: int):
+        backend = self.pick(sql)
+        if backend is self.local:
+            try:
+                return backend.execute(sql, timeout, max_rows, max_bytes)
+            except Exception as e:
+                print(f"[ROUTER] local execution failed, using {self.remote.name}: {str(e)}")
+        return self.remote.execute(sql, timeout, max_rows, max_bytes)
+
+    async def execute_async(self, sql: str, timeout: float, max_rows: int, max_bytes: int):
+        backend = self.pick(sql)
+        if backend is self.local:
+            try:
+                return await backend.execute_async(sql, timeout, max_rows, max_bytes)
+            except Exception as e:
+                print(f"[ROUTER] local execution failed, using {self.remote.name}: {str(e)}")
+        return await self.remote.execute_async(sql, timeout, max_rows, max_bytes)